@@ -1,13 +1,144 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session
+import hashlib
+import os
+
+from flask import Flask, Response, g, render_template, stream_template, request, jsonify, redirect, url_for, session
+from markupsafe import Markup
+
 import crud
+import db_pool
+import inference_pool
+import metrics
+import onboarding
 from ml_predictor import ml_system
 
 app = Flask(__name__)
 app.secret_key = "supersecret"  # needed for session login
 
-# Load ML model at startup
-print("Loading ML model...")
-ml_system.load_model()
+# Load the ML model off the request path (ML_MODEL_LOADING=background|lazy|eager);
+# /readyz reports 503 until it is loaded
+MODEL_LOADING = os.environ.get("ML_MODEL_LOADING", "background")
+ml_system.start_loading(MODEL_LOADING)
+
+PAGE_SIZE = 50          # vehicles per dashboard / API page
+MAX_PAGE_SIZE = 500
+
+# ML_INFERENCE_POOL=1 runs predictions in inference_pool's worker processes
+# (micro-batched) instead of on the request thread
+USE_INFERENCE_POOL = os.environ.get("ML_INFERENCE_POOL") == "1"
+
+@app.before_request
+def start_request_timer():
+    g.request_started = metrics.request_started()
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by route template (/update/<int:vehicle_id>), not the raw path
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    args = (g.request_started, route, request.method, response.status_code)
+    if response.is_streamed:
+        # Streamed pages do most of their work after this hook; time them to the last byte
+        response.call_on_close(lambda: metrics.request_finished(*args))
+    else:
+        metrics.request_finished(*args)
+    return response
+
+def predict_issues_for(model, year, mileage):
+    """Predicted issues for one vehicle, in-process or on the inference pool"""
+    if not USE_INFERENCE_POOL:
+        return ml_system.predict_service_issues(model, year, mileage)
+    try:
+        return inference_pool.get_batcher().predict(model, year, mileage)
+    except Exception as e:
+        print(f"Error during prediction: {e}")
+        return []
+
+def predict_issues_for_batch(vehicles):
+    if USE_INFERENCE_POOL:
+        return inference_pool.get_batcher().predict_batch(vehicles)
+    return ml_system.predict_service_issues_batch(vehicles)
+
+def page_args():
+    """(limit, after) from ?after=<last id>&limit=<n>"""
+    limit = max(1, min(request.args.get("limit", PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    return limit, request.args.get("after", type=int)
+
+def vehicle_page(owner_name=None):
+    """
+    One keyset page of vehicles from ?after=<last id>&limit=<n>
+    
+    Returns (vehicles, next_cursor); next_cursor is None on the last page.
+    """
+    limit, after = page_args()
+    
+    # Fetch one extra row to know whether another page exists
+    if owner_name is None:
+        rows = crud.view_vehicles(limit=limit + 1, after_id=after)
+    else:
+        rows = crud.get_customer_vehicles(owner_name, limit=limit + 1, after_id=after)
+    
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+# ---------------- RENDERING ----------------
+def _templates_digest():
+    """Hash of every template, so changed templates never match an old ETag"""
+    digest = hashlib.sha1()
+    folder = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(folder)):
+        with open(os.path.join(folder, name), "rb") as f:
+            digest.update(name.encode() + f.read())
+    return digest.hexdigest()
+
+TEMPLATES_VERSION = _templates_digest()
+
+def vehicle_table(owner_name=None):
+    """
+    Dashboard stats, vehicle table and pagination as a callable for index.html
+    
+    The rendered fragment is cached until a write changes the fleet (or the
+    owner's vehicles). It is only loaded when the template reaches it, so a
+    streamed page has already sent its head by then.
+    """
+    template = "employee_vehicles.html" if owner_name is None else "customer_vehicles.html"
+    limit, after = page_args()
+    
+    def render():
+        vehicles, next_cursor = vehicle_page(owner_name)
+        return render_template(template,
+                               vehicles=vehicles,
+                               next_cursor=next_cursor,
+                               page_after=after,
+                               total_vehicles=crud.count_vehicles(owner_name))
+    
+    return lambda: Markup(crud.cached_fragment((template, limit, after), render, owner_name))
+
+def dashboard_response(owner_name=None, **context):
+    """
+    Stream a dashboard page, or answer 304 when the client's copy is current
+    
+    The ETag covers the templates, the data version, the user and the page,
+    so it is known before anything is queried or rendered. The data version
+    only tracks every process's writes on a shared cache backend, so with the
+    in-process one no ETag is sent and every view is rendered.
+    """
+    etag = None
+    if crud.vehicle_cache.shared:
+        etag = hashlib.sha1(repr((
+            TEMPLATES_VERSION,
+            crud.data_version(owner_name),
+            session["user"],
+            sorted(request.args.items(multi=True))
+        )).encode()).hexdigest()
+    
+    if etag and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(stream_template("index.html", vehicle_table=vehicle_table(owner_name), **context))
+    if etag:
+        response.set_etag(etag)
+    # Per-user pages: browsers may keep them but must revalidate every view
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 # ---------------- HOME ----------------
 @app.route("/")
@@ -33,28 +164,58 @@ def search_vehicle():
     # If GET request, show the search form in employee dashboard
     return redirect(url_for("employee_dashboard"))
 
-# ---------------- VIN SEARCH FROM EMPLOYEE DASHBOARD ----------------
-@app.route("/employee/search", methods=["POST"])
+# ---------------- VEHICLE SEARCH FROM EMPLOYEE DASHBOARD ----------------
+SEARCH_PREVIEW = 10     # matches shown per field when searching every field
+SEARCH_LABELS = {
+    "vin": "VIN",
+    "plate": "License Plate",
+    "model": "Model",
+    "owner": "Owner Name",
+    "text": "VIN or Plate Contains",
+}
+
+@app.route("/employee/search", methods=["GET", "POST"])
 def employee_search():
     if "user" not in session or session["user"]["role"] != "employee":
         return redirect(url_for("home"))
     
-    vin = request.form.get("vin", "").strip()
-    if vin:
-        vehicle = crud.search_vehicle_by_vin(vin)
+    # ?q=<term>&field=all|vin|plate|model|owner|text&after=<next_cursor>; "vin" is the old form field
+    term = (request.values.get("q") or request.values.get("vin", "")).strip()
+    field = request.values.get("field", "all")
+    after = request.args.get("after")
+    if not term or (field != "all" and field not in crud.SEARCH_FIELDS):
+        return redirect(url_for("employee_dashboard"))
+    try:
+        if after:
+            crud.parse_search_cursor(after)
+    except ValueError:
+        # Like page_args(), a mangled cursor starts over at the first page
+        after = None
+    
+    # An exact VIN still opens the vehicle's details
+    if field in ("all", "vin") and not after:
+        vehicle = crud.search_vehicle_by_vin(term)
         if vehicle:
-            return render_template("index.html", search_result=vehicle, searched_vin=vin)
-        else:
-            return render_template("index.html", 
-                                 search_error=f"No vehicle found with VIN: {vin}", 
-                                 searched_vin=vin,
-                                 role="employee",
-                                 dashboard=True,
-                                 employee_id=session["user"]["employee_id"],
-                                 vehicles=crud.view_vehicles(),
-                                 total_vehicles=len(crud.view_vehicles()))
+            return render_template("index.html", search_result=vehicle, searched_vin=term)
     
-    return redirect(url_for("employee_dashboard"))
+    if field == "all":
+        results = crud.search_all(term, SEARCH_PREVIEW)
+    else:
+        limit, _ = page_args()
+        results = {field: crud.search_vehicles(term, field, limit, after)}
+    
+    found = any(vehicles for vehicles, _ in results.values())
+    return render_template("index.html", 
+                         search_error=None if found else f"No vehicle found matching: {term}", 
+                         search_results=results if found else None,
+                         search_term=term,
+                         search_field=field,
+                         search_after=after,
+                         search_labels=SEARCH_LABELS,
+                         role="employee",
+                         dashboard=True,
+                         employee_id=session["user"]["employee_id"],
+                         vehicle_table=vehicle_table())
 
 # ---------------- LOGIN ----------------
 @app.route("/login/<role>", methods=["GET", "POST"])
@@ -99,32 +260,22 @@ def customer_dashboard():
     
     # Get only vehicles owned by this customer
     owner_name = session["user"]["owner_name"]
-    vehicles = crud.get_customer_vehicles(owner_name)
-    
-    # Calculate stats for this customer
-    total_vehicles = len(vehicles)
     
-    return render_template("index.html", 
-                         vehicles=vehicles, 
-                         role="customer", 
-                         dashboard=True,
-                         customer_name=owner_name,
-                         total_vehicles=total_vehicles)
+    return dashboard_response(owner_name,
+                              role="customer", 
+                              dashboard=True,
+                              customer_name=owner_name)
 
 @app.route("/employee/dashboard")
 def employee_dashboard():
     if "user" not in session or session["user"]["role"] != "employee":
         return redirect(url_for("home"))
     
-    vehicles = crud.view_vehicles()
     employee_id = session["user"]["employee_id"]
     
-    return render_template("index.html", 
-                         vehicles=vehicles, 
-                         role="employee", 
-                         dashboard=True,
-                         employee_id=employee_id,
-                         total_vehicles=len(vehicles))
+    return dashboard_response(role="employee", 
+                              dashboard=True,
+                              employee_id=employee_id)
 
 # ---------------- API for AJAX in CRUD ----------------
 @app.route("/vehicles")
@@ -132,13 +283,30 @@ def get_vehicles():
     if "user" not in session:
         return jsonify({"error": "Unauthorized"}), 401
     
+    # Keyset-paginated: follow next_cursor with /vehicles?after=<next_cursor>
     if session["user"]["role"] == "customer":
-        owner_name = session["user"]["owner_name"]
-        data = crud.get_customer_vehicles(owner_name)
+        data, next_cursor = vehicle_page(session["user"]["owner_name"])
     else:
-        data = crud.view_vehicles()
+        data, next_cursor = vehicle_page()
     
-    return jsonify(data)
+    return jsonify({"vehicles": data, "next_cursor": next_cursor})
+
+@app.route("/vehicles/search")
+def search_vehicles():
+    if "user" not in session or session["user"]["role"] != "employee":
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    # /vehicles/search?q=<term>&field=vin|plate|model|owner|text; follow next_cursor with &after=<next_cursor>
+    field = request.args.get("field", "vin")
+    if field not in crud.SEARCH_FIELDS:
+        return jsonify({"error": f"field must be one of {', '.join(crud.SEARCH_FIELDS)}"}), 400
+    
+    limit, _ = page_args()
+    try:
+        data, next_cursor = crud.search_vehicles(request.args.get("q", ""), field, limit, request.args.get("after"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"vehicles": data, "next_cursor": next_cursor})
 
 # ---------------- VEHICLE CRUD (Employee Only) ----------------
 @app.route("/add", methods=["GET", "POST"])
@@ -157,7 +325,7 @@ def add_vehicle():
         mileage = request.form.get("mileage", 0)
         
         # Get ML predictions
-        predicted_issues = ml_system.predict_service_issues(model, year, mileage)
+        predicted_issues = predict_issues_for(model, year, mileage)
         issue_priorities = ml_system.get_issue_priorities(predicted_issues, 2024 - int(year), int(mileage))
         
         success = crud.add_vehicle(vin, plate, model, year, owner, contact, password, mileage)
@@ -213,6 +381,37 @@ def delete_vehicle(vehicle_id):
     crud.delete_vehicle(vehicle_id)
     return redirect(url_for("employee_dashboard"))
 
+# ---------------- BULK ONBOARDING (Employee Only) ----------------
+@app.route("/vehicles/bulk", methods=["POST"])
+def bulk_onboard():
+    if "user" not in session or session["user"]["role"] != "employee":
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    # A multipart "file" field, or the CSV / JSON as the request body itself
+    upload = request.files.get("file")
+    if upload:
+        stream, mimetype, filename = upload.stream, upload.mimetype, upload.filename or ""
+    else:
+        stream, mimetype, filename = request.stream, request.mimetype, ""
+    
+    if mimetype == "application/json" or filename.lower().endswith(".json"):
+        rows = onboarding.read_json(stream)
+    elif mimetype in ("text/csv", "application/vnd.ms-excel") or filename.lower().endswith(".csv"):
+        rows = onboarding.read_csv(stream)
+    else:
+        return jsonify({"error": "Upload a CSV (text/csv) or JSON (application/json) file"}), 415
+    
+    # ?score=0 adds the vehicles now and leaves predictions to the nightly batch_scoring.py run
+    system = None if request.args.get("score") == "0" else ml_system
+    try:
+        report = onboarding.onboard(rows, system=system)
+    except Exception as e:
+        print(f"Error during bulk onboarding: {e}")
+        return jsonify({"error": "Bulk onboarding failed"}), 500
+    
+    # Rows before an unreadable part of the upload are still added
+    return jsonify(report), 400 if "error" in report else 200
+
 # ---------------- ML PREDICTION API ----------------
 @app.route("/predict_issues", methods=["POST"])
 def predict_issues():
@@ -226,7 +425,7 @@ def predict_issues():
         year = data.get('year', 2020)
         mileage = data.get('mileage', 0)
         
-        predicted_issues = ml_system.predict_service_issues(model, year, mileage)
+        predicted_issues = predict_issues_for(model, year, mileage)
         issue_priorities = ml_system.get_issue_priorities(predicted_issues, 2024 - int(year), int(mileage))
         
         return jsonify({
@@ -240,5 +439,104 @@ def predict_issues():
             'error': str(e)
         }), 500
 
+MAX_PREDICTION_BATCH = 10000
+
+@app.route("/predict_issues/batch", methods=["POST"])
+def predict_issues_batch():
+    """API endpoint to get ML predictions for a list of vehicles in one call"""
+    if "user" not in session or session["user"]["role"] != "employee":
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    vehicles = request.get_json(silent=True)
+    if not isinstance(vehicles, list) or not all(isinstance(v, dict) for v in vehicles):
+        return jsonify({
+            'success': False,
+            'error': 'Expected a JSON list of {"model", "year", "mileage"} objects'
+        }), 400
+    if len(vehicles) > MAX_PREDICTION_BATCH:
+        return jsonify({
+            'success': False,
+            'error': f'Batch too large (max {MAX_PREDICTION_BATCH} vehicles)'
+        }), 400
+    
+    try:
+        batch_issues = predict_issues_for_batch(vehicles)
+        
+        results = []
+        for vehicle, predicted_issues in zip(vehicles, batch_issues):
+            year = int(vehicle.get('year', 2020))
+            mileage = int(vehicle.get('mileage', 0))
+            results.append({
+                'predicted_issues': predicted_issues,
+                'priorities': ml_system.get_issue_priorities(predicted_issues, 2024 - year, mileage)
+            })
+        
+        return jsonify({
+            'success': True,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ---------------- CACHE STATS ----------------
+@app.route("/cache_stats")
+def cache_stats():
+    """Hit rates of the lookup and prediction caches (employee only)"""
+    if "user" not in session or session["user"]["role"] != "employee":
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    return jsonify({
+        'vehicles': crud.vehicle_cache.stats(),
+        'predictions': ml_system.prediction_cache_stats()
+    })
+
+@app.route("/inference_stats")
+def inference_stats():
+    """Queue depth, batch sizes and latency percentiles of the inference pool (employee only)"""
+    if "user" not in session or session["user"]["role"] != "employee":
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    if not USE_INFERENCE_POOL:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **inference_pool.get_batcher().stats()})
+
+# ---------------- HEALTH ----------------
+@app.route("/healthz")
+def healthz():
+    """Liveness: the process is up and answering requests"""
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz")
+def readyz():
+    """Readiness: 503 until the ML model is loaded (or after a failed load)"""
+    ready = ml_system.is_ready(MODEL_LOADING)
+    return jsonify({
+        "ready": ready,
+        "model_loading": MODEL_LOADING,
+        "model": ml_system.load_status()
+    }), 200 if ready else 503
+
+# ---------------- METRICS ----------------
+@metrics.register_collector
+def collect_app_stats():
+    families = metrics.stats_families("app_cache", "cache", {
+        'vehicles': crud.vehicle_cache.stats(),
+        'predictions': ml_system.prediction_cache_stats()
+    }, metrics.CACHE_FIELDS)
+    families += metrics.stats_families("app_db_pool", "database", db_pool.pool_stats(), metrics.POOL_FIELDS)
+    if USE_INFERENCE_POOL:
+        families += metrics.stats_families("app_inference_pool", "pool", {
+            'default': inference_pool.get_batcher().stats()
+        }, metrics.INFERENCE_FIELDS)
+    return families
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus scrape target: route latency, DB and model time, cache and pool stats"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
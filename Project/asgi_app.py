@@ -0,0 +1,532 @@
+"""
+Async (ASGI) serving mode: the routes of app.py on Quart
+
+Database calls go through async_crud's aiomysql pool and model inference runs
+on a bounded thread pool, so one worker keeps serving other requests while a
+query or a prediction is in flight. Templates, sessions and URLs are the same
+as the Flask app.
+
+    pip install quart aiomysql
+    hypercorn asgi_app:app --bind 0.0.0.0:8000
+"""
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from quart import Quart, Response, g, render_template, request, jsonify, redirect, url_for, session
+
+import async_crud
+import crud
+import metrics
+import onboarding
+from ml_predictor import ml_system
+
+app = Quart(__name__)
+app.secret_key = "supersecret"  # same key as app.py, so sessions work on both servers
+
+PAGE_SIZE = 50          # vehicles per dashboard / API page
+MAX_PAGE_SIZE = 500
+MAX_PREDICTION_BATCH = 10000
+# Quart buffers a request body in memory (16 MB by default); bulk uploads may be larger
+MAX_BULK_UPLOAD_BYTES = 256 * 1024 * 1024
+BULK_UPLOAD_TIMEOUT = 300   # seconds to receive an upload
+
+# Forest inference is CPU-bound; a few threads run it (NumPy releases the GIL)
+# and at most INFERENCE_QUEUE_LIMIT predictions wait for them
+INFERENCE_WORKERS = min(4, os.cpu_count() or 1)
+INFERENCE_QUEUE_LIMIT = 64
+
+inference_executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix="inference")
+_inference_slots = None
+_inference_pending = 0      # predictions running or waiting for a thread
+
+# Load the ML model off the request path (ML_MODEL_LOADING=background|lazy|eager);
+# /readyz reports 503 until it is loaded
+MODEL_LOADING = os.environ.get("ML_MODEL_LOADING", "background")
+ml_system.start_loading(MODEL_LOADING)
+
+@app.before_serving
+async def startup():
+    global _inference_slots
+    _inference_slots = asyncio.Semaphore(INFERENCE_WORKERS + INFERENCE_QUEUE_LIMIT)
+    try:
+        await async_crud.init_pool()
+    except (async_crud.aiomysql.Error, OSError) as e:
+        # Not fatal: async_crud retries when the first query needs a connection
+        print(f"Error connecting to MySQL: {e}")
+
+@app.after_serving
+async def shutdown():
+    await async_crud.close_pool()
+    inference_executor.shutdown(wait=False)
+
+@app.before_request
+async def start_request_timer():
+    # Requests share the event loop thread, so the sampling profiler is WSGI-only
+    g.request_started = time.perf_counter()
+
+@app.after_request
+async def record_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.REQUEST_LATENCY.observe(time.perf_counter() - g.request_started,
+                                    route=route, method=request.method, status=response.status_code)
+    return response
+
+async def run_inference(func, *args):
+    """Run a model call on the inference threads without blocking the event loop"""
+    global _inference_pending
+    _inference_pending += 1
+    try:
+        async with _inference_slots:
+            return await asyncio.get_running_loop().run_in_executor(inference_executor, func, *args)
+    finally:
+        _inference_pending -= 1
+
+async def predict_with_priorities(model, year, mileage):
+    predicted_issues = await run_inference(ml_system.predict_service_issues, model, year, mileage)
+    issue_priorities = ml_system.get_issue_priorities(predicted_issues, 2024 - int(year), int(mileage))
+    return predicted_issues, issue_priorities
+
+def page_limit():
+    return max(1, min(request.args.get("limit", PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+async def vehicle_page(owner_name=None):
+    """
+    One keyset page of vehicles from ?after=<last id>&limit=<n>
+
+    Returns (vehicles, next_cursor); next_cursor is None on the last page.
+    """
+    limit = page_limit()
+    after = request.args.get("after", type=int)
+
+    # Fetch one extra row to know whether another page exists
+    if owner_name is None:
+        rows = await async_crud.view_vehicles(limit=limit + 1, after_id=after)
+    else:
+        rows = await async_crud.get_customer_vehicles(owner_name, limit=limit + 1, after_id=after)
+
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def is_employee():
+    return "user" in session and session["user"]["role"] == "employee"
+
+# ---------------- HOME ----------------
+@app.route("/")
+async def home():
+    return await render_template("index.html")
+
+# ---------------- VIN SEARCH (Employee Access Only) ----------------
+@app.route("/search", methods=["GET", "POST"])
+async def search_vehicle():
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    if request.method == "POST":
+        vin = (await request.form).get("vin", "").strip()
+        if vin:
+            vehicle = await async_crud.search_vehicle_by_vin(vin)
+            if vehicle:
+                return await render_template("index.html", search_result=vehicle, searched_vin=vin)
+            else:
+                return await render_template("index.html", search_error=f"No vehicle found with VIN: {vin}", searched_vin=vin)
+
+    return redirect(url_for("employee_dashboard"))
+
+# ---------------- VEHICLE SEARCH FROM EMPLOYEE DASHBOARD ----------------
+SEARCH_PREVIEW = 10     # matches shown per field when searching every field
+SEARCH_LABELS = {
+    "vin": "VIN",
+    "plate": "License Plate",
+    "model": "Model",
+    "owner": "Owner Name",
+    "text": "VIN or Plate Contains",
+}
+
+@app.route("/employee/search", methods=["GET", "POST"])
+async def employee_search():
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    # ?q=<term>&field=all|vin|plate|model|owner|text&after=<next_cursor>; "vin" is the old form field
+    values = await request.values
+    term = (values.get("q") or values.get("vin", "")).strip()
+    field = values.get("field", "all")
+    after = request.args.get("after")
+    if not term or (field != "all" and field not in crud.SEARCH_FIELDS):
+        return redirect(url_for("employee_dashboard"))
+    try:
+        if after:
+            crud.parse_search_cursor(after)
+    except ValueError:
+        # Like ?after on the dashboard, a mangled cursor starts over at the first page
+        after = None
+
+    # An exact VIN still opens the vehicle's details
+    if field in ("all", "vin") and not after:
+        vehicle = await async_crud.search_vehicle_by_vin(term)
+        if vehicle:
+            return await render_template("index.html", search_result=vehicle, searched_vin=term)
+
+    if field == "all":
+        search = async_crud.search_all(term, SEARCH_PREVIEW)
+    else:
+        search = async_crud.search_vehicles(term, field, page_limit(), after)
+    # The matches, the dashboard page and the count are independent queries
+    results, (vehicles, next_cursor), total_vehicles = await asyncio.gather(
+        search, vehicle_page(), async_crud.count_vehicles()
+    )
+    if field != "all":
+        results = {field: results}
+
+    found = any(matches for matches, _ in results.values())
+    return await render_template("index.html",
+                                 search_error=None if found else f"No vehicle found matching: {term}",
+                                 search_results=results if found else None,
+                                 search_term=term,
+                                 search_field=field,
+                                 search_after=after,
+                                 search_labels=SEARCH_LABELS,
+                                 role="employee",
+                                 dashboard=True,
+                                 employee_id=session["user"]["employee_id"],
+                                 vehicles=vehicles,
+                                 next_cursor=next_cursor,
+                                 total_vehicles=total_vehicles)
+
+# ---------------- LOGIN ----------------
+@app.route("/login/<role>", methods=["GET", "POST"])
+async def login(role):
+    if request.method == "POST":
+        form = await request.form
+        username = form["username"]
+        password = form["password"]
+
+        if role == "employee":
+            user = await async_crud.verify_employee(username, password)
+            if user:
+                session["user"] = {
+                    "role": "employee",
+                    "id": user["id"],
+                    "employee_id": user["employee_id"]
+                }
+                return redirect(url_for("employee_dashboard"))
+        elif role == "customer":
+            user = await async_crud.verify_customer(username, password)
+            if user:
+                session["user"] = {
+                    "role": "customer",
+                    "id": user["id"],
+                    "owner_name": user["owner_name"]
+                }
+                return redirect(url_for("customer_dashboard"))
+
+        return await render_template("index.html", error="Invalid credentials", role=role)
+
+    return await render_template("index.html", role=role)
+
+@app.route("/logout")
+async def logout():
+    session.clear()
+    return redirect(url_for("home"))
+
+# ---------------- DASHBOARDS ----------------
+@app.route("/customer/dashboard")
+async def customer_dashboard():
+    if "user" not in session or session["user"]["role"] != "customer":
+        return redirect(url_for("home"))
+
+    owner_name = session["user"]["owner_name"]
+    # The page and the count are independent queries, so run them concurrently
+    (vehicles, next_cursor), total_vehicles = await asyncio.gather(
+        vehicle_page(owner_name), async_crud.count_vehicles(owner_name)
+    )
+
+    return await render_template("index.html",
+                                 vehicles=vehicles,
+                                 next_cursor=next_cursor,
+                                 page_after=request.args.get("after", type=int),
+                                 role="customer",
+                                 dashboard=True,
+                                 customer_name=owner_name,
+                                 total_vehicles=total_vehicles)
+
+@app.route("/employee/dashboard")
+async def employee_dashboard():
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    (vehicles, next_cursor), total_vehicles = await asyncio.gather(
+        vehicle_page(), async_crud.count_vehicles()
+    )
+
+    return await render_template("index.html",
+                                 vehicles=vehicles,
+                                 next_cursor=next_cursor,
+                                 page_after=request.args.get("after", type=int),
+                                 role="employee",
+                                 dashboard=True,
+                                 employee_id=session["user"]["employee_id"],
+                                 total_vehicles=total_vehicles)
+
+# ---------------- API for AJAX in CRUD ----------------
+@app.route("/vehicles")
+async def get_vehicles():
+    if "user" not in session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if session["user"]["role"] == "customer":
+        data, next_cursor = await vehicle_page(session["user"]["owner_name"])
+    else:
+        data, next_cursor = await vehicle_page()
+
+    return jsonify({"vehicles": data, "next_cursor": next_cursor})
+
+@app.route("/vehicles/search")
+async def search_vehicles():
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # /vehicles/search?q=<term>&field=vin|plate|model|owner|text; follow next_cursor with &after=<next_cursor>
+    field = request.args.get("field", "vin")
+    if field not in crud.SEARCH_FIELDS:
+        return jsonify({"error": f"field must be one of {', '.join(crud.SEARCH_FIELDS)}"}), 400
+
+    try:
+        data, next_cursor = await async_crud.search_vehicles(request.args.get("q", ""), field, page_limit(),
+                                                             request.args.get("after"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"vehicles": data, "next_cursor": next_cursor})
+
+# ---------------- VEHICLE CRUD (Employee Only) ----------------
+@app.route("/add", methods=["GET", "POST"])
+async def add_vehicle():
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    if request.method == "POST":
+        form = await request.form
+        vin = form["vin"]
+        plate = form["plate"]
+        model = form["model"]
+        year = form["year"]
+        owner = form["owner"]
+        contact = form["contact"]
+        password = form["password"]
+        mileage = form.get("mileage", 0)
+
+        # Predict and insert concurrently
+        (predicted_issues, issue_priorities), success = await asyncio.gather(
+            predict_with_priorities(model, year, mileage),
+            async_crud.add_vehicle(vin, plate, model, year, owner, contact, password, mileage)
+        )
+
+        if success:
+            return await render_template("index.html",
+                                         role="employee",
+                                         show_predictions=True,
+                                         predicted_issues=predicted_issues,
+                                         issue_priorities=issue_priorities,
+                                         vehicle_info={
+                                             'model': model,
+                                             'year': year,
+                                             'vin': vin,
+                                             'mileage': mileage
+                                         })
+        else:
+            return await render_template("index.html", add_vehicle=True, error="Failed to add vehicle")
+
+    return await render_template("index.html", add_vehicle=True)
+
+@app.route("/update/<int:vehicle_id>", methods=["GET", "POST"])
+async def update_vehicle(vehicle_id):
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    if request.method == "POST":
+        form = await request.form
+        success = await async_crud.update_vehicle(
+            vehicle_id, form["vin"], form["plate"], form["model"], form["year"],
+            form["owner"], form["contact"], form.get("password", "")
+        )
+
+        if success:
+            return redirect(url_for("employee_dashboard"))
+        else:
+            vehicle = await async_crud.get_vehicle_by_id(vehicle_id)
+            return await render_template("index.html", vehicle=vehicle, update_vehicle=True, error="Failed to update vehicle")
+
+    vehicle = await async_crud.get_vehicle_by_id(vehicle_id)
+    return await render_template("index.html", vehicle=vehicle, update_vehicle=True)
+
+@app.route("/delete/<int:vehicle_id>")
+async def delete_vehicle(vehicle_id):
+    if not is_employee():
+        return redirect(url_for("home"))
+
+    await async_crud.delete_vehicle(vehicle_id)
+    return redirect(url_for("employee_dashboard"))
+
+# ---------------- BULK ONBOARDING (Employee Only) ----------------
+@app.route("/vehicles/bulk", methods=["POST"])
+async def bulk_onboard():
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    request.max_content_length = MAX_BULK_UPLOAD_BYTES
+    request.body_timeout = BULK_UPLOAD_TIMEOUT
+    # A multipart "file" field, or the CSV / JSON as the request body itself
+    upload = (await request.files).get("file")
+    if upload:
+        stream, mimetype, filename = upload.stream, upload.mimetype, upload.filename or ""
+    else:
+        stream, mimetype, filename = io.BytesIO(await request.get_data()), request.mimetype, ""
+
+    if mimetype == "application/json" or filename.lower().endswith(".json"):
+        rows = onboarding.read_json(stream)
+    elif mimetype in ("text/csv", "application/vnd.ms-excel") or filename.lower().endswith(".csv"):
+        rows = onboarding.read_csv(stream)
+    else:
+        return jsonify({"error": "Upload a CSV (text/csv) or JSON (application/json) file"}), 415
+
+    # ?score=0 adds the vehicles now and leaves predictions to the nightly batch_scoring.py run
+    system = None if request.args.get("score") == "0" else ml_system
+    try:
+        # onboard() reads, inserts and scores synchronously, so keep it off the event loop
+        report = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: onboarding.onboard(rows, system=system))
+    except Exception as e:
+        print(f"Error during bulk onboarding: {e}")
+        return jsonify({"error": "Bulk onboarding failed"}), 500
+
+    # Rows before an unreadable part of the upload are still added
+    return jsonify(report), 400 if "error" in report else 200
+
+# ---------------- ML PREDICTION API ----------------
+@app.route("/predict_issues", methods=["POST"])
+async def predict_issues():
+    """API endpoint to get ML predictions for a vehicle"""
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    try:
+        data = await request.get_json()
+        predicted_issues, issue_priorities = await predict_with_priorities(
+            data.get('model', ''), data.get('year', 2020), data.get('mileage', 0)
+        )
+
+        return jsonify({
+            'success': True,
+            'predicted_issues': predicted_issues,
+            'priorities': issue_priorities
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route("/predict_issues/batch", methods=["POST"])
+async def predict_issues_batch():
+    """API endpoint to get ML predictions for a list of vehicles in one call"""
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    vehicles = await request.get_json(silent=True)
+    if not isinstance(vehicles, list) or not all(isinstance(v, dict) for v in vehicles):
+        return jsonify({
+            'success': False,
+            'error': 'Expected a JSON list of {"model", "year", "mileage"} objects'
+        }), 400
+    if len(vehicles) > MAX_PREDICTION_BATCH:
+        return jsonify({
+            'success': False,
+            'error': f'Batch too large (max {MAX_PREDICTION_BATCH} vehicles)'
+        }), 400
+
+    try:
+        batch_issues = await run_inference(ml_system.predict_service_issues_batch, vehicles)
+
+        results = []
+        for vehicle, predicted_issues in zip(vehicles, batch_issues):
+            year = int(vehicle.get('year', 2020))
+            mileage = int(vehicle.get('mileage', 0))
+            results.append({
+                'predicted_issues': predicted_issues,
+                'priorities': ml_system.get_issue_priorities(predicted_issues, 2024 - year, mileage)
+            })
+
+        return jsonify({
+            'success': True,
+            'results': results
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# ---------------- CACHE STATS ----------------
+@app.route("/cache_stats")
+async def cache_stats():
+    """Hit rates of the lookup and prediction caches (employee only)"""
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    return jsonify({
+        'vehicles': crud.vehicle_cache.stats(),
+        'predictions': ml_system.prediction_cache_stats()
+    })
+
+@app.route("/inference_stats")
+async def inference_stats():
+    """Predictions running or queued on the inference threads (employee only)"""
+    if not is_employee():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # app.py's ML_INFERENCE_POOL process pool is not used here; models run on inference_executor
+    return jsonify({
+        "enabled": False,
+        "inference_workers": INFERENCE_WORKERS,
+        "queue_limit": INFERENCE_QUEUE_LIMIT,
+        "pending": _inference_pending,
+    })
+
+# ---------------- HEALTH ----------------
+@app.route("/healthz")
+async def healthz():
+    """Liveness: the process is up and answering requests"""
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz")
+async def readyz():
+    """Readiness: 503 until the ML model is loaded (or after a failed load)"""
+    ready = ml_system.is_ready(MODEL_LOADING)
+    return jsonify({
+        "ready": ready,
+        "model_loading": MODEL_LOADING,
+        "model": ml_system.load_status()
+    }), 200 if ready else 503
+
+# ---------------- METRICS ----------------
+@metrics.register_collector
+def collect_app_stats():
+    families = metrics.stats_families("app_cache", "cache", {
+        'vehicles': crud.vehicle_cache.stats(),
+        'predictions': ml_system.prediction_cache_stats()
+    }, metrics.CACHE_FIELDS)
+    families += metrics.stats_families("app_db_pool", "database", {
+        'automotive_db': async_crud.pool_stats()
+    }, metrics.POOL_FIELDS)
+    return families
+
+@app.route("/metrics")
+async def metrics_endpoint():
+    """Prometheus scrape target: route latency, DB and model time, cache and pool stats"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+if __name__ == "__main__":
+    app.run(debug=True, port=8000)
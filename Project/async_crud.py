@@ -0,0 +1,289 @@
+"""
+Async counterparts of the crud.py functions used by asgi_app.py
+
+Queries run on an aiomysql connection pool, so a request waiting on MySQL
+yields the event loop instead of blocking a worker. Lookups use crud's
+read-through cache and its invalidation. Run beside app.py (or with several
+workers), the servers only see each other's writes at once if the cache is
+shared (crud.VEHICLE_CACHE_URL); otherwise within VEHICLE_CACHE_TTL.
+Requires `aiomysql` (pip install aiomysql).
+"""
+import asyncio
+
+import aiomysql
+
+import crud
+import db_pool
+import metrics
+
+_pool = None
+
+
+# ---------------- POOL ----------------
+async def init_pool(size=db_pool.POOL_SIZE):
+    """Open the shared aiomysql pool (call once at server startup)"""
+    global _pool
+    if _pool is None:
+        _pool = await aiomysql.create_pool(
+            host=db_pool.DB_CONFIG["host"],
+            user=db_pool.DB_CONFIG["user"],
+            password=db_pool.DB_CONFIG["password"],
+            db=db_pool.DB_CONFIG["database"],
+            minsize=1,
+            maxsize=size,
+            pool_recycle=db_pool.POOL_MAX_LIFETIME,
+            # Reads must not leave a transaction open: the pool closes any
+            # connection released mid-transaction. _write() begins its own.
+            autocommit=True
+        )
+    return _pool
+
+async def close_pool():
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+        _pool = None
+
+async def get_connection():
+    """Borrow a connection; give it back with release(conn)"""
+    try:
+        pool = await init_pool()
+        return await asyncio.wait_for(pool.acquire(), db_pool.POOL_WAIT_TIMEOUT)
+    except (aiomysql.Error, OSError, asyncio.TimeoutError) as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+def release(conn):
+    _pool.release(conn)
+
+def pool_stats():
+    """Connection counts of the aiomysql pool, named like db_pool's stats()"""
+    if _pool is None:
+        return {}
+    return {
+        "size": _pool.maxsize,
+        "open": _pool.size,
+        "idle": _pool.freesize,
+        "in_use": _pool.size - _pool.freesize,
+    }
+
+async def _select(query, params, one=False):
+    """Run a SELECT and return dict rows; raises so failures are never cached"""
+    conn = await get_connection()
+    if conn is None:
+        raise aiomysql.OperationalError("No database connection")
+
+    try:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(query, params)
+            return await cursor.fetchone() if one else await cursor.fetchall()
+    finally:
+        release(conn)
+
+async def _write(statements, action):
+    """
+    Run (query, params) statements in one transaction
+
+    `statements` may be a callable taking the cursor, for writes that read first.
+    Returns whatever the callable returns (True for a list), or False on error.
+    """
+    conn = await get_connection()
+    if conn is None:
+        return False
+
+    try:
+        await conn.begin()
+        async with conn.cursor() as cursor:
+            if callable(statements):
+                result = await statements(cursor)
+            else:
+                for query, params in statements:
+                    await cursor.execute(query, params)
+                result = True
+        await conn.commit()
+        return result
+    except aiomysql.Error as e:
+        await conn.rollback()
+        print(f"Error {action}: {e}")
+        return False
+    finally:
+        release(conn)
+
+# ---------------- VEHICLES ----------------
+@metrics.db_timed
+async def add_vehicle(vin, plate, model, year, owner, contact, password, mileage=0):
+    vin, plate = crud.normalize_identifier(vin), crud.normalize_identifier(plate)
+    success = await _write([("""
+        INSERT INTO vehicles (vin, license_plate, model, year, owner_name, owner_contact, password, mileage)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (vin, plate, model, year, owner, contact, password, mileage))], "adding vehicle")
+    if success:
+        crud._invalidate_vehicle_cache((vin, owner))
+    return success
+
+@metrics.db_timed
+async def view_vehicles(limit=None, after_id=None):
+    query, params = crud._keyset_page(
+        "SELECT id, vin, license_plate, model, year, owner_name, owner_contact FROM vehicles",
+        (), limit, after_id
+    )
+    try:
+        return await _select(query, params)
+    except aiomysql.Error as e:
+        print(f"Error fetching vehicles: {e}")
+        return []
+
+@metrics.db_timed
+async def count_vehicles(owner_name=None):
+    try:
+        if owner_name is None:
+            row = await _select("SELECT COUNT(*) AS n FROM vehicles", (), one=True)
+        else:
+            row = await _select("SELECT COUNT(*) AS n FROM vehicles WHERE owner_name=%s", (owner_name,), one=True)
+        return row["n"]
+    except aiomysql.Error as e:
+        print(f"Error counting vehicles: {e}")
+        return 0
+
+async def get_customer_vehicles(owner_name, limit=None, after_id=None):
+    query, params = crud._keyset_page("""
+        SELECT id, vin, license_plate, model, year, owner_name, owner_contact
+        FROM vehicles""", (owner_name,), limit, after_id, where="owner_name=%s")
+
+    async def load():
+        with metrics.DB_TIME.time(function="get_customer_vehicles"):
+            return await _select(query, params)
+
+    try:
+        # Same keys as crud.get_customer_vehicles
+        return await crud.vehicle_cache.get_or_load_async(("page", limit, after_id), load,
+                                                          group=("owner", owner_name))
+    except aiomysql.Error as e:
+        print(f"Error fetching customer vehicles: {e}")
+        return []
+
+async def search_vehicle_by_vin(vin):
+    vin = crud.normalize_identifier(vin)
+
+    async def load():
+        with metrics.DB_TIME.time(function="search_vehicle_by_vin"):
+            return await _select("""
+                SELECT id, vin, license_plate, model, year, owner_name, owner_contact
+                FROM vehicles
+                WHERE vin=%s
+            """, (vin,), one=True)
+
+    try:
+        return await crud.vehicle_cache.get_or_load_async("vehicle", load, group=("vin", vin))
+    except aiomysql.Error as e:
+        print(f"Error searching vehicle by VIN: {e}")
+        return None
+
+@metrics.db_timed
+async def get_vehicle_by_id(vehicle_id):
+    try:
+        return await _select("SELECT * FROM vehicles WHERE id=%s", (vehicle_id,), one=True)
+    except aiomysql.Error as e:
+        print(f"Error fetching vehicle: {e}")
+        return None
+
+@metrics.db_timed
+async def update_vehicle(vehicle_id, vin, plate, model, year, owner, contact, password=None):
+    vin, plate = crud.normalize_identifier(vin), crud.normalize_identifier(plate)
+    async def statements(cursor):
+        # Old VIN/owner are needed to invalidate their cached lookups
+        await cursor.execute("SELECT vin, owner_name FROM vehicles WHERE id=%s", (vehicle_id,))
+        previous = await cursor.fetchone()
+        if password:
+            await cursor.execute("""
+                UPDATE vehicles
+                SET vin=%s, license_plate=%s, model=%s, year=%s, owner_name=%s, owner_contact=%s, password=%s
+                WHERE id=%s
+            """, (vin, plate, model, year, owner, contact, password, vehicle_id))
+        else:
+            await cursor.execute("""
+                UPDATE vehicles
+                SET vin=%s, license_plate=%s, model=%s, year=%s, owner_name=%s, owner_contact=%s
+                WHERE id=%s
+            """, (vin, plate, model, year, owner, contact, vehicle_id))
+        return [(vin, owner)] + ([previous] if previous else [])
+
+    touched = await _write(statements, "updating vehicle")
+    if touched:
+        crud._invalidate_vehicle_cache(*touched)
+    return bool(touched)
+
+@metrics.db_timed
+async def delete_vehicle(vehicle_id):
+    async def statements(cursor):
+        await cursor.execute("SELECT vin, owner_name FROM vehicles WHERE id=%s", (vehicle_id,))
+        previous = await cursor.fetchone()
+        await cursor.execute("DELETE FROM vehicles WHERE id=%s", (vehicle_id,))
+        return [previous] if previous else []
+
+    touched = await _write(statements, "deleting vehicle")
+    if touched is False:
+        return False
+    crud._invalidate_vehicle_cache(*touched)
+    return True
+
+# ---------------- SEARCH ----------------
+async def _refresh_owner_index():
+    # Reload crud.owner_index here, so match() never runs its blocking loader on the event loop
+    if crud.owner_index.is_stale():
+        with metrics.DB_TIME.time(function="owner_names"):
+            rows = await _select(crud.OWNER_NAMES_SQL, ())
+        crud.owner_index.reload([row["owner_name"] for row in rows])
+
+async def search_vehicles(term, field="vin", limit=50, after=None):
+    """crud.search_vehicles on the aiomysql pool; shares its queries and cache entries"""
+    term = crud._search_term(term, field, after)
+    if not term:
+        return [], None
+
+    async def load():
+        if field == "owner":
+            await _refresh_owner_index()
+        search = crud._search_filter(field, term)
+        if search is None:
+            return [], None
+        with metrics.DB_TIME.time(function=f"search_vehicles:{field}"):
+            rows = await _select(*crud._search_query(field, *search, limit, after))
+        return crud._search_result(field, rows, limit)
+
+    try:
+        return await crud.vehicle_cache.get_or_load_async(("search", field, term, limit, after), load,
+                                                          group=crud.FLEET_GROUP)
+    except aiomysql.Error as e:
+        # Also raised when a query runs past crud.SEARCH_TIMEOUT_MS
+        print(f"Error searching vehicles by {field}: {e}")
+        return [], None
+
+async def search_all(term, limit=10):
+    """crud.search_all with the fields searched concurrently"""
+    pages = await asyncio.gather(*(search_vehicles(term, field, limit) for field in crud.SEARCH_ALL_FIELDS))
+    results = dict(zip(crud.SEARCH_ALL_FIELDS, pages))
+    if not results["vin"][0] and not results["plate"][0]:
+        results["text"] = await search_vehicles(term, "text", limit)
+    return results
+
+# ---------------- EMPLOYEES ----------------
+@metrics.db_timed
+async def verify_employee(employee_id, password):
+    try:
+        return await _select("SELECT * FROM employees WHERE employee_id=%s AND password=%s",
+                             (employee_id, password), one=True)
+    except aiomysql.Error as e:
+        print(f"Error verifying employee: {e}")
+        return None
+
+# ---------------- CUSTOMERS ----------------
+@metrics.db_timed
+async def verify_customer(owner_name, password):
+    try:
+        return await _select("SELECT * FROM vehicles WHERE owner_name=%s AND password=%s",
+                             (owner_name, password), one=True)
+    except aiomysql.Error as e:
+        print(f"Error verifying customer: {e}")
+        return None
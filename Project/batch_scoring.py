@@ -0,0 +1,237 @@
+"""
+Nightly batch scoring: predicted issues and priorities for every vehicle
+
+    python batch_scoring.py                          # score the fleet (resumes today's run)
+    python batch_scoring.py --workers 4 --chunk-size 20000
+    python batch_scoring.py --run-id nightly-2024-06-01 --restart
+
+Vehicles are streamed from an unbuffered (server-side) cursor in fixed-size
+chunks. Each chunk is encoded and predicted in one vectorized call, and its
+rows are upserted into `vehicle_predictions` in the same transaction as the
+checkpoint of its id range. The id space is split into ranges that worker
+processes score in parallel; starting a run again with the same --run-id
+resumes every range after its last committed chunk.
+"""
+import argparse
+import datetime
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from mysql.connector import Error
+
+import db_pool
+from ml_predictor import CURRENT_YEAR, INFERENCE_ENGINES, NOT_PREDICTED, PRIORITY_LEVELS, ServiceRecommendationSystem
+
+CHUNK_SIZE = 10000
+RANGES_PER_WORKER = 4       # more ranges than workers keeps every worker busy to the end
+DEFAULT_YEAR = 2020         # same defaults as the batch prediction API
+ISSUE_SEPARATOR = ', '      # same format as service_records.service_issues
+
+SELECT_SQL = "SELECT id, model, year, mileage FROM vehicles WHERE id > %s AND id <= %s ORDER BY id"
+
+UPSERT_SQL = """
+    INSERT INTO vehicle_predictions (vehicle_id, predicted_issues, high_priority, medium_priority, low_priority)
+    VALUES {rows}
+    ON DUPLICATE KEY UPDATE
+        predicted_issues = VALUES(predicted_issues),
+        high_priority = VALUES(high_priority),
+        medium_priority = VALUES(medium_priority),
+        low_priority = VALUES(low_priority),
+        scored_at = CURRENT_TIMESTAMP
+"""
+
+CHECKPOINT_SQL = """
+    UPDATE scoring_checkpoints SET last_id = %s, completed = %s
+    WHERE run_id = %s AND range_start = %s
+"""
+
+
+# ---------------- SCORING ----------------
+def load_system(engine='sklearn'):
+    """A loaded ServiceRecommendationSystem; sklearn's compiled tree walk is the faster one for large chunks"""
+    system = ServiceRecommendationSystem(inference_engine=engine)
+    if system.load_model():
+        return system
+    if engine == 'sklearn':
+        print("Falling back to the flat inference engine")
+        return load_system('flat')
+    sys.exit(f"❌ Could not load the model ({system.load_error}); run train_model.py first")
+
+def score_chunk(system, rows):
+    """Upsert tuples (vehicle_id, issues, high, medium, low) for (id, model, year, mileage) rows"""
+    ids, models, years, mileages = zip(*rows)
+    years = np.array([DEFAULT_YEAR if year is None else year for year in years], dtype=int)
+    mileages = np.array([mileage or 0 for mileage in mileages], dtype=int)
+    labels = system.predict_label_matrix([model or '' for model in models], years, mileages)
+    # (vehicles, labels) priority level of each predicted label, NOT_PREDICTED elsewhere
+    levels = system.prioritize_label_matrix(labels, CURRENT_YEAR - years, mileages)
+
+    # A fleet has few distinct (issues, priorities) rows, so each is joined once
+    combos, inverse = np.unique(levels, axis=0, return_inverse=True)
+    classes = np.asarray(system.mlb.classes_, dtype=object)
+    columns = [
+        (ISSUE_SEPARATOR.join(classes[combo != NOT_PREDICTED]),
+         *(ISSUE_SEPARATOR.join(classes[combo == level]) for level in range(len(PRIORITY_LEVELS))))
+        for combo in combos
+    ]
+    return [(vehicle_id, *columns[combo]) for vehicle_id, combo in zip(ids, inverse.reshape(-1).tolist())]
+
+def upsert_predictions(cursor, records):
+    # One multi-row statement per chunk; executemany cannot batch an upsert
+    # whose UPDATE clause also contains VALUES()
+    rows = ", ".join(["(%s, %s, %s, %s, %s)"] * len(records))
+    cursor.execute(UPSERT_SQL.format(rows=rows), [value for record in records for value in record])
+
+
+# ---------------- RANGES ----------------
+def plan_ranges(conn, run_id, parts, restart=False):
+    """
+    Pending (range_start, range_end, last_id) of a run, ids in (range_start, range_end]
+
+    The ranges are split from MIN/MAX(id) and saved on the run's first start,
+    so a resumed run keeps them even if vehicles were added in between.
+    """
+    cursor = conn.cursor()
+    try:
+        if restart:
+            cursor.execute("DELETE FROM scoring_checkpoints WHERE run_id=%s", (run_id,))
+            conn.commit()
+        cursor.execute("""
+            SELECT range_start, range_end, last_id, completed FROM scoring_checkpoints
+            WHERE run_id=%s ORDER BY range_start
+        """, (run_id,))
+        ranges = cursor.fetchall()
+
+        if not ranges:
+            cursor.execute("SELECT MIN(id), MAX(id) FROM vehicles")
+            low, high = cursor.fetchone()
+            if low is None:
+                return []
+            bounds = np.unique(np.linspace(low - 1, high, parts + 1).astype(int)).tolist()
+            ranges = [(start, end, start, False) for start, end in zip(bounds[:-1], bounds[1:])]
+            cursor.executemany(
+                "INSERT INTO scoring_checkpoints (run_id, range_start, range_end, last_id) VALUES (%s, %s, %s, %s)",
+                [(run_id, start, end, last_id) for start, end, last_id, _ in ranges]
+            )
+            conn.commit()
+
+        return [(start, end, last_id) for start, end, last_id, completed in ranges if not completed]
+    finally:
+        cursor.close()
+
+def score_range(run_id, range_start, range_end, last_id, chunk_size=CHUNK_SIZE, system=None):
+    """Score the range's vehicles after last_id; returns (range_start, range_end, vehicles scored)"""
+    system = system or _worker_system
+    pool = db_pool.get_pool()
+    read_conn = pool.get_connection()
+    write_conn = pool.get_connection()
+    # Unbuffered: rows stream from the server a chunk at a time instead of all at once
+    reader = read_conn.cursor()
+    writer = write_conn.cursor()
+    scored = 0
+    try:
+        reader.execute(SELECT_SQL, (last_id, range_end))
+        while True:
+            rows = reader.fetchmany(chunk_size)
+            if not rows:
+                break
+            records = score_chunk(system, rows)
+            write_conn.start_transaction()
+            upsert_predictions(writer, records)
+            writer.execute(CHECKPOINT_SQL, (rows[-1][0], False, run_id, range_start))
+            write_conn.commit()
+            scored += len(rows)
+        reader.close()
+
+        writer.execute(CHECKPOINT_SQL, (range_end, True, run_id, range_start))
+        write_conn.commit()
+        return range_start, range_end, scored
+    except Error:
+        write_conn.rollback()
+        raise
+    finally:
+        writer.close()
+        write_conn.close()
+        # A half-read stream leaves the connection unusable; the pool discards it
+        read_conn.close()
+
+
+# ---------------- RUN ----------------
+_worker_system = None
+
+def _init_worker(engine):
+    global _worker_system
+    _worker_system = load_system(engine)
+
+def run_scoring(run_id, workers=1, chunk_size=CHUNK_SIZE, engine='sklearn', restart=False):
+    """
+    Score every pending range of the run
+
+    Returns a dict with ranges and vehicles scored, seconds taken and rows/sec.
+    """
+    conn = db_pool.get_pool().get_connection()
+    try:
+        ranges = plan_ranges(conn, run_id, max(1, workers) * RANGES_PER_WORKER, restart)
+    finally:
+        conn.close()
+
+    system = load_system(engine) if workers <= 1 and ranges else None
+    start = time.perf_counter()
+    scored = 0
+
+    def done(result):
+        nonlocal scored
+        range_start, range_end, range_scored = result
+        scored += range_scored
+        elapsed = time.perf_counter() - start
+        print(f"  ids {range_start + 1:,}-{range_end:,} done, {scored:,} vehicles scored "
+              f"({scored / elapsed:,.0f} rows/sec)")
+
+    if system is not None:
+        for pending in ranges:
+            done(score_range(run_id, *pending, chunk_size, system))
+    elif ranges:
+        # Forked workers open their own connections
+        db_pool.close_pools()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+            futures = [pool.submit(score_range, run_id, *pending, chunk_size) for pending in ranges]
+            for future in as_completed(futures):
+                done(future.result())
+
+    elapsed = time.perf_counter() - start
+    return {
+        'ranges': len(ranges),
+        'vehicles': scored,
+        'seconds': elapsed,
+        'rows_per_sec': scored / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score every vehicle and store predictions in vehicle_predictions")
+    parser.add_argument("--run-id", default=f"nightly-{datetime.date.today().isoformat()}",
+                        help="checkpoint key; starting the same run again resumes it (default: today's date)")
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring id ranges in parallel")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="vehicles fetched and upserted at a time")
+    parser.add_argument("--engine", choices=INFERENCE_ENGINES, default="sklearn", help="inference engine")
+    parser.add_argument("--restart", action="store_true", help="ignore the run's checkpoints and score every vehicle again")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("VEHICLE BATCH SCORING")
+    print("=" * 60)
+    print(f"\nRun {args.run_id}: chunks of {args.chunk_size:,}, {args.workers} worker(s)")
+    try:
+        report = run_scoring(args.run_id, args.workers, args.chunk_size, args.engine, args.restart)
+    except Error as e:
+        sys.exit(f"❌ Scoring failed: {e}")
+    finally:
+        db_pool.close_pools()
+
+    if not report['ranges']:
+        print(f"\n✅ Run {args.run_id} is already complete (use --restart to score again)")
+    else:
+        print(f"\n✅ Scored {report['vehicles']:,} vehicles in {report['seconds']:.1f}s "
+              f"({report['rows_per_sec']:,.0f} rows/sec)")
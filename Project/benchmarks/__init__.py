@@ -0,0 +1 @@
+"""Performance benchmarks. Run from the Project folder, e.g. `python -m benchmarks.bench_db_pool`"""
@@ -0,0 +1,91 @@
+"""
+Requests/sec of typical CRUD reads with a fresh connection per call (old
+behaviour) versus the shared connection pool.
+
+Usage: python -m benchmarks.bench_db_pool [--threads 8] [--seconds 10] [--vin VIN1000]
+"""
+import argparse
+import threading
+import time
+
+import mysql.connector
+
+import cache
+import crud
+import db_pool
+
+
+def direct_connection():
+    """The pre-pool behaviour: open a new TCP connection for every call"""
+    try:
+        return mysql.connector.connect(**db_pool.DB_CONFIG)
+    except mysql.connector.Error as e:
+        print(f"Error connecting to MySQL: {e}")
+        return None
+
+
+def run_load(threads, seconds, vin, owner):
+    """Hammer search_vehicle_by_vin / get_customer_vehicles and return req/s"""
+    stop_at = time.perf_counter() + seconds
+    counts = [0] * threads
+
+    def worker(slot):
+        n = 0
+        while time.perf_counter() < stop_at:
+            crud.search_vehicle_by_vin(vin)
+            crud.get_customer_vehicles(owner)
+            n += 2
+        counts[slot] = n
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(counts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--vin", default="VIN1000")
+    parser.add_argument("--owner", default="Ramesh Garg")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("CONNECTION POOL BENCHMARK")
+    print("=" * 60)
+
+    # Every lookup must reach MySQL, so run with a cache that keeps nothing
+    crud.vehicle_cache.use_backend(cache.MemoryBackend(max_entries=0))
+    pooled_get_connection = crud.get_connection
+
+    print(f"\n[1/2] Fresh connection per call ({args.threads} threads, {args.seconds:.0f}s)...")
+    crud.get_connection = direct_connection
+    try:
+        before = run_load(args.threads, args.seconds, args.vin, args.owner)
+    finally:
+        crud.get_connection = pooled_get_connection
+    print(f"✅ {before:,.0f} req/s")
+
+    print(f"\n[2/2] Shared pool (size {db_pool.POOL_SIZE})...")
+    after = run_load(args.threads, args.seconds, args.vin, args.owner)
+    print(f"✅ {after:,.0f} req/s")
+
+    stats = db_pool.get_pool().stats()
+    print("\n📊 Results")
+    print("-" * 30)
+    print(f"Speed-up          : {after / before:.2f}x" if before else "Speed-up          : n/a")
+    print(f"Connections opened: {stats['created']}")
+    print(f"Acquisitions      : {stats['acquired']}")
+    print(f"Waited for a conn : {stats['waited']} (avg {stats['wait_time_avg'] * 1000:.2f} ms, "
+          f"max {stats['wait_time_max'] * 1000:.2f} ms)")
+    print(f"Timeouts          : {stats['timeouts']}")
+
+    db_pool.close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Import-time budget for the web apps
+
+Imports the app (app.py by default) in a fresh interpreter under
+`python -X importtime`, several times, and keeps the fastest run. Fails
+(exit 1) if that import takes longer than --budget-ms, or if it pulls in a
+module that should only load with the model (joblib, sklearn, scipy, pandas).
+The child runs with ML_MODEL_LOADING=lazy so the background model load does
+not show up in the import.
+
+tests/test_import_time.py runs the same check under pytest.
+
+Usage: python -m benchmarks.bench_import_time [--module app] [--budget-ms 750] [--runs 5] [--top 15]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on demand by ml_predictor's pickle fallback, never by importing the app
+DEFERRED_MODULES = ("joblib", "sklearn", "scipy", "pandas")
+IMPORT_BUDGET_MS = 750      # also enforced by tests/test_import_time.py
+
+
+def parse_importtime(stderr):
+    """(self_us, cumulative_us, depth, module) for each line of -X importtime output"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return imports
+
+
+def module_imports(imports, module):
+    """(total_us, imports) of `module`: its own top-level line and everything it imported"""
+    # Children are printed before their parent, so they follow the previous top-level line
+    end = max(i for i, (_, _, depth, name) in enumerate(imports) if depth == 0 and name == module)
+    start = end
+    while start > 0 and imports[start - 1][2] > 0:
+        start -= 1
+    return imports[end][1], imports[start:end + 1]
+
+
+def run_child(module):
+    env = dict(os.environ, ML_MODEL_LOADING="lazy")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"❌ import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="module to import (app or asgi_app)")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="max import time of the module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level imports to list")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"IMPORT TIME: import {args.module}")
+    print("=" * 60)
+
+    runs = [module_imports(run_child(args.module), args.module) for _ in range(args.runs)]
+    total_us, imports = min(runs, key=lambda run: run[0])
+
+    # Direct imports of the module; each total includes what it imported first
+    direct = [i for i in imports if i[2] == 1]
+    print(f"\n📊 Slowest imports of {args.module} (best of {args.runs} runs)")
+    print("-" * 60)
+    print(f"{'module':<36}{'self ms':>10}{'total ms':>12}")
+    for self_us, cumulative_us, depth, name in sorted(direct, key=lambda i: -i[1])[:args.top]:
+        print(f"{name:<36}{self_us / 1000:>10.1f}{cumulative_us / 1000:>12.1f}")
+
+    failures = []
+    deferred = sorted({name for *_, name in imports if name.split(".")[0] in DEFERRED_MODULES})
+    if deferred:
+        failures.append(f"imports modules that should load with the model: {', '.join(deferred[:10])}")
+    if total_us / 1000 > args.budget_ms:
+        failures.append(f"took {total_us / 1000:.0f} ms, budget is {args.budget_ms:.0f} ms")
+
+    print(f"\nimport {args.module}: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print("✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Latency and throughput of the flattened-forest engine versus
+MultiOutputClassifier.predict at batch sizes 1, 100 and 10k. Both engines
+are first checked to give identical predictions on every benchmark row.
+
+Usage: python -m benchmarks.bench_inference [--sizes 1 100 10000] [--repeat 5]
+"""
+import argparse
+import os
+import time
+
+import joblib
+import numpy as np
+
+import model_bundle
+from ml_predictor import CURRENT_YEAR, ForestInferenceEngine
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_features(n, feature_info, seed=0):
+    """Feature rows drawn over the same ranges as the training data"""
+    rng = np.random.default_rng(seed)
+    years = rng.integers(2005, CURRENT_YEAR + 1, n)
+    ages = CURRENT_YEAR - years
+    return np.column_stack([
+        rng.integers(0, len(feature_info['companies']), n),
+        rng.integers(0, len(feature_info['models']), n),
+        years,
+        ages,
+        ages * rng.integers(8000, 18000, n),
+    ])
+
+
+def time_predict(predict, X, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model_path = os.path.join(BASE_DIR, 'service_recommendation_model.pkl')
+    if not os.path.exists(model_path):
+        print(f"Warning: {model_path} not found. Please train the model first.")
+        return
+
+    print("=" * 60)
+    print("FOREST INFERENCE BENCHMARK")
+    print("=" * 60)
+
+    sklearn_model = joblib.load(model_path)
+    feature_info = joblib.load(os.path.join(BASE_DIR, 'feature_info.pkl'))
+
+    bundle_path = os.path.join(BASE_DIR, model_bundle.BUNDLE_FILENAME)
+    if os.path.exists(bundle_path):
+        engine = ForestInferenceEngine(model_bundle.load_bundle(bundle_path).forest)
+        print(f"\nFlat engine source: {model_bundle.BUNDLE_FILENAME}")
+    else:
+        engine = ForestInferenceEngine.from_sklearn(sklearn_model)
+        print("\nFlat engine source: flattened from the pickled model")
+
+    X = random_features(max(args.sizes), feature_info)
+    expected = sklearn_model.predict(X)
+    actual = engine.predict(X)
+    if not np.array_equal(expected, actual):
+        mismatched = int((expected != actual).any(axis=1).sum())
+        raise SystemExit(f"❌ Flat engine disagrees with sklearn on {mismatched} of {len(X)} rows")
+    print(f"✅ Identical predictions on {len(X):,} rows")
+
+    print(f"\n📊 Best of {args.repeat} runs")
+    print("-" * 60)
+    print(f"{'batch':>8}{'sklearn ms':>14}{'flat ms':>12}{'flat rows/s':>14}{'speed-up':>10}")
+    for size in args.sizes:
+        batch = X[:size]
+        sklearn_time = time_predict(sklearn_model.predict, batch, args.repeat)
+        flat_time = time_predict(engine.predict, batch, args.repeat)
+        print(f"{size:>8,}{sklearn_time * 1000:>14.2f}{flat_time * 1000:>12.2f}"
+              f"{size / flat_time:>14,.0f}{sklearn_time / flat_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
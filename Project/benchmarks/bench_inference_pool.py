@@ -0,0 +1,100 @@
+"""
+Single-vehicle prediction throughput from many request threads: in-thread
+predict_service_issues (current behaviour) versus the micro-batching
+inference pool. A probe thread meanwhile renders a page-sized JSON payload in
+a loop, standing in for a CRUD route, to show how much the predictions slow
+the rest of the web worker down.
+
+Usage: python -m benchmarks.bench_inference_pool [--threads 32] [--requests 2000]
+           [--processes 2] [--max-batch 64] [--max-wait-ms 2]
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import inference_pool
+from ml_predictor import ServiceRecommendationSystem
+
+MODELS = ["Honda City", "Honda Amaze", "Tata Nexon", "Maruti Swift", "Hyundai Creta", "Toyota Innova"]
+PROBE_ROWS = [{"id": i, "vin": f"VIN{i}", "model": "Honda City", "year": 2019} for i in range(50)]
+
+
+def random_vehicles(n, seed=0):
+    # Distinct mileages, so the prediction cache never answers for the model
+    rng = np.random.default_rng(seed)
+    return [(MODELS[i % len(MODELS)], int(rng.integers(2008, 2025)), 1_000_000 + i) for i in range(n)]
+
+
+def run(predict, vehicles, threads):
+    """Predict every vehicle from `threads` threads; returns (req/s, probe p95 ms)"""
+    stop = threading.Event()
+    probe = []
+
+    def probe_loop():
+        while not stop.is_set():
+            start = time.perf_counter()
+            json.dumps(PROBE_ROWS)
+            probe.append(time.perf_counter() - start)
+            time.sleep(0.001)
+
+    prober = threading.Thread(target=probe_loop)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda v: predict(*v), vehicles))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    return len(vehicles) / elapsed, np.percentile(probe, 95) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=inference_pool.INFERENCE_PROCESSES)
+    parser.add_argument("--max-batch", type=int, default=inference_pool.MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=inference_pool.MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("INFERENCE POOL BENCHMARK")
+    print("=" * 60)
+
+    system = ServiceRecommendationSystem()
+    if not system.load_model():
+        return
+
+    print(f"\n[1/2] In-thread predictions ({args.threads} threads, {args.requests} requests)...")
+    before, before_probe = run(system.predict_service_issues, random_vehicles(args.requests, 1), args.threads)
+    print(f"✅ {before:,.0f} req/s")
+
+    print(f"\n[2/2] Inference pool ({args.processes} processes, "
+          f"{args.max_batch} rows / {args.max_wait_ms} ms batches)...")
+    batcher = inference_pool.MicroBatcher(args.processes, args.max_batch, args.max_wait_ms)
+    try:
+        # Start the processes and load their models outside the timed run
+        batcher.predict_batch([{'model': m, 'year': y, 'mileage': k} for m, y, k in random_vehicles(args.processes * 4, 2)])
+        after, after_probe = run(batcher.predict, random_vehicles(args.requests, 1), args.threads)
+        stats = batcher.stats()
+    finally:
+        batcher.close()
+    print(f"✅ {after:,.0f} req/s")
+
+    print("\n📊 Results")
+    print("-" * 40)
+    print(f"Speed-up             : {after / before:.2f}x")
+    print(f"Probe p95 in-thread  : {before_probe:.2f} ms")
+    print(f"Probe p95 with pool  : {after_probe:.2f} ms")
+    print(f"Batches              : {stats['batches']} (avg {stats['batch_size_avg']:.1f} rows, "
+          f"max {stats['batch_size_max']})")
+    print(f"Latency p50/p95/p99  : {stats['latency_p50_ms']:.1f} / {stats['latency_p95_ms']:.1f} / "
+          f"{stats['latency_p99_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
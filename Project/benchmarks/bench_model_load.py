@@ -0,0 +1,114 @@
+"""
+Startup time and resident memory of the model: five joblib pickles versus the
+memory-mapped bundle. Each format is loaded in a fresh interpreter, several
+times, and one prediction is made so the tree pages are actually touched.
+
+RssAnon is private memory every web worker pays for; RssFile is file-backed
+(mapped) memory that forked workers share.
+
+Usage: python -m benchmarks.bench_model_load [--runs 3]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_rss():
+    """RSS breakdown of the current process in MB (Linux /proc)"""
+    rss = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("VmRSS", "RssAnon", "RssFile"):
+                    rss[key] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return rss
+
+
+def child(mode):
+    """Runs inside the fresh interpreter: load one format and report JSON"""
+    sys.path.insert(0, BASE_DIR)
+    start = time.perf_counter()
+    from ml_predictor import ServiceRecommendationSystem
+    import_time = time.perf_counter() - start
+
+    system = ServiceRecommendationSystem()
+    start = time.perf_counter()
+    if mode == "pickles":
+        loaded = system._load_pickles(BASE_DIR)
+    else:
+        loaded = system.load_model()
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    system.predict_service_issues("Honda City", 2018, 65000)
+    first_predict = time.perf_counter() - start
+
+    print(json.dumps({
+        "loaded": loaded,
+        "import_s": import_time,
+        "load_s": load_time,
+        "first_predict_s": first_predict,
+        **read_rss(),
+    }))
+
+
+def run_child(mode):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_model_load", "--child", mode],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", choices=["pickles", "bundle"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    import model_bundle
+    if not os.path.exists(os.path.join(BASE_DIR, model_bundle.BUNDLE_FILENAME)):
+        print(f"Warning: {model_bundle.BUNDLE_FILENAME} not found. Run train_model.py first.")
+        return
+
+    print("=" * 60)
+    print("MODEL LOAD BENCHMARK")
+    print("=" * 60)
+
+    results = {}
+    for mode in ("pickles", "bundle"):
+        runs = [run_child(mode) for _ in range(args.runs)]
+        if not all(r["loaded"] for r in runs):
+            print(f"Warning: {mode} failed to load")
+            return
+        results[mode] = {key: min(r[key] for r in runs) for key in runs[0] if key != "loaded"}
+
+    print(f"\n📊 Best of {args.runs} runs")
+    print("-" * 60)
+    print(f"{'':20}{'pickles':>12}{'bundle':>12}")
+    for key, label, scale, unit in [
+        ("load_s", "Load time", 1000, "ms"),
+        ("first_predict_s", "First predict", 1000, "ms"),
+        ("VmRSS", "RSS", 1, "MB"),
+        ("RssAnon", "  private (anon)", 1, "MB"),
+        ("RssFile", "  shared (file)", 1, "MB"),
+    ]:
+        if key in results["pickles"]:
+            print(f"{label:20}{results['pickles'][key] * scale:>10.1f}{unit}"
+                  f"{results['bundle'][key] * scale:>10.1f}{unit}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Bulk onboarding throughput vs one vehicle at a time
+
+Seeds the SQLite stand-in for MySQL (benchmarks/sqlite_standin.py) with a
+fleet, writes --rows new vehicles to a CSV upload (one row in 100 invalid, one
+in 100 a VIN that already exists), and measures rows/sec of:
+- one-at-a-time: crud.add_vehicle plus a prediction per vehicle, the /add
+  path, on the first --single-rows rows
+- onboarding.onboard at each --chunk-sizes, scored by the app's model
+- onboarding.onboard scored by sklearn (the command line default), and
+  without scoring
+- POST /vehicles/bulk with the whole CSV, through Flask's test client
+Every bulk run starts from a fresh copy of the fleet.
+
+Usage: python -m benchmarks.bench_onboarding [--rows 100000] [--chunk-sizes 1000 5000] [--single-rows 2000]
+"""
+import argparse
+import csv
+import functools
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import app
+import batch_scoring
+import crud
+import db_pool
+import dbsetup
+import onboarding
+from benchmarks import sqlite_standin
+from ml_predictor import CURRENT_YEAR, ml_system
+
+EMPLOYEE_ID, EMPLOYEE_PASSWORD = dbsetup.employees[0]
+
+
+# ---------------- UPLOAD ----------------
+def write_upload(path, rows, fleet, seed):
+    """CSV of `rows` new vehicles after a fleet of `fleet`; returns (rows, invalid, duplicates)"""
+    rng = np.random.default_rng(seed + 1)
+    upload = dbsetup.generate_vehicles(fleet, rows, rng).rename(columns={
+        'license_plate': 'plate', 'owner_name': 'owner', 'owner_contact': 'contact'})
+    upload = upload[onboarding.UPLOAD_FIELDS]
+
+    picks = rng.permutation(rows)
+    invalid, duplicates = picks[:rows // 100], picks[rows // 100:rows // 50]
+    upload.loc[invalid, 'year'] = 1800
+    upload.loc[duplicates, 'vin'] = [f"VIN{1000 + i}" for i in rng.integers(0, fleet, len(duplicates))]
+    upload.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL)
+    return rows, len(invalid), len(duplicates)
+
+def use_database(path):
+    db_pool.close_pools()
+    db_pool.get_pool(connect=functools.partial(sqlite_standin.connect, path))
+    crud.vehicle_cache.clear()
+
+
+# ---------------- CASES ----------------
+def one_at_a_time(upload, n):
+    """rows/sec of crud.add_vehicle + one prediction per row for the first n rows"""
+    with open(upload, newline='') as f:
+        rows = [row for _, row in zip(range(n), csv.DictReader(f))]
+    start = time.perf_counter()
+    for row in rows:
+        try:
+            record = onboarding.parse_row(row)
+        except ValueError:
+            continue
+        vin, plate, model, year, owner, contact, password, mileage = record
+        issues = ml_system.predict_service_issues(model, year, mileage)
+        ml_system.get_issue_priorities(issues, CURRENT_YEAR - year, mileage)
+        # Own VINs, so the upload's existing-VIN rows are added too instead of printing errors
+        crud.add_vehicle(f"ONE{vin}", plate, model, year, owner, contact, password, mileage)
+    return len(rows) / (time.perf_counter() - start)
+
+def bulk(upload, chunk_size, system=ml_system):
+    with open(upload, "rb") as f:
+        return onboarding.onboard(onboarding.read_csv(f), chunk_size, system)
+
+def bulk_route(upload):
+    client = app.app.test_client()
+    client.post("/login/employee", data={"username": EMPLOYEE_ID, "password": EMPLOYEE_PASSWORD})
+    with open(upload, "rb") as f:
+        start = time.perf_counter()
+        response = client.post("/vehicles/bulk", data=f, content_type="text/csv")
+    if response.status_code != 200:
+        raise SystemExit(f"❌ POST /vehicles/bulk returned {response.status_code}: {response.get_data(as_text=True)[:500]}")
+    report = response.get_json()
+    report['rows_per_sec'] = report['rows'] / (time.perf_counter() - start)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="vehicles in the upload")
+    parser.add_argument("--fleet", type=int, default=10000, help="vehicles already in the database")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--single-rows", type=int, default=2000, help="rows added one at a time for comparison")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BULK ONBOARDING")
+    print("=" * 60)
+    if not ml_system.ensure_loaded():
+        sys.exit("❌ Could not load the model; run train_model.py first")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        fleet = sqlite_standin.create_database(os.path.join(workdir, "fleet.db"), args.fleet, seed=args.seed)
+        upload = os.path.join(workdir, "upload.csv")
+        rows, invalid, duplicates = write_upload(upload, args.rows, args.fleet, args.seed)
+        print(f"\nUpload: {rows:,} vehicles ({invalid:,} invalid, {duplicates:,} existing VINs), "
+              f"fleet of {args.fleet:,}")
+        print(f"\n{'method':<32}{'rows/sec':>12}{'inserted':>12}{'scored':>10}{'failed':>10}")
+
+        def fresh_copy():
+            path = os.path.join(workdir, "run.db")
+            shutil.copyfile(fleet, path)
+            use_database(path)
+            return path
+
+        fresh_copy()
+        baseline = one_at_a_time(upload, args.single_rows)
+        print(f"{'one at a time (/add path)':<32}{baseline:>12,.0f}{'':>12}{'':>10}{'':>10}")
+
+        def show(method, report):
+            print(f"{method:<32}{report['rows_per_sec']:>12,.0f}"
+                  f"{report['inserted']:>12,}{report['scored']:>10,}{report['failed']:>10,}"
+                  f"   ({report['rows_per_sec'] / baseline:.0f}x)")
+
+        def run(method, chunk_size, system):
+            path = fresh_copy()
+            report = bulk(upload, chunk_size, system)
+            stored = sqlite3.connect(path).execute("SELECT COUNT(*) FROM vehicle_predictions").fetchone()[0]
+            if stored != report['scored']:
+                sys.exit(f"❌ {report['scored']:,} vehicles scored but {stored:,} predictions stored")
+            show(method, report)
+
+        for chunk_size in args.chunk_sizes:
+            run(f"onboard, chunks of {chunk_size:,}", chunk_size, ml_system)
+        run("onboard, sklearn engine", onboarding.CHUNK_SIZE, batch_scoring.load_system("sklearn"))
+        run("onboard, no scoring", onboarding.CHUNK_SIZE, None)
+
+        fresh_copy()
+        report = bulk_route(upload)
+        show("POST /vehicles/bulk", report)
+        db_pool.close_pools()
+
+    expected = rows - invalid - duplicates
+    if report['inserted'] != expected or report['failed'] != invalid + duplicates:
+        sys.exit(f"❌ Expected {expected:,} inserted and {invalid + duplicates:,} failed")
+    print(f"\n✅ {expected:,} vehicles added, every invalid and existing row reported")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Label preprocessing time and label-matrix size: the old per-row
+apply(split/strip) + MultiLabelBinarizer path versus
+preprocessing.parse_issue_labels, on synthetic histories of 1M and 10M rows.
+
+The old path builds a Python list per row and needs several GB at 10M rows,
+so by default it only runs up to --baseline-max rows.
+
+Usage: python -m benchmarks.bench_preprocessing [--sizes 1000000 10000000] [--baseline-max 1000000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MultiLabelBinarizer
+
+import preprocessing
+
+ISSUES = [
+    'Engine Oil Change', 'Brake Pad Replacement', 'Battery Replacement', 'AC Gas Refill',
+    'Tire Rotation', 'Wheel Alignment', 'Suspension Check', 'Transmission Fluid Change',
+    'Air Filter Replacement', 'Fuel Filter Replacement', 'Spark Plug Replacement', 'Coolant Flush',
+    'Power Steering Fluid Change', 'Brake Fluid Change', 'Timing Belt Replacement', 'Clutch Replacement',
+    'Shock Absorber Replacement', 'Headlight Bulb Replacement', 'Wiper Blade Replacement', 'Exhaust System Repair',
+]
+
+
+def synthetic_issues(n, seed=0):
+    """n comma-separated issue strings; each distinct combination is one shared str object"""
+    rng = np.random.default_rng(seed)
+    probabilities = rng.uniform(0.05, 0.8, len(ISSUES))
+    present = rng.random((n, len(ISSUES)), dtype=np.float32) < probabilities
+    present[~present.any(axis=1), 0] = True
+    combo_codes = present @ (1 << np.arange(len(ISSUES), dtype=np.int64))
+    unique_codes, inverse = np.unique(combo_codes, return_inverse=True)
+    strings = np.array([
+        ', '.join(issue for bit, issue in enumerate(ISSUES) if code >> bit & 1) for code in unique_codes
+    ], dtype=object)
+    return pd.Series(strings[inverse])
+
+
+def baseline(issues):
+    lists = issues.apply(lambda x: [issue.strip() for issue in x.split(',')])
+    mlb = MultiLabelBinarizer()
+    return mlb.fit_transform(lists)
+
+
+def matrix_bytes(y):
+    if hasattr(y, 'indptr'):
+        return y.data.nbytes + y.indices.nbytes + y.indptr.nbytes
+    return y.nbytes
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--baseline-max", type=int, default=1_000_000, help="largest size the old path runs at")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("LABEL PREPROCESSING BENCHMARK")
+    print("=" * 60)
+
+    print(f"\n{'rows':>12}{'old s':>10}{'old MB':>10}{'new s':>10}{'new MB':>10}{'speed-up':>10}")
+    for size in args.sizes:
+        issues = synthetic_issues(size)
+        (labels, classes), new_time = timed(preprocessing.parse_issue_labels, issues)
+        new_mb = matrix_bytes(labels) / 1e6
+
+        if size <= args.baseline_max:
+            dense, old_time = timed(baseline, issues)
+            if not np.array_equal(dense, labels.toarray()):
+                raise SystemExit(f"❌ Label matrices differ at {size:,} rows")
+            old = f"{old_time:>10.2f}{dense.nbytes / 1e6:>10.1f}"
+            speed_up = f"{old_time / new_time:>9.1f}x"
+            del dense
+        else:
+            old, speed_up = f"{'-':>10}{'-':>10}", f"{'-':>10}"
+        print(f"{size:>12,}{old}{new_time:>10.2f}{new_mb:>10.1f}{speed_up}")
+        del issues, labels
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Vehicle search latency at large fleet sizes
+
+Seeds the SQLite stand-in for MySQL (benchmarks/sqlite_standin.py) like
+`dbsetup.py --rows` at each size and times crud.search_vehicles with the
+lookup cache disabled, so every call queries the database:
+- VIN, plate and model prefixes (first page and the page after it)
+- owner names with a typo (fuzzy, through crud.owner_index) and exact
+- crud.search_all, as the employee dashboard's search box runs it
+It also times TrigramIndex.match over --owners generated distinct names,
+for fleets with far more owners than dbsetup's sample pool.
+
+"Contains" (text) searches need MySQL's FULLTEXT index and are not measured.
+Exits 1 if any case's p95 exceeds --budget-ms.
+
+Usage: python -m benchmarks.bench_search [--sizes 100000 1000000] [--iterations 200] [--budget-ms 50]
+"""
+import argparse
+import functools
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import cache
+import crud
+import db_pool
+import dbsetup
+import trigram_index
+from benchmarks import sqlite_standin
+
+PAGE_SIZE = 50
+
+
+def typo(name, rng):
+    """`name` with one letter dropped"""
+    i = int(rng.integers(1, len(name) - 1))
+    return name[:i] + name[i + 1:]
+
+
+# ---------------- MEASUREMENT ----------------
+def measure(func, iterations, warmup):
+    """Call func(i) for warm-up then measured iterations; returns latency stats in ms"""
+    for i in range(warmup):
+        func(i)
+    times = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(warmup + i)
+        times[i] = time.perf_counter() - start
+    times *= 1000
+    return {
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "ops_per_sec": float(1000 / times.mean()),
+    }
+
+
+# ---------------- CASES ----------------
+def search_cases(path, seed):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT vin, license_plate, owner_name FROM vehicles ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    rng = np.random.default_rng(seed)
+    fleet = [rows[i] for i in rng.integers(0, len(rows), 1000)]
+
+    def pick(i):
+        return fleet[i % len(fleet)]
+
+    def next_page(field, term):
+        _, next_cursor = crud.search_vehicles(term, field, PAGE_SIZE)
+        crud.search_vehicles(term, field, PAGE_SIZE, next_cursor)
+
+    typos = [typo(owner, rng) for _, _, owner in fleet]
+    return [
+        ("vin prefix", lambda i: crud.search_vehicles(pick(i)[0][:6], "vin", PAGE_SIZE)),
+        ("vin prefix (2 pages)", lambda i: next_page("vin", pick(i)[0][:5])),
+        ("plate prefix", lambda i: crud.search_vehicles(pick(i)[1][:6], "plate", PAGE_SIZE)),
+        ("plate prefix (2 pages)", lambda i: next_page("plate", pick(i)[1][:4])),
+        ("model prefix", lambda i: crud.search_vehicles(dbsetup.car_models[i % len(dbsetup.car_models)][:7],
+                                                        "model", PAGE_SIZE)),
+        ("owner fuzzy", lambda i: crud.search_vehicles(typos[i % len(typos)], "owner", PAGE_SIZE)),
+        ("owner exact", lambda i: crud.search_vehicles(pick(i)[2], "owner", PAGE_SIZE)),
+        ("search_all", lambda i: crud.search_all(pick(i)[1][:6])),
+    ]
+
+def owner_names(n, rng):
+    """n distinct generated 'First Last' names"""
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    names = set()
+    while len(names) < n:
+        first, last = ("".join(rng.choice(letters, int(rng.integers(4, 9)))) for _ in range(2))
+        names.add(f"{first.title()} {last.title()}")
+    return sorted(names)
+
+
+# ---------------- RUN ----------------
+def run_size(size, args, workdir):
+    start = time.perf_counter()
+    path = sqlite_standin.create_database(os.path.join(workdir, f"fleet_{size}.db"), size, seed=args.seed)
+    print(f"\n{size:,} vehicles seeded in {time.perf_counter() - start:.1f}s")
+    db_pool.close_pools()
+    db_pool.get_pool(connect=functools.partial(sqlite_standin.connect, path))
+    crud.owner_index.reload()
+
+    results = {}
+    for name, func in search_cases(path, args.seed):
+        results[f"{name}@{size}"] = stats = measure(func, args.iterations, args.warmup)
+        print(f"{name:<28}{size:>12,}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['ops_per_sec']:>12,.0f}")
+    return results
+
+def run_owner_index(args):
+    rng = np.random.default_rng(args.seed)
+    names = owner_names(args.owners, rng)
+    index = trigram_index.TrigramIndex(lambda: names)
+    start = time.perf_counter()
+    index.reload()
+    print(f"\n{len(index):,} owner names indexed in {time.perf_counter() - start:.2f}s")
+
+    queries = [typo(names[i], rng) for i in rng.integers(0, len(names), 1000)]
+    stats = measure(lambda i: index.match(queries[i % len(queries)], limit=crud.OWNER_MATCHES),
+                    args.iterations, args.warmup)
+    print(f"{'owner_index.match':<28}{len(index):>12,}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+          f"{stats['ops_per_sec']:>12,.0f}")
+    return {f"owner_index.match@{len(index)} names": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000], help="fleet sizes (vehicles)")
+    parser.add_argument("--owners", type=int, default=100000, help="distinct names for the owner index case")
+    parser.add_argument("--iterations", type=int, default=200, help="measured calls per case")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured calls per case")
+    parser.add_argument("--budget-ms", type=float, default=50, help="max p95 latency of any case")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("VEHICLE SEARCH")
+    print("=" * 60)
+    print(f"\n{'case':<28}{'size':>12}{'p50 ms':>10}{'p95 ms':>10}{'ops/sec':>12}")
+
+    # Every call goes to the database
+    crud.vehicle_cache.use_backend(cache.MemoryBackend(max_entries=0))
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            results.update(run_size(size, args, workdir))
+        db_pool.close_pools()
+    results.update(run_owner_index(args))
+
+    over = {name: stats["p95_ms"] for name, stats in results.items() if stats["p95_ms"] > args.budget_ms}
+    if over:
+        for name, p95 in over.items():
+            print(f"❌ {name}: p95 {p95:.1f} ms, budget is {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\n✅ Every search within the {args.budget_ms:.0f} ms p95 budget")
+
+
+if __name__ == "__main__":
+    main()
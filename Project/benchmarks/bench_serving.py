@@ -0,0 +1,168 @@
+"""
+Concurrent-request throughput of the sync Flask server (app.py) versus the
+async Quart server (asgi_app.py).
+
+Both servers are started as subprocesses, an employee session is logged in on
+each, and then every concurrency level fires the same requests from that many
+client threads. Reports requests/sec and p50/p95/p99 latency per server.
+
+Usage: python -m benchmarks.bench_serving [--concurrency 1 8 32] [--requests 400]
+           [--path /predict_issues] [--employee EMP001 --password admin123]
+
+Needs MySQL for the login (and for /vehicles); the async server also needs
+`quart` and `aiomysql`.
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    # name -> command line template, {port} is filled in
+    "sync (Flask, threaded)": [sys.executable, "-m", "flask", "--app", "app", "run", "--port", "{port}"],
+    "async (Quart, hypercorn)": [sys.executable, "-m", "hypercorn", "asgi_app:app", "--bind", "127.0.0.1:{port}"],
+}
+
+MODELS = ["Honda City", "Honda Amaze", "Tata Nexon", "Maruti Swift", "Hyundai Creta", "Toyota Innova"]
+
+
+def start_server(command, port, timeout=120):
+    """Launch a server and wait until it accepts connections"""
+    process = subprocess.Popen(
+        [part.format(port=port) for part in command], cwd=BASE_DIR,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("server did not start in time")
+
+
+def login(port, employee, password):
+    """Log in as an employee and return the session cookie"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/login/employee", urlencode({"username": employee, "password": password}),
+                 {"Content-Type": "application/x-www-form-urlencoded"})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    cookie = response.getheader("Set-Cookie")
+    if response.status != 302 or not cookie:
+        raise RuntimeError("employee login failed (is MySQL running and seeded?)")
+    return cookie.split(";", 1)[0]
+
+
+def make_requests(path, n, seed=0):
+    """(method, body) per request; /predict_issues gets a varied vehicle each time"""
+    if path != "/predict_issues":
+        return [("GET", None)] * n
+    rng = np.random.default_rng(seed)
+    return [("POST", json.dumps({
+        "model": MODELS[i % len(MODELS)],
+        "year": int(rng.integers(2008, 2025)),
+        "mileage": int(rng.integers(0, 200000)),
+    })) for i in range(n)]
+
+
+def run_load(port, cookie, path, requests, concurrency):
+    """Send `requests` from `concurrency` keep-alive clients; returns (seconds, latencies, errors)"""
+    local = threading.local()
+    errors = [0]
+    lock = threading.Lock()
+
+    def send(req):
+        method, body = req
+        if not hasattr(local, "conn"):
+            local.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        headers = {"Cookie": cookie}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        start = time.perf_counter()
+        try:
+            local.conn.request(method, path, body, headers)
+            response = local.conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            local.conn.close()
+            del local.conn
+            ok = False
+        if not ok:
+            with lock:
+                errors[0] += 1
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, requests))
+    return time.perf_counter() - start, np.array(latencies), errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument("--path", default="/predict_issues", choices=["/predict_issues", "/vehicles"])
+    parser.add_argument("--employee", default="EMP001")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--port", type=int, default=5055, help="first port; each server gets the next one")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SYNC vs ASYNC SERVING BENCHMARK")
+    print("=" * 60)
+    print(f"Endpoint: {args.path}, {args.requests} requests per level")
+
+    requests = make_requests(args.path, args.requests)
+    results = {}
+    for offset, (name, command) in enumerate(SERVERS.items()):
+        port = args.port + offset
+        print(f"\n[{offset + 1}/{len(SERVERS)}] Starting {name} on port {port}...")
+        try:
+            process = start_server(command, port)
+        except RuntimeError as e:
+            print(f"❌ {name}: {e}")
+            continue
+        try:
+            cookie = login(port, args.employee, args.password)
+            # Warm up (model load, pools, caches) before measuring
+            run_load(port, cookie, args.path, requests[:20], 4)
+            for concurrency in args.concurrency:
+                results[name, concurrency] = run_load(port, cookie, args.path, requests, concurrency)
+        except RuntimeError as e:
+            print(f"❌ {name}: {e}")
+        finally:
+            process.terminate()
+            process.wait()
+
+    print("\n📊 Results")
+    print("-" * 78)
+    print(f"{'server':<26}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for (name, concurrency), (seconds, latencies, errors) in results.items():
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"{name:<26}{concurrency:>8}{len(latencies) / seconds:>10,.0f}"
+              f"{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
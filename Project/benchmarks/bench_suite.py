@@ -0,0 +1,283 @@
+"""
+Benchmark suite for the request, prediction and CRUD hot paths
+
+Runs in-process with Flask's test client against a SQLite stand-in for MySQL
+(benchmarks/sqlite_standin.py), seeded like `dbsetup.py --rows` at each fleet
+size, and the trained model in Project/. Measures:
+- routes: /employee/dashboard, /vehicles, /employee/search, /add, /predict_issues
+- ml_system.predict_service_issues (cache miss and hit) and get_issue_priorities
+- every crud function, with the lookup cache disabled so each call hits the database
+
+Results are written as JSON. Every case's median is compared to the committed
+baseline (benchmarks/baseline.json, or --baseline PATH; --baseline "" skips the
+comparison) and the run exits 1 if any is slower by more than --tolerance.
+
+Usage: python -m benchmarks.bench_suite [--sizes 1000 10000 100000] [--iterations 200]
+           [--output bench_results.json] [--baseline benchmarks/baseline.json] [--save-baseline PATH]
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import sklearn
+
+import app
+import cache
+import crud
+import db_pool
+import dbsetup
+from benchmarks import sqlite_standin
+from ml_predictor import ml_system
+
+EMPLOYEE_ID, EMPLOYEE_PASSWORD = dbsetup.employees[0]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PREDICT_MODELS = ["Honda City", "Honda Amaze", "Maruti Swift", "Tata Nexon", "Hyundai Creta", "Toyota Innova"]
+
+
+# ---------------- MEASUREMENT ----------------
+def measure(func, iterations, warmup):
+    """Call func(i) for warm-up then measured iterations; returns latency stats in ms"""
+    for i in range(warmup):
+        func(i)
+    times = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(warmup + i)
+        times[i] = time.perf_counter() - start
+    times *= 1000
+    return {
+        "iterations": iterations,
+        "mean_ms": float(times.mean()),
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "ops_per_sec": float(1000 / times.mean()),
+    }
+
+def expect_ok(response):
+    if response.status_code != 200:
+        raise SystemExit(f"❌ {response.request.method} {response.request.path} returned {response.status_code}")
+    return response
+
+
+# ---------------- CASES ----------------
+def fleet_sample(path, n, seed):
+    """(id, vin, owner_name, password) of n random seeded vehicles"""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT id, vin, owner_name, password FROM vehicles ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    picks = np.random.default_rng(seed).integers(0, len(rows), n)
+    return [rows[i] for i in picks]
+
+def route_cases(client, fleet):
+    def dashboard(i):
+        expect_ok(client.get("/employee/dashboard"))
+
+    def vehicles(i):
+        expect_ok(client.get("/vehicles"))
+
+    def employee_search(i):
+        expect_ok(client.post("/employee/search", data={"vin": fleet[i % len(fleet)][1]}))
+
+    def add(i):
+        expect_ok(client.post("/add", data={
+            "vin": f"BENCHADD{i}", "plate": f"DL01AB{i:04d}", "model": PREDICT_MODELS[i % len(PREDICT_MODELS)],
+            "year": 2015 + i % 9, "owner": "Bench Owner", "contact": "9000000000",
+            "password": "bench", "mileage": 20000 + 37 * i,
+        }))
+
+    def predict_issues(i):
+        expect_ok(client.post("/predict_issues", json={
+            "model": PREDICT_MODELS[i % len(PREDICT_MODELS)], "year": 2015 + i % 9, "mileage": 30000 + 53 * i,
+        }))
+
+    return [
+        ("route:/employee/dashboard", dashboard),
+        ("route:/vehicles", vehicles),
+        ("route:/employee/search", employee_search),
+        ("route:/add", add),
+        ("route:/predict_issues", predict_issues),
+    ]
+
+def ml_cases(ml_system):
+    issues = ml_system.predict_service_issues("Honda City", 2016, 90000)
+
+    def predict_miss(i):
+        # A new mileage every call, so the prediction cache never answers
+        ml_system.predict_service_issues(PREDICT_MODELS[i % len(PREDICT_MODELS)], 2015 + i % 9, 1_000_000 + i)
+
+    def predict_hit(i):
+        ml_system.predict_service_issues("Honda City", 2016, 90000)
+
+    def priorities(i):
+        ml_system.get_issue_priorities(issues, 8, 90000)
+
+    return [
+        ("ml:predict_service_issues (miss)", predict_miss),
+        ("ml:predict_service_issues (hit)", predict_hit),
+        ("ml:get_issue_priorities", priorities),
+    ]
+
+def crud_cases(fleet, next_id):
+    def pick(i):
+        return fleet[i % len(fleet)]
+
+    def add_vehicle(i):
+        crud.add_vehicle(f"BENCHCRUD{i}", "DL01AB1234", "Honda City", 2018, "Bench Owner", "9000000000", "bench", 40000)
+
+    def update_vehicle(i):
+        vehicle_id, vin, owner, _ = pick(i)
+        crud.update_vehicle(vehicle_id, vin, "DL02XY4321", "Honda Jazz", 2019, owner, "9111111111")
+
+    def delete_vehicle(i):
+        # Deletes the rows add_vehicle inserted, oldest first
+        crud.delete_vehicle(next_id + i)
+
+    return [
+        ("crud:view_vehicles", lambda i: crud.view_vehicles(limit=51, after_id=pick(i)[0])),
+        ("crud:count_vehicles", lambda i: crud.count_vehicles()),
+        ("crud:count_vehicles (owner)", lambda i: crud.count_vehicles(pick(i)[2])),
+        ("crud:get_customer_vehicles", lambda i: crud.get_customer_vehicles(pick(i)[2], limit=51)),
+        ("crud:search_vehicle_by_vin", lambda i: crud.search_vehicle_by_vin(pick(i)[1])),
+        ("crud:get_vehicle_by_id", lambda i: crud.get_vehicle_by_id(pick(i)[0])),
+        ("crud:verify_employee", lambda i: crud.verify_employee(EMPLOYEE_ID, EMPLOYEE_PASSWORD)),
+        ("crud:verify_customer", lambda i: crud.verify_customer(pick(i)[2], pick(i)[3])),
+        ("crud:add_vehicle", add_vehicle),
+        ("crud:update_vehicle", update_vehicle),
+        ("crud:delete_vehicle", delete_vehicle),
+    ]
+
+
+# ---------------- RUN ----------------
+def run_size(size, args, workdir):
+    path = sqlite_standin.create_database(os.path.join(workdir, f"fleet_{size}.db"), size, seed=args.seed)
+    db_pool.close_pools()
+    db_pool.get_pool(connect=functools.partial(sqlite_standin.connect, path))
+    crud.vehicle_cache.use_backend(cache.MemoryBackend(max_entries=crud.VEHICLE_CACHE_SIZE))
+    ml_system.prediction_cache.clear()
+
+    fleet = fleet_sample(path, 1000, args.seed)
+    client = app.app.test_client()
+    expect_ok(client.post("/login/employee", data={"username": EMPLOYEE_ID, "password": EMPLOYEE_PASSWORD},
+                          follow_redirects=True))
+
+    cases = route_cases(client, fleet) + ml_cases(ml_system)
+    results = {}
+
+    def run(name, func):
+        if args.only and args.only not in name:
+            return
+        results[f"{name}@{size}"] = stats = measure(func, args.iterations, args.warmup)
+        print(f"{name:<36}{size:>10,}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}{stats['ops_per_sec']:>12,.0f}")
+
+    for name, func in cases:
+        run(name, func)
+
+    # CRUD functions measured against the database itself
+    crud.vehicle_cache.use_backend(cache.MemoryBackend(max_entries=0))
+    conn = sqlite3.connect(path)
+    next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM vehicles").fetchone()[0]
+    conn.close()
+    for name, func in crud_cases(fleet, next_id):
+        # Deleting needs at least as many rows as add_vehicle inserted
+        if name == "crud:delete_vehicle" and f"crud:add_vehicle@{size}" not in results:
+            continue
+        run(name, func)
+    return results
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+def compare(results, baseline, tolerance):
+    """Print every case against the baseline; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'case':<48}{'base p50':>10}{'now p50':>10}{'change':>10}")
+    for key, base in sorted(baseline["results"].items()):
+        now = results.get(key)
+        if now is None:
+            print(f"{key:<48}{base['p50_ms']:>10.3f}{'-':>10}{'missing':>10}")
+            continue
+        change = now["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0.0
+        marker = ""
+        if change > tolerance:
+            regressions.append(key)
+            marker = "  ❌"
+        print(f"{key:<48}{base['p50_ms']:>10.3f}{now['p50_ms']:>10.3f}{change:>+10.0%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="fleet sizes (vehicles)")
+    parser.add_argument("--iterations", type=int, default=200, help="measured calls per case")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured calls per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against (\"\" to skip)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown vs the baseline")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results as a new baseline")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BENCHMARK SUITE")
+    print("=" * 60)
+    # Read before --save-baseline can overwrite it
+    baseline = None
+    if args.baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        else:
+            print(f"⚠️ No baseline at {args.baseline}; record one with --save-baseline")
+
+    print(f"\n{'case':<36}{'vehicles':>10}{'p50 ms':>10}{'p95 ms':>10}{'ops/sec':>12}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            results.update(run_size(size, args, workdir))
+        db_pool.close_pools()
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "settings": {"sizes": args.sizes, "iterations": args.iterations, "warmup": args.warmup, "seed": args.seed},
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results written to {path}")
+
+    if baseline:
+        if baseline.get("environment") != report["environment"]:
+            print("⚠️ Baseline was recorded in a different environment; timings may not be comparable")
+        if baseline.get("settings") != report["settings"]:
+            print(f"⚠️ Baseline was recorded with {baseline.get('settings')}; cases it has but this run skipped show as missing")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) regressed by more than {args.tolerance:.0%}:")
+            for key in regressions:
+                print(f"  - {key}")
+            sys.exit(1)
+        print(f"\n✅ No case regressed by more than {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+SQLite stand-in for MySQL, so benchmarks can run crud.py without a server
+
+    path = sqlite_standin.create_database("fleet.db", rows=10000)
+    db_pool.get_pool(connect=functools.partial(sqlite_standin.connect, path))
+
+Implements the part of mysql-connector's API that crud.py and db_pool.py use:
+%s placeholders, dictionary/buffered cursors, commit/rollback, ping and
+in_transaction. SQLite errors are re-raised as mysql.connector.Error (duplicate
+keys as IntegrityError), so crud's error handling behaves as it does against MySQL.
+"""
+import sqlite3
+
+import numpy as np
+from mysql.connector import Error, IntegrityError
+
+import dbsetup
+
+# Same tables and indexes as dbsetup.py + migrations.py, except the FULLTEXT
+# index. Searched text columns compare case-insensitively like MySQL's default
+# collation, which also lets SQLite use their indexes for LIKE 'prefix%'.
+SCHEMA = [
+    """CREATE TABLE vehicles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        vin VARCHAR(100) COLLATE NOCASE,
+        license_plate VARCHAR(50) COLLATE NOCASE,
+        model VARCHAR(100) COLLATE NOCASE,
+        year INT,
+        mileage INT DEFAULT 0,
+        owner_name VARCHAR(100) COLLATE NOCASE,
+        owner_contact VARCHAR(100),
+        password VARCHAR(100)
+    )""",
+    """CREATE TABLE vehicle_predictions (
+        vehicle_id INTEGER PRIMARY KEY REFERENCES vehicles (id) ON DELETE CASCADE,
+        predicted_issues VARCHAR(1000) NOT NULL,
+        high_priority VARCHAR(1000) NOT NULL,
+        medium_priority VARCHAR(1000) NOT NULL,
+        low_priority VARCHAR(1000) NOT NULL,
+        scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""",
+    """CREATE TABLE employees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_id VARCHAR(50) UNIQUE,
+        password VARCHAR(100) NOT NULL
+    )""",
+    "CREATE UNIQUE INDEX uq_vehicles_vin ON vehicles (vin)",
+    "CREATE INDEX idx_vehicles_owner ON vehicles (owner_name)",
+    "CREATE INDEX idx_vehicles_plate ON vehicles (license_plate)",
+    "CREATE INDEX idx_vehicles_owner_password ON vehicles (owner_name, password)",
+    "CREATE INDEX idx_vehicles_model ON vehicles (model)",
+]
+
+
+class Cursor:
+    def __init__(self, raw, dictionary=False):
+        self._raw = raw
+        self._dictionary = dictionary
+
+    def execute(self, query, params=()):
+        try:
+            self._raw.execute(query.replace("%s", "?"), tuple(params))
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(msg=str(e)) from e
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def executemany(self, query, seq_params):
+        try:
+            self._raw.executemany(query.replace("%s", "?"), seq_params)
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(msg=str(e)) from e
+        except sqlite3.Error as e:
+            raise Error(msg=str(e)) from e
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return dict(zip((column[0] for column in self._raw.description), row))
+
+    def fetchone(self):
+        return self._convert(self._raw.fetchone())
+
+    def fetchmany(self, size):
+        return [self._convert(row) for row in self._raw.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._raw.fetchall()]
+
+    @property
+    def lastrowid(self):
+        return self._raw.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    def close(self):
+        self._raw.close()
+
+
+class Connection:
+    def __init__(self, path):
+        # The pool hands connections between threads, one at a time
+        self._raw = sqlite3.connect(path, check_same_thread=False)
+        # Benchmarks measure the app, not fsync latency
+        self._raw.execute("PRAGMA synchronous=OFF")
+
+    def cursor(self, dictionary=False, buffered=False):
+        return Cursor(self._raw.cursor(), dictionary)
+
+    @property
+    def in_transaction(self):
+        return self._raw.in_transaction
+
+    def start_transaction(self):
+        self._raw.execute("BEGIN")
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def ping(self, reconnect=False):
+        self._raw.execute("SELECT 1")
+
+    def close(self):
+        self._raw.close()
+
+
+def connect(path, **mysql_args):
+    """ConnectionPool `connect` callable; the MySQL host/user/database arguments are ignored"""
+    return Connection(path)
+
+def create_database(path, rows, seed=0, chunk_size=dbsetup.CHUNK_SIZE):
+    """Create the schema at `path` and seed it like `dbsetup.py --rows`"""
+    conn = sqlite3.connect(path)
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO employees (employee_id, password) VALUES (?, ?)", dbsetup.employees)
+        rng = np.random.default_rng(seed)
+        for offset in range(0, rows, chunk_size):
+            chunk = dbsetup.generate_vehicles(offset, min(chunk_size, rows - offset), rng)
+            conn.executemany(
+                dbsetup.INSERT_SQL.replace("%s", "?"),
+                zip(*(chunk[column].tolist() for column in dbsetup.VEHICLE_COLUMNS))
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return path
@@ -0,0 +1,213 @@
+"""
+Read-through caching with TTL + LRU eviction
+
+ReadThroughCache sits in front of a loader function and stores results in a
+backend. MemoryBackend keeps entries in-process; RedisBackend shares them
+between workers (requires the `redis` package). Both expose the same small
+interface, so a shared backend can be swapped for MemoryBackend in tests and
+local development.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+# ---------------- BACKENDS ----------------
+class MemoryBackend:
+    """In-process LRU store with per-entry expiry"""
+
+    shared = False      # other processes never see its entries or invalidations
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend on Redis; LRU eviction is left to the server's maxmemory policy"""
+
+    shared = True
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="automotive:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisBackend requires the 'redis' package (pip install redis)") from e
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, pickle.dumps(value), ex=int(ttl) if ttl else None)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self._prefix + "*"):
+            self._client.delete(key)
+
+
+# ---------------- READ-THROUGH CACHE ----------------
+class ReadThroughCache:
+    """
+    Cache in front of a loader: get_or_load() returns the cached value or calls
+    the loader and stores what it returns. Loader exceptions propagate and are
+    never cached.
+
+    Entries can belong to a group (e.g. one customer's vehicle pages). Their keys
+    embed the group's current generation token; invalidate_group() replaces the
+    token so all of them miss at once. A token that was evicted is replaced too,
+    so entries from an older generation can never be served again. A load
+    that overlaps invalidate_group() stores its value under the old token, so
+    grouped entries are never overwritten by stale data; ungrouped ones can
+    be, so use a group for anything writes invalidate.
+    """
+
+    def __init__(self, name, ttl=60, backend=None, max_entries=10000):
+        self.name = name
+        self.ttl = ttl
+        self.backend = backend if backend is not None else MemoryBackend(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def use_backend(self, backend):
+        """Swap the storage backend (e.g. RedisBackend in production, MemoryBackend in tests)"""
+        self.backend = backend
+
+    @property
+    def shared(self):
+        """True if every process sees the same entries and invalidations"""
+        return self.backend.shared
+
+    def _generation(self, group):
+        gen_key = f"{self.name}:gen:{group!r}"
+        generation = self.backend.get(gen_key)
+        if generation is _MISSING:
+            generation = os.urandom(8).hex()
+            # Tokens expire like entries, so a write this backend never saw
+            # (another worker's MemoryBackend) is picked up within one ttl
+            self.backend.set(gen_key, generation, self.ttl)
+        return generation
+
+    def generation(self, group):
+        """Current token of `group`; it changes whenever the group is invalidated"""
+        return self._generation(group)
+
+    def _key(self, key, group=None):
+        if group is None:
+            return f"{self.name}:{key!r}"
+        return f"{self.name}:{group!r}:{self._generation(group)}:{key!r}"
+
+    def get_or_load(self, key, loader, group=None):
+        full_key = self._key(key, group)
+        value = self.backend.get(full_key)
+        if value is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    async def get_or_load_async(self, key, loader, group=None):
+        """get_or_load() for a loader returning an awaitable; the key is fixed before it runs"""
+        full_key = self._key(key, group)
+        value = self.backend.get(full_key)
+        if value is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        value = await loader()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def get(self, key, default=None, group=None):
+        """Cached value for `key`, or `default` (counted as a miss)"""
+        value = self.backend.get(self._key(key, group))
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key, value, group=None):
+        self.backend.set(self._key(key, group), value, self.ttl)
+
+    def invalidate(self, key):
+        self.backend.delete(self._key(key))
+        with self._lock:
+            self.invalidations += 1
+
+    def invalidate_group(self, group):
+        self.backend.set(f"{self.name}:gen:{group!r}", os.urandom(8).hex(), self.ttl)
+        with self._lock:
+            self.invalidations += 1
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.backend.evictions,
+            "expirations": self.backend.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,62 +1,142 @@
-import mysql.connector
+import os
+
 from mysql.connector import Error
+import cache
+import db_pool
+import metrics
+import trigram_index
+
+VEHICLE_CACHE_TTL = 60          # seconds a cached lookup may be served
+VEHICLE_CACHE_SIZE = 10000      # max cached lookups (LRU beyond that)
+
+# redis://host:6379/0 shares the cache between worker processes (pip install redis)
+VEHICLE_CACHE_URL = os.environ.get("VEHICLE_CACHE_URL")
+
+# Read-through cache for VIN lookups, per-customer vehicle lists and rendered
+# dashboard fragments. The default in-process backend is only invalidated by
+# writes made in the same process: with several worker processes (or app.py
+# and asgi_app.py side by side) set VEHICLE_CACHE_URL, or other workers serve
+# changed and deleted rows for up to VEHICLE_CACHE_TTL seconds.
+vehicle_cache = cache.ReadThroughCache("vehicles", ttl=VEHICLE_CACHE_TTL, max_entries=VEHICLE_CACHE_SIZE)
+if VEHICLE_CACHE_URL:
+    vehicle_cache.use_backend(cache.RedisBackend(VEHICLE_CACHE_URL))
+
+# Group invalidated by every vehicle write, for fleet-wide pages
+FLEET_GROUP = ("fleet",)
+
+SEARCH_FIELDS = ("vin", "plate", "model", "owner", "text")
+SEARCH_TIMEOUT_MS = 250         # MySQL aborts a search query after this long
+OWNER_MATCHES = 10              # owner names a fuzzy owner search covers
+OWNER_INDEX_TTL = 300           # seconds before distinct owner names are reloaded
 
 def get_connection():
+    """Borrow a connection from the shared pool; conn.close() returns it"""
     try:
-        return mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="yourpassword",      # replace with your MySQL root password
-            database="automotive_db"
-        )
+        return db_pool.get_pool().get_connection()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
         return None
 
+def _select(query, params, one=False, name="select"):
+    """Run a SELECT and return dict rows (timed as `name`); raises Error so failures are never cached"""
+    with metrics.DB_TIME.time(function=name):
+        conn = get_connection()
+        if conn is None:
+            raise Error("No database connection")
+        
+        cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            cursor.execute(query, params)
+            return cursor.fetchone() if one else cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+def normalize_identifier(value):
+    """VIN or plate as stored: upper-case without spaces or dashes, so 'dl01 ab-1111' is DL01AB1111"""
+    return "".join(str(value).split()).replace("-", "").upper()
+
+def _invalidate_vehicle_cache(*vehicles):
+    """Drop cached lookups for every (vin, owner_name) touched by a write"""
+    for vin, owner in vehicles:
+        vehicle_cache.invalidate_group(("vin", vin))
+        vehicle_cache.invalidate_group(("owner", owner))
+        # New owners are searchable at once; removed ones drop out at the next reload
+        owner_index.add(owner)
+    vehicle_cache.invalidate_group(FLEET_GROUP)
+
+def _data_group(owner_name=None):
+    return FLEET_GROUP if owner_name is None else ("owner", owner_name)
+
+def data_version(owner_name=None):
+    """
+    Token that changes whenever any vehicle (or one owner's vehicles) is written
+
+    Writes in other processes only change it if vehicle_cache is shared.
+    """
+    return vehicle_cache.generation(_data_group(owner_name))
+
+def cached_fragment(key, render, owner_name=None):
+    """Rendered HTML from render(), cached until the fleet (or the owner's vehicles) change"""
+    return vehicle_cache.get_or_load(("fragment", key), render, group=_data_group(owner_name))
+
 # ---------------- VEHICLES ----------------
+@metrics.db_timed
 def add_vehicle(vin, plate, model, year, owner, contact, password, mileage=0):
+    vin, plate = normalize_identifier(vin), normalize_identifier(plate)
     conn = get_connection()
     if conn is None:
         return False
         
     cursor = conn.cursor()
     try:
-        # Try to insert with mileage column
+        # Schema (mileage column, unique VIN) is managed by migrations.py
         cursor.execute("""
             INSERT INTO vehicles (vin, license_plate, model, year, owner_name, owner_contact, password, mileage)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """, (vin, plate, model, year, owner, contact, password, mileage))
         conn.commit()
+        _invalidate_vehicle_cache((vin, owner))
         return True
     except Error as e:
-        # If mileage column doesn't exist, try without it
-        if "Unknown column 'mileage'" in str(e):
-            try:
-                cursor.execute("""
-                    INSERT INTO vehicles (vin, license_plate, model, year, owner_name, owner_contact, password)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (vin, plate, model, year, owner, contact, password))
-                conn.commit()
-                print("Note: Added vehicle without mileage. Run: ALTER TABLE vehicles ADD COLUMN mileage INT DEFAULT 0;")
-                return True
-            except Error as e2:
-                print(f"Error adding vehicle: {e2}")
-                return False
-        else:
-            print(f"Error adding vehicle: {e}")
-            return False
+        print(f"Error adding vehicle: {e}")
+        return False
     finally:
         cursor.close()
         conn.close()
 
-def view_vehicles():
+def _keyset_page(query, params, limit, after_id, where=None):
+    """Append keyset pagination (id > after_id ORDER BY id LIMIT n) to a SELECT"""
+    conditions = [where] if where else []
+    params = list(params)
+    if after_id is not None:
+        conditions.append("id > %s")
+        params.append(int(after_id))
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY id"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(int(limit))
+    return query, tuple(params)
+
+@metrics.db_timed
+def view_vehicles(limit=None, after_id=None):
+    """
+    List vehicles ordered by id. With `limit`, returns a single page; pass the
+    last id of the previous page as `after_id` to fetch the next one.
+    """
     conn = get_connection()
     if conn is None:
         return []
         
     cursor = conn.cursor(dictionary=True, buffered=True)
     try:
-        cursor.execute("SELECT id, vin, license_plate, model, year, owner_name, owner_contact FROM vehicles")
+        query, params = _keyset_page(
+            "SELECT id, vin, license_plate, model, year, owner_name, owner_contact FROM vehicles",
+            (), limit, after_id
+        )
+        cursor.execute(query, params)
         return cursor.fetchall()
     except Error as e:
         print(f"Error fetching vehicles: {e}")
@@ -65,48 +145,57 @@ def view_vehicles():
         cursor.close()
         conn.close()
 
-def get_customer_vehicles(owner_name):
-    """Get vehicles for a specific customer only"""
+@metrics.db_timed
+def count_vehicles(owner_name=None):
+    """Number of vehicles (for one owner if given) without fetching any rows"""
     conn = get_connection()
     if conn is None:
-        return []
+        return 0
         
-    cursor = conn.cursor(dictionary=True, buffered=True)
+    cursor = conn.cursor()
     try:
-        cursor.execute("""
-            SELECT id, vin, license_plate, model, year, owner_name, owner_contact 
-            FROM vehicles 
-            WHERE owner_name=%s
-        """, (owner_name,))
-        return cursor.fetchall()
+        if owner_name is None:
+            cursor.execute("SELECT COUNT(*) FROM vehicles")
+        else:
+            cursor.execute("SELECT COUNT(*) FROM vehicles WHERE owner_name=%s", (owner_name,))
+        return cursor.fetchone()[0]
     except Error as e:
-        print(f"Error fetching customer vehicles: {e}")
-        return []
+        print(f"Error counting vehicles: {e}")
+        return 0
     finally:
         cursor.close()
         conn.close()
 
+def get_customer_vehicles(owner_name, limit=None, after_id=None):
+    """Get vehicles for a specific customer only (keyset-paginated like view_vehicles, cached)"""
+    query, params = _keyset_page("""
+        SELECT id, vin, license_plate, model, year, owner_name, owner_contact 
+        FROM vehicles""", (owner_name,), limit, after_id, where="owner_name=%s")
+    try:
+        return vehicle_cache.get_or_load(
+            ("page", limit, after_id),
+            lambda: _select(query, params, name="get_customer_vehicles"),
+            group=("owner", owner_name)
+        )
+    except Error as e:
+        print(f"Error fetching customer vehicles: {e}")
+        return []
+
 def search_vehicle_by_vin(vin):
-    """Search for a vehicle by VIN (public access)"""
-    conn = get_connection()
-    if conn is None:
-        return None
-        
-    cursor = conn.cursor(dictionary=True, buffered=True)
+    """Search for a vehicle by VIN (public access, cached)"""
+    vin = normalize_identifier(vin)
     try:
-        cursor.execute("""
+        # A group, so a lookup racing an update never caches the old row
+        return vehicle_cache.get_or_load("vehicle", lambda: _select("""
             SELECT id, vin, license_plate, model, year, owner_name, owner_contact 
             FROM vehicles 
             WHERE vin=%s
-        """, (vin,))
-        return cursor.fetchone()
+        """, (vin,), one=True, name="search_vehicle_by_vin"), group=("vin", vin))
     except Error as e:
         print(f"Error searching vehicle by VIN: {e}")
         return None
-    finally:
-        cursor.close()
-        conn.close()
 
+@metrics.db_timed
 def get_vehicle_by_id(vehicle_id):
     conn = get_connection()
     if conn is None:
@@ -123,13 +212,19 @@ def get_vehicle_by_id(vehicle_id):
         cursor.close()
         conn.close()
 
+@metrics.db_timed
 def update_vehicle(vehicle_id, vin, plate, model, year, owner, contact, password=None):
+    vin, plate = normalize_identifier(vin), normalize_identifier(plate)
     conn = get_connection()
     if conn is None:
         return False
         
-    cursor = conn.cursor()
+    cursor = conn.cursor(buffered=True)
     try:
+        # Old VIN/owner are needed to invalidate their cached lookups
+        cursor.execute("SELECT vin, owner_name FROM vehicles WHERE id=%s", (vehicle_id,))
+        previous = cursor.fetchone()
+        
         if password:  # Update password if provided
             cursor.execute("""
                 UPDATE vehicles
@@ -143,6 +238,7 @@ def update_vehicle(vehicle_id, vin, plate, model, year, owner, contact, password
                 WHERE id=%s
             """, (vin, plate, model, year, owner, contact, vehicle_id))
         conn.commit()
+        _invalidate_vehicle_cache((vin, owner), *([previous] if previous else []))
         return True
     except Error as e:
         print(f"Error updating vehicle: {e}")
@@ -151,15 +247,20 @@ def update_vehicle(vehicle_id, vin, plate, model, year, owner, contact, password
         cursor.close()
         conn.close()
 
+@metrics.db_timed
 def delete_vehicle(vehicle_id):
     conn = get_connection()
     if conn is None:
         return False
         
-    cursor = conn.cursor()
+    cursor = conn.cursor(buffered=True)
     try:
+        cursor.execute("SELECT vin, owner_name FROM vehicles WHERE id=%s", (vehicle_id,))
+        previous = cursor.fetchone()
         cursor.execute("DELETE FROM vehicles WHERE id=%s", (vehicle_id,))
         conn.commit()
+        if previous:
+            _invalidate_vehicle_cache(previous)
         return True
     except Error as e:
         print(f"Error deleting vehicle: {e}")
@@ -168,7 +269,137 @@ def delete_vehicle(vehicle_id):
         cursor.close()
         conn.close()
 
+# ---------------- SEARCH ----------------
+# Columns each prefix search filters and pages on; owner searches page on
+# owner_name too, text searches on id
+_SEARCH_COLUMNS = {"vin": "vin", "plate": "license_plate", "model": "model", "owner": "owner_name", "text": "id"}
+
+# Reads idx_vehicles_owner (one entry per owner), not the table
+OWNER_NAMES_SQL = "SELECT DISTINCT owner_name FROM vehicles WHERE owner_name IS NOT NULL"
+
+def _owner_names():
+    return [row["owner_name"] for row in _select(OWNER_NAMES_SQL, (), name="owner_names")]
+
+# Fuzzy owner-name matching over the distinct owners, kept in sync by every write
+owner_index = trigram_index.TrigramIndex(_owner_names, ttl=OWNER_INDEX_TTL)
+
+def normalize_search_term(field, term):
+    """VINs and plates are stored normalized (normalize_identifier), so terms for them are too"""
+    term = " ".join((term or "").split())
+    if field in ("vin", "plate", "text"):
+        term = normalize_identifier(term)
+    return term
+
+def _like_prefix(term):
+    # '!' escapes LIKE wildcards typed by the user (backslash differs between MySQL and SQLite)
+    return term.replace("!", "!!").replace("%", "!%").replace("_", "!_") + "%"
+
+def _search_filter(field, term):
+    """(where, params) matching `term` in `field`, or None if nothing can match"""
+    if field == "owner":
+        names = [name for name, _ in owner_index.match(term, limit=OWNER_MATCHES)]
+        # An exact name means that owner, not everyone with a similar name
+        names = [name for name in names if name.lower() == term.lower()] or names
+        if not names:
+            return None
+        return f"owner_name IN ({', '.join(['%s'] * len(names))})", names
+    if field == "text":
+        # FULLTEXT ngram index (2-character tokens); a quoted phrase matches anywhere in the value
+        if len(term) < 2:
+            return None
+        return "MATCH(vin, license_plate) AGAINST (%s IN BOOLEAN MODE)", ['"' + term.replace('"', "") + '"']
+    return f"{_SEARCH_COLUMNS[field]} LIKE %s ESCAPE '!'", [_like_prefix(term)]
+
+def parse_search_cursor(after):
+    """(id, key) of a next_cursor from search_vehicles; raises ValueError if it is malformed"""
+    after_id, separator, key = (after or "").partition(":")
+    if not separator or not after_id.isdigit():
+        raise ValueError(f"Malformed search cursor {after!r}; pass next_cursor unchanged")
+    return int(after_id), key
+
+def _search_query(field, where, params, limit, after):
+    """(query, params) of a keyset page ordered by the field's index (column, id); `after` is the previous next_cursor"""
+    column = _SEARCH_COLUMNS[field]
+    params = list(params)
+    if after:
+        after_id, key = parse_search_cursor(after)
+        if column == "id":
+            where += " AND id > %s"
+            params.append(after_id)
+        else:
+            where += f" AND ({column} > %s OR ({column} = %s AND id > %s))"
+            params += [key, key, after_id]
+    order = "id" if column == "id" else f"{column}, id"
+    params.append(limit + 1)
+    # The optimizer hint is a comment to other databases
+    return f"""
+        SELECT /*+ MAX_EXECUTION_TIME({SEARCH_TIMEOUT_MS}) */ id, vin, license_plate, model, year, owner_name, owner_contact
+        FROM vehicles WHERE {where} ORDER BY {order} LIMIT %s
+    """, tuple(params)
+
+def _search_result(field, rows, limit):
+    """(vehicles, next_cursor) from the limit + 1 rows of a _search_query"""
+    column = _SEARCH_COLUMNS[field]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = f"{last['id']}:{'' if column == 'id' else last[column]}"
+    return rows[:limit], next_cursor
+
+def _search_page(field, where, params, limit, after):
+    rows = _select(*_search_query(field, where, params, limit, after), name=f"search_vehicles:{field}")
+    return _search_result(field, rows, limit)
+
+def _search_term(term, field, after):
+    """Normalized `term`; raises ValueError for an unknown field or a malformed cursor"""
+    if field not in SEARCH_FIELDS:
+        raise ValueError(f"Unknown search field {field!r}; expected one of {SEARCH_FIELDS}")
+    if after:
+        parse_search_cursor(after)
+    return normalize_search_term(field, term)
+
+def search_vehicles(term, field="vin", limit=50, after=None):
+    """
+    One page of vehicles matching `term` (cached until the next vehicle write)
+
+    field is one of SEARCH_FIELDS: vin, plate and model match a prefix on
+    their index, owner matches owner names fuzzily, and text finds VINs or
+    plates containing the term. Returns (vehicles, next_cursor); pass
+    next_cursor as `after` for the next page, it is None on the last one.
+    Raises ValueError for an unknown field or a malformed cursor.
+    """
+    term = _search_term(term, field, after)
+    if not term:
+        return [], None
+
+    def load():
+        search = _search_filter(field, term)
+        return ([], None) if search is None else _search_page(field, *search, limit, after)
+
+    try:
+        return vehicle_cache.get_or_load(("search", field, term, limit, after), load, group=FLEET_GROUP)
+    except Error as e:
+        # Also raised when a query runs past SEARCH_TIMEOUT_MS
+        print(f"Error searching vehicles by {field}: {e}")
+        return [], None
+
+# Fields search_all() always searches; "text" only when no VIN or plate starts with the term
+SEARCH_ALL_FIELDS = ("vin", "plate", "model", "owner")
+
+def search_all(term, limit=10):
+    """
+    First page of each field's matches, {field: (vehicles, next_cursor)}
+
+    VINs and plates are only searched for the term inside them when no VIN or
+    plate starts with it.
+    """
+    results = {field: search_vehicles(term, field, limit) for field in SEARCH_ALL_FIELDS}
+    if not results["vin"][0] and not results["plate"][0]:
+        results["text"] = search_vehicles(term, "text", limit)
+    return results
+
 # ---------------- EMPLOYEES ----------------
+@metrics.db_timed
 def verify_employee(employee_id, password):
     conn = get_connection()
     if conn is None:
@@ -186,6 +417,7 @@ def verify_employee(employee_id, password):
         conn.close()
 
 # ---------------- CUSTOMERS ----------------
+@metrics.db_timed
 def verify_customer(owner_name, password):
     conn = get_connection()
     if conn is None:
@@ -0,0 +1,262 @@
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+# Shared connection settings used by crud.py and dbsetup.py
+DB_CONFIG = {
+    "host": "localhost",
+    "user": "root",
+    "password": "yourpassword",      # replace with your MySQL root password
+    "database": "automotive_db"
+}
+
+POOL_SIZE = 10                 # max open connections per pool
+POOL_WAIT_TIMEOUT = 5.0        # seconds to wait for a free connection
+POOL_MAX_LIFETIME = 1800       # recycle connections older than this (seconds)
+POOL_HEALTH_CHECK_AFTER = 30   # ping connections idle longer than this (seconds)
+
+
+class PoolTimeout(Error):
+    """Raised when no connection becomes free within the wait timeout"""
+
+
+class _PoolEntry:
+    __slots__ = ("raw", "created_at", "last_used")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class PooledConnection:
+    """Proxy around a MySQL connection; close() hands it back to the pool"""
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise Error("Connection already returned to the pool")
+        return getattr(self._entry.raw, name)
+
+    def close(self):
+        if self._entry is not None:
+            entry, self._entry = self._entry, None
+            self._pool._release(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Size-bounded, thread-safe MySQL connection pool
+
+    - At most `size` connections are open at once; callers wait up to
+      `wait_timeout` seconds for one to be returned
+    - Connections older than `max_lifetime` are closed and replaced
+    - Connections idle longer than `health_check_after` are pinged before reuse
+    """
+
+    def __init__(self, size=POOL_SIZE, wait_timeout=POOL_WAIT_TIMEOUT,
+                 max_lifetime=POOL_MAX_LIFETIME, health_check_after=POOL_HEALTH_CHECK_AFTER,
+                 connect=None, **connect_args):
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self._connect = connect or mysql.connector.connect
+        self._connect_args = connect_args
+
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+
+        self._stats = {
+            "acquired": 0,
+            "waited": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+        }
+
+    # ---------------- ACQUIRE / RELEASE ----------------
+    def get_connection(self):
+        start = time.monotonic()
+        deadline = start + self.wait_timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                entry = self._take_idle()
+                if entry is not None:
+                    break
+                if self._open < self.size:
+                    # Reserve a slot, then connect outside the lock
+                    self._open += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeout(msg=f"No free connection after {self.wait_timeout}s (pool size {self.size})")
+                waited = True
+                self._cond.wait(remaining)
+
+        created = entry is None
+        if created:
+            try:
+                entry = _PoolEntry(self._connect(**self._connect_args))
+            except Exception:
+                with self._cond:
+                    self._open -= 1
+                    self._cond.notify()
+                raise
+
+        wait_time = time.monotonic() - start
+        with self._cond:
+            self._stats["acquired"] += 1
+            if created:
+                self._stats["created"] += 1
+            if waited:
+                self._stats["waited"] += 1
+                self._stats["wait_time_total"] += wait_time
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+
+        return PooledConnection(self, entry)
+
+    def _take_idle(self):
+        """Pop a usable idle connection, discarding expired or dead ones (lock held)"""
+        while self._idle:
+            entry = self._idle.pop()
+            now = time.monotonic()
+            if now - entry.created_at > self.max_lifetime:
+                self._stats["recycled"] += 1
+                self._discard(entry)
+                continue
+            if now - entry.last_used > self.health_check_after and not self._is_healthy(entry):
+                self._stats["health_check_failures"] += 1
+                self._discard(entry)
+                continue
+            return entry
+        return None
+
+    def _release(self, entry):
+        try:
+            # A half-read result set cannot be recovered; drop the connection
+            if getattr(entry.raw, "unread_result", False):
+                raise Error("Unread result found")
+            # Never hand an open transaction to the next caller
+            if getattr(entry.raw, "in_transaction", False):
+                entry.raw.rollback()
+        except Exception:
+            with self._cond:
+                self._discard(entry)
+                self._cond.notify()
+            return
+
+        with self._cond:
+            entry.last_used = time.monotonic()
+            if entry.last_used - entry.created_at > self.max_lifetime:
+                self._stats["recycled"] += 1
+                self._discard(entry)
+            else:
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def _is_healthy(self, entry):
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, entry):
+        """Close a connection and free its slot (lock held)"""
+        self._open -= 1
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    # ---------------- MAINTENANCE ----------------
+    def close_all(self):
+        """Close every idle connection (checked-out ones close when returned)"""
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
+
+    def stats(self):
+        """Snapshot of pool usage and wait metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self.size
+            stats["open"] = self._open
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+            stats["wait_time_avg"] = (
+                stats["wait_time_total"] / stats["waited"] if stats["waited"] else 0.0
+            )
+        return stats
+
+
+# ---------------- SHARED POOLS ----------------
+# ConnectionPool settings; every other override is a connection argument
+POOL_OPTIONS = ("size", "wait_timeout", "max_lifetime", "health_check_after", "connect")
+
+_pools = {}      # (database, connection overrides) -> (pool, pool options)
+_pools_lock = threading.Lock()
+
+def _pool_name(key):
+    database, overrides = key
+    name = database or "(server)"
+    if overrides:
+        name += " (" + ", ".join(f"{k}={v}" for k, v in overrides) + ")"
+    return name
+
+def get_pool(database=DB_CONFIG["database"], **overrides):
+    """
+    Return the process-wide pool for `database`, creating it on first use.
+    Pass database=None for a server-level pool (used by dbsetup.py).
+
+    Connection arguments (e.g. allow_local_infile=True) get a pool of their
+    own. Pool options (POOL_OPTIONS) are fixed when the pool is created, so
+    asking for different ones later raises ValueError.
+    """
+    options = {k: overrides.pop(k) for k in POOL_OPTIONS if k in overrides}
+    key = (database, tuple(sorted(overrides.items())))
+    with _pools_lock:
+        pool, created_with = _pools.get(key, (None, None))
+        if pool is None:
+            connect_args = {k: v for k, v in DB_CONFIG.items() if k != "database"}
+            if database is not None:
+                connect_args["database"] = database
+            connect_args.update(overrides)
+            pool = ConnectionPool(**options, **connect_args)
+            _pools[key] = (pool, options)
+        elif options and options != created_with:
+            raise ValueError(f"Pool {_pool_name(key)} already exists with options {created_with}, not {options}")
+        return pool
+
+def pool_stats():
+    """stats() of every shared pool, keyed by database name (and connection overrides)"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {_pool_name(key): pool.stats() for key, (pool, _) in pools.items()}
+
+def close_pools():
+    with _pools_lock:
+        for pool, _ in _pools.values():
+            pool.close_all()
+        _pools.clear()
@@ -1,18 +1,158 @@
-#dbsetup.py
-
-import mysql.connector
-import random
+"""
+Create automotive_db and seed it with sample vehicles and employees
+
+    python dbsetup.py                                   # 50 vehicles, 5 employees
+    python dbsetup.py --rows 5000000 --seed 7           # production-size fleet
+    python dbsetup.py --rows 5000000 --method load-data # LOAD DATA LOCAL INFILE
+
+Vehicles are generated in vectorized NumPy chunks and each chunk is inserted
+as multi-row INSERTs in its own transaction. Indexes are added by the
+migrations after the load, so the bulk insert does not maintain them row by row.
+"""
+import argparse
+import sys
+import time
 from datetime import datetime
 
-def get_connection():
-    return mysql.connector.connect(
-        host="localhost",
-        user="root",
-        password="yourpassword"  # replace with your MySQL root password
-    )
-
-def setup_database():
-    conn = get_connection()
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+
+import db_pool
+import migrations
+import service_history
+
+DEFAULT_ROWS = 50
+CHUNK_SIZE = 10000
+
+VEHICLE_COLUMNS = ['vin', 'license_plate', 'model', 'year', 'mileage',
+                   'owner_name', 'owner_contact', 'password']
+
+INSERT_SQL = """
+    INSERT INTO vehicles
+    (vin, license_plate, model, year, mileage, owner_name, owner_contact, password)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# Sample pools
+owner_names = ["Ramesh", "Suresh", "Meena", "Anjali", "Vikram", "Priya", "Amit", "Neha", "Arjun", "Kavita"]
+sirnames = ["Garg", "Sharma", "Agarwal", "Rai", "Bharadwaj", "Vashishth", "Gupta", "Goyal", "Panwar", "Singhal"]
+car_models = [
+    "Honda Amaze", "Honda Jazz", "Honda Civic", "Honda WR-V",
+    "Maruti Celerio", "Ford Mustang", "Mahindra Thar", "Tata Tiago"
+]
+years = list(range(2015, 2024))
+plate_series = ['AB', 'XY', 'PQ', 'MN']
+
+# Sample employees
+employees = [
+    ("EMP001", "admin123"),
+    ("EMP002", "emp456"),
+    ("EMP003", "secure789"),
+    ("EMP004", "admin456"),
+    ("EMP005", "emp123")
+]
+
+_OWNERS = np.array([f"{first} {last}" for first in owner_names for last in sirnames], dtype=object)
+_STATE_CODES = np.array([f"DL{i:02d}" for i in range(1, 100)], dtype=object)
+
+
+def get_connection(local_infile=False):
+    # Server-level pool (no default database) so the DB can be dropped/recreated
+    if local_infile:
+        return db_pool.get_pool(database=None, allow_local_infile=True).get_connection()
+    return db_pool.get_pool(database=None).get_connection()
+
+
+# ---------------- GENERATION ----------------
+def _numbered(prefix, numbers):
+    return np.array([prefix], dtype=object) + numbers.astype(str).astype(object)
+
+def generate_vehicles(start, n, rng, current_year=None):
+    """Vehicles start+1 .. start+n as a DataFrame with VEHICLE_COLUMNS"""
+    current_year = current_year or datetime.now().year
+    ids = np.arange(start, start + n)
+
+    plate = (_STATE_CODES[rng.integers(0, len(_STATE_CODES), n)]
+             + np.array(plate_series, dtype=object)[rng.integers(0, len(plate_series), n)]
+             + rng.integers(1000, 10000, n).astype(str).astype(object))
+    year = np.array(years)[rng.integers(0, len(years), n)]
+
+    # 🔑 Realistic mileage calculation
+    vehicle_age = current_year - year
+    mileage = rng.integers(vehicle_age * 12000, vehicle_age * 15000 + 1)
+
+    return pd.DataFrame({
+        'vin': _numbered('VIN', ids + 1000),
+        'license_plate': plate,
+        'model': np.array(car_models, dtype=object)[rng.integers(0, len(car_models), n)],
+        'year': year,
+        'mileage': mileage,
+        'owner_name': _OWNERS[rng.integers(0, len(_OWNERS), n)],
+        'owner_contact': _numbered('9', rng.integers(100000000, 1000000000, n)),
+        'password': _numbered('pass', ids + 1),
+    }, columns=VEHICLE_COLUMNS)
+
+
+# ---------------- INSERT ----------------
+def _insert_executemany(cursor, chunk):
+    # mysql-connector rewrites an INSERT ... VALUES executemany into multi-row INSERTs
+    rows = zip(*(chunk[column].tolist() for column in VEHICLE_COLUMNS))
+    cursor.executemany(INSERT_SQL, list(rows))
+
+def _insert_load_data(cursor, chunk):
+    service_history.load_data_infile(cursor, 'vehicles', chunk)
+
+INSERT_METHODS = {
+    'executemany': _insert_executemany,
+    'load-data': _insert_load_data,
+}
+
+def seed_vehicles(conn, rows, chunk_size=CHUNK_SIZE, seed=None, method='executemany'):
+    """
+    Insert `rows` generated vehicles, one transaction per chunk
+
+    Returns a dict with rows, generate/insert seconds and rows/sec.
+    """
+    insert = INSERT_METHODS[method]
+    rng = np.random.default_rng(seed)
+    cursor = conn.cursor()
+    generate_time = insert_time = 0.0
+    start = time.perf_counter()
+    try:
+        for offset in range(0, rows, chunk_size):
+            t0 = time.perf_counter()
+            chunk = generate_vehicles(offset, min(chunk_size, rows - offset), rng)
+            t1 = time.perf_counter()
+            conn.start_transaction()
+            insert(cursor, chunk)
+            conn.commit()
+            generate_time += t1 - t0
+            insert_time += time.perf_counter() - t1
+
+            done = offset + len(chunk)
+            if rows > chunk_size:
+                elapsed = time.perf_counter() - start
+                print(f"  {done:,} / {rows:,} vehicles committed ({done / elapsed:,.0f} rows/sec)")
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'generate_seconds': generate_time,
+        'insert_seconds': insert_time,
+        'rows_per_sec': rows / elapsed if elapsed else 0.0,
+    }
+
+
+# ---------------- SETUP ----------------
+def setup_database(rows=DEFAULT_ROWS, chunk_size=CHUNK_SIZE, seed=None, method='executemany'):
+    conn = get_connection(local_infile=method == 'load-data')
     cursor = conn.cursor()
 
     # Reset DB
@@ -43,62 +183,40 @@ def setup_database():
             password VARCHAR(100) NOT NULL
         )
     """)
-
-    # Sample pools
-    owner_names = ["Ramesh", "Suresh", "Meena", "Anjali", "Vikram", "Priya", "Amit", "Neha", "Arjun", "Kavita"]
-    sirnames = ["Garg", "Sharma", "Agarwal", "Rai", "Bharadwaj", "Vashishth", "Gupta", "Goyal", "Panwar", "Singhal"]
-    car_models = [
-        "Honda Amaze", "Honda Jazz", "Honda Civic", "Honda WR-V",
-        "Maruti Celerio", "Ford Mustang", "Mahindra Thar", "Tata Tiago"
-    ]
-    years = list(range(2015, 2024))
-
-    current_year = datetime.now().year
-
-    # Generate 50 random vehicles
-    vehicles = []
-    for i in range(50):
-        vin = f"VIN{1000+i}"
-        plate = f"DL{random.randint(1,99):02d}{random.choice(['AB','XY','PQ','MN'])}{random.randint(1000,9999)}"
-        model = random.choice(car_models)
-        year = random.choice(years)
-
-        # 🔑 Realistic mileage calculation
-        vehicle_age = current_year - year
-        mileage = random.randint(
-            vehicle_age * 12000,
-            vehicle_age * 15000
-        )
-
-        owner = random.choice(owner_names) + ' ' + random.choice(sirnames)
-        contact = f"9{random.randint(100000000, 999999999)}"
-        password = f"pass{i+1}"
-
-        vehicles.append((vin, plate, model, year, mileage, owner, contact, password))
-
-    cursor.executemany("""
-        INSERT INTO vehicles
-        (vin, license_plate, model, year, mileage, owner_name, owner_contact, password)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """, vehicles)
-
-    # Sample employees
-    employees = [
-        ("EMP001", "admin123"),
-        ("EMP002", "emp456"),
-        ("EMP003", "secure789"),
-        ("EMP004", "admin456"),
-        ("EMP005", "emp123")
-    ]
     cursor.executemany(
         "INSERT INTO employees (employee_id, password) VALUES (%s, %s)",
         employees
     )
-
     conn.commit()
     cursor.close()
+
+    report = seed_vehicles(conn, rows, chunk_size=chunk_size, seed=seed, method=method)
+
+    # Indexes and later schema changes, built once over the loaded table
+    start = time.perf_counter()
+    migrations.migrate(conn)
+    report['index_seconds'] = time.perf_counter() - start
+
     conn.close()
     print("✅ Database setup complete with mileage included!")
+    return report
+
 
 if __name__ == "__main__":
-    setup_database()
+    parser = argparse.ArgumentParser(description="Create automotive_db and seed it with sample data")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="number of vehicles to generate")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="vehicles per insert transaction")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a reproducible fleet")
+    parser.add_argument("--method", choices=sorted(INSERT_METHODS), default="executemany")
+    args = parser.parse_args()
+
+    try:
+        report = setup_database(args.rows, chunk_size=args.chunk_size, seed=args.seed, method=args.method)
+    except Error as e:
+        sys.exit(f"Error setting up database: {e}")
+    finally:
+        db_pool.close_pools()
+
+    print(f"Vehicles:  {report['rows']:,} in {report['seconds']:.1f}s ({report['rows_per_sec']:,.0f} rows/sec)")
+    print(f"  generate {report['generate_seconds']:.1f}s, insert {report['insert_seconds']:.1f}s, "
+          f"indexes {report['index_seconds']:.1f}s")
@@ -1,11 +1,29 @@
-import pandas as pd
+"""
+Synthetic vehicle service history generator
+
+    python generate_dataset.py                                   # 1000 rows -> vehicle_service_history.csv
+    python generate_dataset.py --rows 50000000 --workers 8 --output history.parquet
+    python generate_dataset.py --rows 1000000 --seed 7 --output history_1m.csv
+
+Rows are generated in vectorized NumPy chunks, following the same issue
+probability rules as the original record-at-a-time generator. Chunks are
+written out as they are produced. Chunk i always uses the i-th child of the
+seed's SeedSequence, so the same --seed and --chunk-size give the same file
+for any number of --workers.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-import random
-from datetime import datetime, timedelta
+import pandas as pd
 
-# Set seed for reproducibility
-np.random.seed(42)
-random.seed(42)
+CURRENT_YEAR = 2024
+CHUNK_SIZE = 1_000_000
+DEFAULT_OUTPUT = 'vehicle_service_history.csv'
+COLUMNS = ['company', 'model', 'year', 'vehicle_age', 'mileage', 'service_issues']
 
 # Define vehicle data
 companies = ['Honda', 'Tata', 'Maruti', 'Hyundai', 'Toyota']
@@ -23,157 +41,244 @@ model_mapping = {
     'Toyota': toyota_models
 }
 
-# Define service issues with realistic patterns
-service_issues = [
-    'Engine Oil Change',
-    'Brake Pad Replacement',
-    'Battery Replacement',
-    'AC Gas Refill',
-    'Tire Rotation',
-    'Wheel Alignment',
-    'Suspension Check',
-    'Transmission Fluid Change',
-    'Air Filter Replacement',
-    'Fuel Filter Replacement',
-    'Spark Plug Replacement',
-    'Coolant Flush',
-    'Power Steering Fluid Change',
-    'Brake Fluid Change',
-    'Timing Belt Replacement',
-    'Clutch Replacement',
-    'Shock Absorber Replacement',
-    'Headlight Bulb Replacement',
-    'Wiper Blade Replacement',
-    'Exhaust System Repair'
-]
+TATA = companies.index('Tata')
+MARUTI = companies.index('Maruti')
 
-def generate_service_record():
-    """Generate a single service record with realistic patterns"""
-    
-    # Select company and model
-    company = random.choice(companies)
-    model = random.choice(model_mapping[company])
-    
-    # Generate year (2010-2023)
-    year = random.randint(2010, 2023)
-    current_year = 2024
-    vehicle_age = current_year - year
-    
-    # Generate mileage based on age (realistic patterns)
-    # Average 10,000-15,000 km per year
-    avg_km_per_year = random.randint(8000, 18000)
-    mileage = vehicle_age * avg_km_per_year + random.randint(-5000, 5000)
-    mileage = max(0, mileage)  # Ensure non-negative
-    
-    # Determine service issues based on realistic patterns
-    issues = []
-    
+# (issue, probability, applies to) - applies(age, mileage, company code) -> bool mask
+ISSUE_RULES = [
     # Age-based issues
-    if vehicle_age >= 5:
-        if random.random() < 0.7:
-            issues.append('Timing Belt Replacement')
-        if random.random() < 0.5:
-            issues.append('Clutch Replacement')
-    
-    if vehicle_age >= 3:
-        if random.random() < 0.6:
-            issues.append('Battery Replacement')
-        if random.random() < 0.4:
-            issues.append('Suspension Check')
-    
+    ('Timing Belt Replacement', 0.7, lambda age, km, co: age >= 5),
+    ('Clutch Replacement', 0.5, lambda age, km, co: age >= 5),
+    ('Battery Replacement', 0.6, lambda age, km, co: age >= 3),
+    ('Suspension Check', 0.4, lambda age, km, co: age >= 3),
     # Mileage-based issues
-    if mileage > 80000:
-        if random.random() < 0.8:
-            issues.append('Transmission Fluid Change')
-        if random.random() < 0.7:
-            issues.append('Brake Pad Replacement')
-    
-    if mileage > 50000:
-        if random.random() < 0.6:
-            issues.append('Spark Plug Replacement')
-        if random.random() < 0.5:
-            issues.append('Coolant Flush')
-    
-    if mileage > 30000:
-        if random.random() < 0.7:
-            issues.append('Air Filter Replacement')
-    
+    ('Transmission Fluid Change', 0.8, lambda age, km, co: km > 80000),
+    ('Brake Pad Replacement', 0.7, lambda age, km, co: km > 80000),
+    ('Spark Plug Replacement', 0.6, lambda age, km, co: km > 50000),
+    ('Coolant Flush', 0.5, lambda age, km, co: km > 50000),
+    ('Air Filter Replacement', 0.7, lambda age, km, co: km > 30000),
     # Common issues for all vehicles
-    if random.random() < 0.8:
-        issues.append('Engine Oil Change')
-    
-    if random.random() < 0.3:
-        issues.append('Tire Rotation')
-    
-    if random.random() < 0.25:
-        issues.append('Wheel Alignment')
-    
-    if random.random() < 0.2:
-        issues.append('AC Gas Refill')
-    
-    if random.random() < 0.15:
-        issues.append('Wiper Blade Replacement')
-    
+    ('Engine Oil Change', 0.8, None),
+    ('Tire Rotation', 0.3, None),
+    ('Wheel Alignment', 0.25, None),
+    ('AC Gas Refill', 0.2, None),
+    ('Wiper Blade Replacement', 0.15, None),
     # Company-specific patterns
-    if company == 'Tata':
-        if random.random() < 0.3:
-            issues.append('Exhaust System Repair')
-    
-    if company == 'Maruti':
-        if random.random() < 0.25:
-            issues.append('Fuel Filter Replacement')
-    
-    # Ensure at least one issue
-    if not issues:
-        issues.append(random.choice(['Engine Oil Change', 'Air Filter Replacement', 'Tire Rotation']))
-    
-    # Remove duplicates and join
-    issues = list(set(issues))
-    issue_string = ', '.join(issues)
-    
-    return {
-        'company': company,
+    ('Exhaust System Repair', 0.3, lambda age, km, co: co == TATA),
+    ('Fuel Filter Replacement', 0.25, lambda age, km, co: co == MARUTI),
+]
+RULE_ISSUES = [issue for issue, _, _ in ISSUE_RULES]
+# Picked when no rule fired, so every record has at least one issue
+FALLBACK_ISSUES = ['Engine Oil Change', 'Air Filter Replacement', 'Tire Rotation']
+
+VERY_OLD_SHARE = 0.02   # re-dated to 2005-2009 with high mileage (issues kept)
+BRAND_NEW_SHARE = 0.02  # re-dated to 2023-2024 with only an oil change
+
+_MODEL_TABLE = np.array([models + [''] * (7 - len(models)) for models in model_mapping.values()], dtype=object)
+_MODEL_COUNTS = np.array([len(models) for models in model_mapping.values()])
+
+
+# ---------------- GENERATION ----------------
+def issue_strings(present):
+    """Join each row's issues; every distinct combination is built once"""
+    codes = present @ (1 << np.arange(present.shape[1], dtype=np.int64))
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+    strings = np.array([
+        ', '.join(issue for bit, issue in enumerate(RULE_ISSUES) if code >> bit & 1)
+        for code in unique_codes
+    ], dtype=object)
+    return strings[inverse.ravel()]
+
+def generate_chunk(n, seed_sequence):
+    """n service records as a DataFrame, drawn from one SeedSequence"""
+    rng = np.random.default_rng(seed_sequence)
+
+    company = rng.integers(0, len(companies), n)
+    model = _MODEL_TABLE[company, (rng.random(n) * _MODEL_COUNTS[company]).astype(np.int64)]
+    year = rng.integers(2010, CURRENT_YEAR, n)
+    vehicle_age = CURRENT_YEAR - year
+    # Average 8,000-18,000 km per year
+    mileage = np.maximum(0, vehicle_age * rng.integers(8000, 18001, n) + rng.integers(-5000, 5001, n))
+
+    present = np.empty((n, len(ISSUE_RULES)), dtype=bool)
+    for i, (_, probability, applies) in enumerate(ISSUE_RULES):
+        present[:, i] = rng.random(n) < probability
+        if applies is not None:
+            present[:, i] &= applies(vehicle_age, mileage, company)
+
+    none = ~present.any(axis=1)
+    fallback = np.array([RULE_ISSUES.index(issue) for issue in FALLBACK_ISSUES])
+    present[np.flatnonzero(none), fallback[rng.integers(0, len(fallback), none.sum())]] = True
+    service_issues = issue_strings(present)
+
+    # Edge cases: some very old vehicles and some brand new ones
+    edge = rng.random(n)
+    old = edge < VERY_OLD_SHARE
+    year[old] = rng.integers(2005, 2010, old.sum())
+    vehicle_age[old] = CURRENT_YEAR - year[old]
+    mileage[old] = vehicle_age[old] * rng.integers(12000, 20001, old.sum())
+
+    new = (edge >= VERY_OLD_SHARE) & (edge < VERY_OLD_SHARE + BRAND_NEW_SHARE)
+    year[new] = rng.integers(2023, CURRENT_YEAR + 1, new.sum())
+    vehicle_age[new] = CURRENT_YEAR - year[new]
+    mileage[new] = rng.integers(500, 15001, new.sum())
+    service_issues[new] = 'Engine Oil Change'
+
+    return pd.DataFrame({
+        'company': np.array(companies, dtype=object)[company],
         'model': model,
         'year': year,
         'vehicle_age': vehicle_age,
         'mileage': mileage,
-        'service_issues': issue_string
+        'service_issues': service_issues,
+    }, columns=COLUMNS)
+
+def _chunk_summary(df):
+    return {
+        'rows': len(df),
+        'year': (int(df['year'].min()), int(df['year'].max())),
+        'age': (int(df['vehicle_age'].min()), int(df['vehicle_age'].max())),
+        'mileage': (int(df['mileage'].min()), int(df['mileage'].max())),
     }
 
-# Generate 1000 records
-print("Generating 1000 service records...")
-records = [generate_service_record() for _ in range(1000)]
-
-# Create DataFrame
-df = pd.DataFrame(records)
-
-# Add some variety and edge cases
-# Add some very old vehicles
-for i in range(20):
-    idx = random.randint(0, 999)
-    df.loc[idx, 'year'] = random.randint(2005, 2009)
-    df.loc[idx, 'vehicle_age'] = 2024 - df.loc[idx, 'year']
-    df.loc[idx, 'mileage'] = df.loc[idx, 'vehicle_age'] * random.randint(12000, 20000)
-
-# Add some brand new vehicles
-for i in range(20):
-    idx = random.randint(0, 999)
-    df.loc[idx, 'year'] = random.randint(2023, 2024)
-    df.loc[idx, 'vehicle_age'] = 2024 - df.loc[idx, 'year']
-    df.loc[idx, 'mileage'] = random.randint(500, 15000)
-    df.loc[idx, 'service_issues'] = 'Engine Oil Change'
-
-# Save to CSV
-df.to_csv('vehicle_service_history.csv', index=False)
-
-print(f"\n✅ Dataset created successfully!")
-print(f"Total records: {len(df)}")
-print(f"\nDataset statistics:")
-print(f"- Companies: {df['company'].unique()}")
-print(f"- Year range: {df['year'].min()} - {df['year'].max()}")
-print(f"- Age range: {df['vehicle_age'].min()} - {df['vehicle_age'].max()} years")
-print(f"- Mileage range: {df['mileage'].min():.0f} - {df['mileage'].max():.0f} km")
-print(f"- Unique service issues found: {len(set([issue.strip() for issues in df['service_issues'] for issue in issues.split(',')]))}")
-print(f"\nFirst few records:")
-print(df.head())
-print(f"\nDataset saved as 'vehicle_service_history.csv'")
\ No newline at end of file
+def _csv_field(value):
+    value = str(value)
+    return f'"{value}"' if ',' in value else value
+
+def csv_bytes(df):
+    """
+    CSV rows (no header) for a generated chunk, byte-identical to DataFrame.to_csv
+
+    company, model, year and age have few distinct combinations, so each
+    combination's text is built once and rows only join three strings.
+    """
+    keys = [pd.factorize(df[column]) for column in COLUMNS[:4]]
+    combined = np.zeros(len(df), dtype=np.int64)
+    for codes, uniques in keys:
+        combined = combined * len(uniques) + codes
+    prefix_codes, prefix_keys = pd.factorize(combined)
+
+    prefixes = []
+    for key in prefix_keys:
+        fields = []
+        for codes, uniques in reversed(keys):
+            key, code = divmod(key, len(uniques))
+            fields.append(_csv_field(uniques[code]))
+        prefixes.append(','.join(reversed(fields)) + ',')
+    prefixes = np.array(prefixes, dtype=object)
+
+    issue_codes, issue_uniques = pd.factorize(df['service_issues'])
+    issues = np.array([',' + _csv_field(value) for value in issue_uniques], dtype=object)
+
+    lines = prefixes[prefix_codes] + df['mileage'].to_numpy().astype(str).astype(object) + issues[issue_codes]
+    return ('\n'.join(lines) + '\n').encode()
+
+def _build_chunk(n, seed_sequence, fmt):
+    """Worker: generate a chunk and serialize it (CSV text is formatted in the worker too)"""
+    df = generate_chunk(n, seed_sequence)
+    payload = csv_bytes(df) if fmt == 'csv' else df
+    return payload, _chunk_summary(df)
+
+
+# ---------------- OUTPUT ----------------
+class CsvSink:
+    def __init__(self, path):
+        self._file = open(path, 'wb')
+        self._file.write((','.join(COLUMNS) + '\n').encode())
+
+    def write(self, payload):
+        self._file.write(payload)
+
+    def close(self):
+        self._file.close()
+
+class ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("❌ Parquet output requires pyarrow (pip install pyarrow)")
+        self._pa = pa
+        self._writer = pq.ParquetWriter(path, pa.schema([
+            ('company', pa.string()), ('model', pa.string()), ('year', pa.int64()),
+            ('vehicle_age', pa.int64()), ('mileage', pa.int64()), ('service_issues', pa.string()),
+        ]))
+
+    def write(self, df):
+        self._writer.write_table(self._pa.Table.from_pandas(df, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+def generate(rows, output=DEFAULT_OUTPUT, seed=42, chunk_size=CHUNK_SIZE, workers=1, fmt=None):
+    """Write `rows` records to `output` (CSV or Parquet); returns a summary dict"""
+    fmt = fmt or ('parquet' if output.endswith('.parquet') else 'csv')
+    sizes = [min(chunk_size, rows - start) for start in range(0, rows, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    sink = ParquetSink(output) if fmt == 'parquet' else CsvSink(output)
+    summary = {'rows': 0, 'year': (9999, 0), 'age': (9999, 0), 'mileage': (2**62, 0)}
+    start = time.perf_counter()
+
+    def merge(chunk):
+        summary['rows'] += chunk['rows']
+        for key in ('year', 'age', 'mileage'):
+            summary[key] = (min(summary[key][0], chunk[key][0]), max(summary[key][1], chunk[key][1]))
+        elapsed = time.perf_counter() - start
+        print(f"  {summary['rows']:,} / {rows:,} rows ({summary['rows'] / elapsed:,.0f} rows/sec)")
+
+    try:
+        if workers <= 1:
+            for n, seed_sequence in zip(sizes, seeds):
+                payload, chunk = _build_chunk(n, seed_sequence, fmt)
+                sink.write(payload)
+                merge(chunk)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Keep a bounded window of chunks in flight and write them in order
+                pending = []
+                for n, seed_sequence in zip(sizes, seeds):
+                    pending.append(pool.submit(_build_chunk, n, seed_sequence, fmt))
+                    if len(pending) >= 2 * workers:
+                        payload, chunk = pending.pop(0).result()
+                        sink.write(payload)
+                        merge(chunk)
+                for future in pending:
+                    payload, chunk = future.result()
+                    sink.write(payload)
+                    merge(chunk)
+    finally:
+        sink.close()
+
+    summary['seconds'] = time.perf_counter() - start
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic vehicle service history")
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="*.csv or *.parquet")
+    parser.add_argument('--format', choices=['csv', 'parquet'], help="default: from the output extension")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--workers', type=int, default=1, help="generator processes")
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.rows:,} service records (seed {args.seed}, {args.workers} worker(s))...")
+    summary = generate(args.rows, args.output, args.seed, args.chunk_size, args.workers, args.format)
+
+    print(f"\n✅ Dataset created successfully!")
+    print(f"Total records: {summary['rows']:,} in {summary['seconds']:.1f}s "
+          f"({summary['rows'] / summary['seconds']:,.0f} rows/sec)")
+    print(f"\nDataset statistics:")
+    print(f"- Companies: {companies}")
+    print(f"- Year range: {summary['year'][0]} - {summary['year'][1]}")
+    print(f"- Age range: {summary['age'][0]} - {summary['age'][1]} years")
+    print(f"- Mileage range: {summary['mileage'][0]} - {summary['mileage'][1]} km")
+    print(f"- Size on disk: {os.path.getsize(args.output) / 1e6:,.1f} MB")
+    print(f"\nDataset saved as '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Dedicated inference workers with micro-batching
+
+Predictions run in a pool of worker processes, each holding its own model
+(the bundle is memory-mapped, so the tree arrays are shared pages). The web
+worker only enqueues requests and waits, so forest inference never holds its
+GIL. Concurrent single predictions arriving within MAX_WAIT_MS of each other
+are sent to a worker as one batch of up to MAX_BATCH rows.
+
+    from inference_pool import get_batcher
+    issues = get_batcher().predict("Honda City", 2019, 45000)
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+INFERENCE_PROCESSES = int(os.environ.get("ML_INFERENCE_PROCESSES", 2))
+MAX_BATCH = 64          # rows per micro-batch
+MAX_WAIT_MS = 2.0       # how long the first request of a batch waits for company
+PREDICT_TIMEOUT = 10.0  # seconds a caller waits for its prediction
+LATENCY_WINDOW = 10000  # recent requests kept for latency percentiles
+
+
+# ---------------- WORKER PROCESS ----------------
+_worker_system = None
+
+def _init_worker(inference_engine):
+    """Load the model once per worker process"""
+    global _worker_system
+    from ml_predictor import ServiceRecommendationSystem
+    _worker_system = ServiceRecommendationSystem(inference_engine=inference_engine)
+    if not _worker_system.load_model():
+        raise RuntimeError("inference worker could not load the model")
+
+def _predict_in_worker(vehicles):
+    """Issue lists for a micro-batch; a row that cannot be predicted gets its exception instead"""
+    try:
+        return _worker_system.predict_service_issues_batch(vehicles)
+    except Exception:
+        if len(vehicles) == 1:
+            raise
+    # One bad row must not fail the unrelated requests batched with it
+    results = []
+    for vehicle in vehicles:
+        try:
+            results.extend(_worker_system.predict_service_issues_batch([vehicle]))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def _clean_vehicle(vehicle):
+    """{'model', 'year', 'mileage'} with whole-number year and mileage; raises ValueError"""
+    try:
+        return {
+            'model': str(vehicle.get('model', '')),
+            'year': int(vehicle.get('year', 2020)),
+            'mileage': int(vehicle.get('mileage') or 0),
+        }
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError(f"year and mileage must be whole numbers, got {vehicle!r}") from None
+
+
+# ---------------- MICRO-BATCHER ----------------
+class MicroBatcher:
+    """
+    Request queue in front of the inference processes
+
+    A dispatcher thread takes the oldest queued request, keeps collecting until
+    `max_batch` rows or `max_wait_ms` have passed, and submits the batch. At most
+    one batch per process is in flight, so under load the queue grows and
+    batches fill up instead of piling onto the processes.
+    """
+
+    def __init__(self, processes=INFERENCE_PROCESSES, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS,
+                 inference_engine=None):
+        self.processes = processes
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.inference_engine = inference_engine or os.environ.get('ML_INFERENCE_ENGINE', 'flat')
+
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(processes)
+        self._executor = None
+        self._dispatcher = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._broken = False
+
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._batch_sizes = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+
+    def _start(self):
+        with self._start_lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            if self._executor is None:
+                self._executor = self._new_executor()
+                self._dispatcher = threading.Thread(target=self._dispatch, name="inference-batcher", daemon=True)
+                self._dispatcher.start()
+
+    def _new_executor(self):
+        # spawn: forking a threaded web worker is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.inference_engine,)
+        )
+
+    def submit(self, vehicle):
+        """Queue one {'model', 'year', 'mileage'} dict; returns a Future of its issue list"""
+        future = Future()
+        try:
+            vehicle = _clean_vehicle(vehicle)
+        except ValueError as e:
+            # Rejected here, so it never shares a batch with other callers
+            future.set_exception(e)
+            with self._stats_lock:
+                self.errors += 1
+            return future
+        if self._executor is None:
+            self._start()
+        self._queue.put((vehicle, future, time.perf_counter()))
+        return future
+
+    def predict(self, model_name, year, mileage, timeout=PREDICT_TIMEOUT):
+        """Predicted issues for one vehicle, batched with concurrent callers"""
+        return self.submit({'model': model_name, 'year': year, 'mileage': mileage}).result(timeout)
+
+    def predict_batch(self, vehicles, timeout=PREDICT_TIMEOUT):
+        """Predicted issues for a list of vehicles, split into max_batch chunks"""
+        futures = [self.submit(v) for v in vehicles]
+        return [f.result(timeout) for f in futures]
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            self._slots.acquire()
+            try:
+                result = self._submit_batch([vehicle for vehicle, _, _ in batch])
+            except RuntimeError as e:
+                self._slots.release()
+                self._fail(batch, e)
+                continue
+            result.add_done_callback(lambda done, batch=batch: self._complete(batch, done))
+
+    def _submit_batch(self, vehicles):
+        if not self._broken:
+            try:
+                return self._executor.submit(_predict_in_worker, vehicles)
+            except BrokenProcessPool:
+                pass
+        # A worker died (e.g. killed for memory); replace the whole pool
+        self._executor.shutdown(wait=False)
+        self._executor = self._new_executor()
+        self._broken = False
+        return self._executor.submit(_predict_in_worker, vehicles)
+
+    def _complete(self, batch, done):
+        self._slots.release()
+        error = done.exception()
+        if error is not None:
+            self._broken = isinstance(error, BrokenProcessPool)
+            self._fail(batch, error)
+            return
+
+        now = time.perf_counter()
+        failed = 0
+        for (_, future, queued_at), issues in zip(batch, done.result()):
+            if isinstance(issues, Exception):
+                print(f"Error during batched prediction: {issues}")
+                future.set_exception(issues)
+                failed += 1
+            else:
+                future.set_result(issues)
+        with self._stats_lock:
+            self.errors += failed
+            self.requests += len(batch)
+            self.batches += 1
+            self._batch_sizes.append(len(batch))
+            self._latencies.extend(now - queued_at for _, _, queued_at in batch)
+
+    def _fail(self, batch, error):
+        print(f"Error during batched prediction: {error}")
+        for _, future, _ in batch:
+            future.set_exception(error)
+        with self._stats_lock:
+            self.errors += len(batch)
+
+    def stats(self):
+        """Queue depth, batch sizes and end-to-end latency percentiles (ms)"""
+        with self._stats_lock:
+            latencies = np.array(self._latencies)
+            batch_sizes = np.array(self._batch_sizes)
+            stats = {
+                'processes': self.processes,
+                'queue_depth': self._queue.qsize(),
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'batch_size_avg': float(batch_sizes.mean()) if len(batch_sizes) else 0.0,
+                'batch_size_max': int(batch_sizes.max()) if len(batch_sizes) else 0,
+            }
+        for p in (50, 95, 99):
+            stats[f'latency_p{p}_ms'] = float(np.percentile(latencies, p) * 1000) if len(latencies) else 0.0
+        return stats
+
+    def close(self):
+        with self._start_lock:
+            self._closed = True
+            if self._executor is not None:
+                self._queue.put(None)
+                self._dispatcher.join()
+                self._executor.shutdown()
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_batcher():
+    """Process-wide MicroBatcher, created on first use"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher()
+        return _batcher
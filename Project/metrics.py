@@ -0,0 +1,275 @@
+"""
+Request-level instrumentation, exposed in Prometheus text format at /metrics
+
+    with metrics.DB_TIME.time(function="view_vehicles"):
+        ...
+    @metrics.db_timed
+    def get_vehicle_by_id(vehicle_id): ...
+
+Histograms are kept per process (every web worker has its own). Stats that
+other modules already keep, like cache hit rates and pool usage, are read when
+/metrics is scraped, through collectors registered with register_collector().
+
+Sampling profiler (opt-in): with METRICS_PROFILE_SLOW_MS=250, a background
+thread samples the stacks of request threads every METRICS_PROFILE_INTERVAL_MS.
+Requests slower than the threshold have their samples written to
+METRICS_PROFILE_DIR as collapsed stacks (`frame;frame;frame count` per line),
+which flamegraph.pl and speedscope read directly.
+"""
+import bisect
+import functools
+import inspect
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MODEL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+PROFILE_SLOW_MS = float(os.environ.get("METRICS_PROFILE_SLOW_MS", 0))       # 0 disables the profiler
+PROFILE_INTERVAL_MS = float(os.environ.get("METRICS_PROFILE_INTERVAL_MS", 5))
+PROFILE_DIR = os.environ.get("METRICS_PROFILE_DIR", "profiles")
+
+
+# ---------------- HISTOGRAMS ----------------
+_histograms = []
+_collectors = []
+
+class Histogram:
+    """Thread-safe Prometheus histogram with a fixed label set"""
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> per-bucket counts (last one is +Inf), then the sum
+        self._series = {}
+        _histograms.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        """Exposition lines for every label combination seen so far"""
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        lines = []
+        for key, series in sorted(snapshot.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+REQUEST_LATENCY = Histogram("app_request_duration_seconds", "Request latency by route template",
+                            ("route", "method", "status"))
+DB_TIME = Histogram("app_db_duration_seconds", "Time spent in crud database calls", ("function",))
+MODEL_TIME = Histogram("app_model_duration_seconds", "Model time per call, split into encode and predict",
+                       ("stage",), buckets=MODEL_BUCKETS)
+
+def db_timed(func):
+    """Record every call of a (sync or async) crud function in DB_TIME"""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with DB_TIME.time(function=func.__name__):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with DB_TIME.time(function=func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+# ---------------- COLLECTORS ----------------
+# stats() key -> (metric name suffix, type, help)
+CACHE_FIELDS = {
+    "hits": ("hits_total", "counter", "Lookups served from the cache"),
+    "misses": ("misses_total", "counter", "Lookups that went to the loader"),
+    "hit_rate": ("hit_ratio", "gauge", "Hits / lookups since start"),
+    "evictions": ("evictions_total", "counter", "Entries evicted by the size limit"),
+    "expirations": ("expirations_total", "counter", "Entries dropped by their TTL"),
+    "invalidations": ("invalidations_total", "counter", "Entries dropped by writes"),
+    "entries": ("entries", "gauge", "Entries currently cached"),
+    "saved_seconds": ("saved_seconds_total", "counter", "Estimated model time saved by hits"),
+}
+POOL_FIELDS = {
+    "size": ("size", "gauge", "Maximum open connections"),
+    "open": ("open", "gauge", "Open connections"),
+    "in_use": ("in_use", "gauge", "Connections checked out"),
+    "idle": ("idle", "gauge", "Idle connections"),
+    "acquired": ("acquired_total", "counter", "Connections handed out"),
+    "waited": ("waited_total", "counter", "Acquisitions that had to wait"),
+    "wait_time_total": ("wait_seconds_total", "counter", "Time spent waiting for a connection"),
+    "timeouts": ("timeouts_total", "counter", "Acquisitions that timed out"),
+    "created": ("created_total", "counter", "Connections opened"),
+    "recycled": ("recycled_total", "counter", "Connections closed for age"),
+    "health_check_failures": ("health_check_failures_total", "counter", "Idle connections that failed a ping"),
+}
+INFERENCE_FIELDS = {
+    "processes": ("processes", "gauge", "Inference worker processes"),
+    "queue_depth": ("queue_depth", "gauge", "Requests waiting for a batch"),
+    "requests": ("requests_total", "counter", "Predictions served"),
+    "batches": ("batches_total", "counter", "Batches sent to the workers"),
+    "errors": ("errors_total", "counter", "Predictions that failed"),
+    "batch_size_avg": ("batch_size_avg", "gauge", "Average rows per recent batch"),
+    "latency_p50_ms": ("latency_p50_ms", "gauge", "Median recent end-to-end latency"),
+    "latency_p99_ms": ("latency_p99_ms", "gauge", "p99 recent end-to-end latency"),
+}
+
+def register_collector(func):
+    """Register func() -> [(name, type, help, [(labels dict, value), ...])], called on every scrape"""
+    _collectors.append(func)
+    return func
+
+def stats_families(prefix, label, stats_by_name, fields):
+    """Metric families from stats() dicts keyed by `label` value, e.g. {"vehicles": cache.stats()}"""
+    families = []
+    for key, (suffix, kind, help) in fields.items():
+        samples = [({label: name}, stats[key]) for name, stats in stats_by_name.items() if key in stats]
+        if samples:
+            families.append((f"{prefix}_{suffix}", kind, help, samples))
+    return families
+
+
+# ---------------- EXPOSITION ----------------
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+def render():
+    """Every histogram and collector in Prometheus text exposition format"""
+    lines = []
+    for histogram in _histograms:
+        lines.append(f"# HELP {histogram.name} {histogram.help}")
+        lines.append(f"# TYPE {histogram.name} histogram")
+        lines.extend(histogram.samples())
+
+    for collector in _collectors:
+        try:
+            families = collector()
+        except Exception as e:
+            print(f"Error collecting metrics: {e}")
+            continue
+        for name, kind, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
+
+
+# ---------------- SAMPLING PROFILER ----------------
+class SamplingProfiler:
+    """
+    Samples the stacks of threads that are serving requests
+
+    One daemon thread reads sys._current_frames() every interval_ms and counts
+    each registered thread's folded stack. A request's samples are written out
+    only if it took at least slow_ms; otherwise they are dropped.
+    """
+
+    def __init__(self, slow_ms, interval_ms=PROFILE_INTERVAL_MS, output_dir=PROFILE_DIR):
+        self.slow_ms = slow_ms
+        self.interval = interval_ms / 1000
+        self.output_dir = output_dir
+        self.dumps = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start_request(self):
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="metrics-profiler", daemon=True)
+                self._thread.start()
+
+    def end_request(self, label, seconds):
+        """Stop sampling this thread; returns the dump path if the request was slow"""
+        with self._lock:
+            stacks = self._active.pop(threading.get_ident(), None)
+        if not stacks or seconds * 1000 < self.slow_ms:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "request"
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{seconds * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        with self._lock:
+            self.dumps += 1
+        print(f"Slow request {label} ({seconds * 1000:.0f} ms): stacks written to {path}")
+        return path
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != me:
+                        stacks[_fold(frame)] += 1
+
+def _fold(frame):
+    """Root-first `file:function` frames joined by ';'"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+profiler = SamplingProfiler(PROFILE_SLOW_MS) if PROFILE_SLOW_MS > 0 else None
+
+
+# ---------------- REQUEST HOOKS ----------------
+def request_started():
+    """Call when a request starts; returns the start time to pass to request_finished"""
+    if profiler is not None:
+        profiler.start_request()
+    return time.perf_counter()
+
+def request_finished(started, route, method, status):
+    elapsed = time.perf_counter() - started
+    REQUEST_LATENCY.observe(elapsed, route=route, method=method, status=status)
+    if profiler is not None:
+        profiler.end_request(f"{method} {route}", elapsed)
+    return elapsed
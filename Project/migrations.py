@@ -0,0 +1,274 @@
+"""
+Versioned schema migrations for automotive_db
+
+Applied versions are recorded in `schema_migrations`, so running this again
+only applies what is missing:
+
+    python migrations.py           # apply pending migrations
+    python migrations.py --check   # EXPLAIN the hot lookup queries and verify they use indexes
+"""
+import argparse
+import sys
+
+from mysql.connector import Error
+
+import db_pool
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied safely"""
+
+
+# ---------------- HELPERS ----------------
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+def _add_index(cursor, table, index, definition):
+    if not _index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE {table} ADD {definition}")
+
+
+# ---------------- MIGRATIONS ----------------
+def add_mileage_column(cursor):
+    # Older databases were created before vehicles had a mileage column
+    if not _column_exists(cursor, "vehicles", "mileage"):
+        cursor.execute("ALTER TABLE vehicles ADD COLUMN mileage INT DEFAULT 0")
+
+def add_lookup_indexes(cursor):
+    # A unique index cannot be built while duplicate VINs exist
+    cursor.execute("""
+        SELECT vin, COUNT(*) FROM vehicles
+        GROUP BY vin HAVING COUNT(*) > 1 LIMIT 5
+    """)
+    duplicates = cursor.fetchall()
+    if duplicates:
+        listed = ", ".join(f"{vin} (x{count})" for vin, count in duplicates)
+        raise MigrationError(f"Duplicate VINs must be resolved before adding the unique index: {listed}")
+
+    # search_vehicle_by_vin
+    _add_index(cursor, "vehicles", "uq_vehicles_vin", "UNIQUE INDEX uq_vehicles_vin (vin)")
+    # get_customer_vehicles / count_vehicles; InnoDB appends the primary key, so
+    # keyset pages (owner_name = ? AND id > ? ORDER BY id) read it in order
+    _add_index(cursor, "vehicles", "idx_vehicles_owner", "INDEX idx_vehicles_owner (owner_name)")
+    # plate lookups
+    _add_index(cursor, "vehicles", "idx_vehicles_plate", "INDEX idx_vehicles_plate (license_plate)")
+    # verify_customer login lookup
+    _add_index(cursor, "vehicles", "idx_vehicles_owner_password",
+               "INDEX idx_vehicles_owner_password (owner_name, password)")
+
+def create_service_records(cursor):
+    # Service history per vehicle; rows imported from the historical CSV have no vehicle_id
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS service_records (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            vehicle_id INT NULL,
+            company VARCHAR(50),
+            model VARCHAR(100),
+            year INT,
+            vehicle_age INT,
+            mileage INT,
+            service_issues VARCHAR(1000),
+            INDEX idx_service_records_vehicle (vehicle_id),
+            CONSTRAINT fk_service_records_vehicle FOREIGN KEY (vehicle_id)
+                REFERENCES vehicles (id) ON DELETE CASCADE
+        )
+    """)
+    # Bulk import progress, committed together with each imported chunk
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS import_checkpoints (
+            source VARCHAR(255) PRIMARY KEY,
+            rows_done BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+
+def create_vehicle_predictions(cursor):
+    # Issues and priorities written by batch_scoring.py, comma-separated like service_issues
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS vehicle_predictions (
+            vehicle_id INT PRIMARY KEY,
+            predicted_issues VARCHAR(1000) NOT NULL,
+            high_priority VARCHAR(1000) NOT NULL,
+            medium_priority VARCHAR(1000) NOT NULL,
+            low_priority VARCHAR(1000) NOT NULL,
+            scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            CONSTRAINT fk_vehicle_predictions_vehicle FOREIGN KEY (vehicle_id)
+                REFERENCES vehicles (id) ON DELETE CASCADE
+        )
+    """)
+    # Per id-range progress of a scoring run, committed together with each scored chunk
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS scoring_checkpoints (
+            run_id VARCHAR(64) NOT NULL,
+            range_start INT NOT NULL,
+            range_end INT NOT NULL,
+            last_id INT NOT NULL,
+            completed BOOLEAN NOT NULL DEFAULT FALSE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (run_id, range_start)
+        )
+    """)
+
+def add_search_indexes(cursor):
+    # Model prefix search; VIN and plate prefixes use the lookup indexes
+    _add_index(cursor, "vehicles", "idx_vehicles_model", "INDEX idx_vehicles_model (model)")
+    # "Contains" search over VINs and plates; the ngram parser indexes every
+    # 2-character token, so a term is found anywhere inside the value
+    _add_index(cursor, "vehicles", "ft_vehicles_vin_plate",
+               "FULLTEXT INDEX ft_vehicles_vin_plate (vin, license_plate) WITH PARSER ngram")
+
+def _normalized(column):
+    # SQL for crud.normalize_identifier (spaces and dashes; other whitespace is not typed in forms)
+    return f"UPPER(REPLACE(REPLACE({column}, ' ', ''), '-', ''))"
+
+def normalize_vins_and_plates(cursor):
+    # Searches match VINs and plates upper-case without spaces or dashes, the
+    # way writes now store them; rewrite rows stored as typed
+    cursor.execute(f"""
+        SELECT {_normalized("vin")} AS normalized, COUNT(*) FROM vehicles
+        GROUP BY normalized HAVING COUNT(*) > 1 LIMIT 5
+    """)
+    duplicates = cursor.fetchall()
+    if duplicates:
+        listed = ", ".join(f"{vin} (x{count})" for vin, count in duplicates)
+        raise MigrationError(f"VINs that only differ in case, spaces or dashes must be resolved first: {listed}")
+
+    # BINARY, as the columns' default collation ignores case
+    for column in ("vin", "license_plate"):
+        cursor.execute(f"""
+            UPDATE vehicles SET {column} = {_normalized(column)}
+            WHERE BINARY {column} <> BINARY {_normalized(column)}
+        """)
+
+# (version, description, function) - append new migrations, never reorder
+MIGRATIONS = [
+    (1, "Add vehicles.mileage", add_mileage_column),
+    (2, "Add VIN, owner, plate and login indexes on vehicles", add_lookup_indexes),
+    (3, "Create service_records and import_checkpoints", create_service_records),
+    (4, "Create vehicle_predictions and scoring_checkpoints", create_vehicle_predictions),
+    (5, "Add model and VIN/plate full-text search indexes", add_search_indexes),
+    (6, "Store VINs and plates upper-case without spaces or dashes", normalize_vins_and_plates),
+]
+
+
+# ---------------- RUNNER ----------------
+def applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255),
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def migrate(conn):
+    """Apply every pending migration in order; returns the versions applied"""
+    cursor = conn.cursor(buffered=True)
+    try:
+        done = applied_versions(cursor)
+        applied = []
+        for version, description, migration in MIGRATIONS:
+            if version in done:
+                continue
+            print(f"Applying migration {version}: {description}")
+            migration(cursor)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
+            applied.append(version)
+        return applied
+    finally:
+        cursor.close()
+
+
+# ---------------- INDEX CHECK ----------------
+# (description, query, parameters, indexes that may serve it)
+HOT_QUERIES = [
+    ("search_vehicle_by_vin",
+     "SELECT id, vin, license_plate, model, year, owner_name, owner_contact FROM vehicles WHERE vin=%s",
+     ("VIN1000",), {"uq_vehicles_vin"}),
+    ("get_customer_vehicles",
+     "SELECT id, vin, license_plate, model, year, owner_name, owner_contact FROM vehicles "
+     "WHERE owner_name=%s AND id > %s ORDER BY id LIMIT %s",
+     ("Ramesh Garg", 0, 50), {"idx_vehicles_owner", "idx_vehicles_owner_password"}),
+    ("count_vehicles by owner",
+     "SELECT COUNT(*) FROM vehicles WHERE owner_name=%s",
+     ("Ramesh Garg",), {"idx_vehicles_owner", "idx_vehicles_owner_password"}),
+    ("verify_customer",
+     "SELECT * FROM vehicles WHERE owner_name=%s AND password=%s",
+     ("Ramesh Garg", "pass1"), {"idx_vehicles_owner_password"}),
+    ("lookup by license plate",
+     "SELECT id FROM vehicles WHERE license_plate=%s",
+     ("DL01AB1234",), {"idx_vehicles_plate"}),
+    ("search_vehicles by VIN prefix",
+     "SELECT id FROM vehicles WHERE vin LIKE %s ESCAPE '!' ORDER BY vin, id LIMIT %s",
+     ("VIN12%", 51), {"uq_vehicles_vin"}),
+    ("search_vehicles by plate prefix",
+     "SELECT id FROM vehicles WHERE license_plate LIKE %s ESCAPE '!' ORDER BY license_plate, id LIMIT %s",
+     ("DL01AB%", 51), {"idx_vehicles_plate"}),
+    ("search_vehicles by model prefix",
+     "SELECT id FROM vehicles WHERE model LIKE %s ESCAPE '!' ORDER BY model, id LIMIT %s",
+     ("Honda%", 51), {"idx_vehicles_model"}),
+    ("search_vehicles contains",
+     "SELECT id FROM vehicles WHERE MATCH(vin, license_plate) AGAINST (%s IN BOOLEAN MODE) ORDER BY id LIMIT %s",
+     ('"1234"', 51), {"ft_vehicles_vin_plate"}),
+    ("owner index names",
+     "SELECT DISTINCT owner_name FROM vehicles WHERE owner_name IS NOT NULL",
+     (), {"idx_vehicles_owner", "idx_vehicles_owner_password"}),
+]
+
+def check_indexes(conn):
+    """EXPLAIN each hot query; returns a list of (query, problem) for any that scan"""
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    problems = []
+    try:
+        for name, query, params, expected in HOT_QUERIES:
+            cursor.execute("EXPLAIN " + query, params)
+            plan = cursor.fetchall()[0]
+            key = plan.get("key")
+            if plan.get("type") == "ALL" or key not in expected:
+                problems.append((name, f"type={plan.get('type')}, key={key}, expected one of {sorted(expected)}"))
+    finally:
+        cursor.close()
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply schema migrations to automotive_db")
+    parser.add_argument("--check", action="store_true", help="verify hot queries use indexes instead of migrating")
+    args = parser.parse_args()
+
+    try:
+        conn = db_pool.get_pool().get_connection()
+    except Error as e:
+        sys.exit(f"Error connecting to MySQL: {e}")
+
+    try:
+        if args.check:
+            problems = check_indexes(conn)
+            for name, problem in problems:
+                print(f"❌ {name}: {problem}")
+            if problems:
+                sys.exit(1)
+            print(f"✅ All {len(HOT_QUERIES)} hot queries use their indexes")
+        else:
+            applied = migrate(conn)
+            print(f"✅ Applied migrations: {applied}" if applied else "✅ Schema is up to date")
+    finally:
+        conn.close()
+        db_pool.close_pools()
@@ -1,23 +1,262 @@
-import joblib
 import numpy as np
 import os
+import threading
+import time
+from functools import lru_cache
+
+import cache
+import metrics
+import model_bundle
+
+CURRENT_YEAR = 2024
+FEATURE_CACHE_SIZE = 4096
+PREDICTION_CACHE_SIZE = 8192
+MODEL_WAIT_TIMEOUT = 30.0       # seconds a prediction waits for a background load
+
+# Fallback model per company when the exact model is unknown to the encoder
+DEFAULT_MODELS = {
+    'Honda': 'Amaze',
+    'Tata': 'Tiago',
+    'Maruti': 'Swift',
+    'Hyundai': 'i20',
+    'Toyota': 'Innova'
+}
+
+INFERENCE_ENGINES = ('auto', 'flat', 'sklearn')
+# 'auto' sends batches of at least this many rows to sklearn's compiled tree
+# walk; below it the flat engine wins (crossover ~500 rows on one CPU). It
+# keeps a second, unshared copy of the model, so it is for offline jobs only.
+SKLEARN_MIN_BATCH = 512
+
+# Priority levels; the code of a level is its index, so a lower code is more urgent
+PRIORITY_LEVELS = ('high', 'medium', 'low')
+HIGH, MEDIUM, LOW = range(3)
+NOT_PREDICTED = -1
+
+HIGH_PRIORITY_KEYWORDS = [
+    'brake', 'timing belt', 'clutch', 'battery', 'suspension',
+    'transmission', 'exhaust', 'shock absorber'
+]
+
+LOW_PRIORITY_KEYWORDS = [
+    'wiper', 'headlight', 'bulb', 'tire rotation', 'air filter'
+]
+
+# Age/mileage escalation: (issue keyword, min vehicle age, min mileage km, level).
+# Issues containing the keyword are raised to `level` on vehicles at least that
+# old and that far driven, e.g. ('timing belt', 0, 100000, 'high'). None by
+# default, so priorities come from the keyword lists alone.
+ESCALATION_RULES = ()
+
+# When the app loads the model (ML_MODEL_LOADING): 'background' on a thread
+# while requests are served, 'lazy' on the first prediction, 'eager' at startup
+MODEL_LOADING_MODES = ('background', 'lazy', 'eager')
+
+class ForestInferenceEngine:
+    """
+    Vectorized inference over the flattened trees of all label forests
+    
+    Every (tree, row) pair is walked at once: each level is one gather of
+    feature/threshold/children over a (trees x batch) node matrix. Votes are
+    summed tree by tree in the same order as sklearn, so predict() returns
+    exactly what MultiOutputClassifier.predict would.
+    """
+    
+    def __init__(self, forest, max_cells=250_000):
+        self.forest = forest
+        # Upper bound on trees x rows walked at once; keeps the working set cache-sized
+        self.max_cells = max_cells
+        self._roots = np.asarray(forest.roots).reshape(-1, 1).astype(np.intp)
+        self._feature = np.asarray(forest.feature)
+        self._threshold = np.asarray(forest.threshold)
+        self._children = np.asarray(forest.children).reshape(-1)
+        self._value = np.asarray(forest.value)
+        self._classes = np.asarray(forest.classes)
+    
+    @classmethod
+    def from_sklearn(cls, model, **kwargs):
+        """Flatten a fitted MultiOutputClassifier in memory"""
+        arrays, forest_info = model_bundle.flatten_forest(model)
+        return cls(model_bundle.FlatForest(arrays, **forest_info), **kwargs)
+    
+    def predict(self, X):
+        # Trees compare float32 features, exactly like sklearn
+        X = np.asarray(X, dtype=np.float32)
+        predictions = np.empty((X.shape[0], self.forest.n_labels), dtype=np.int64)
+        
+        chunk = max(1, self.max_cells // len(self._roots))
+        for start in range(0, X.shape[0], chunk):
+            predictions[start:start + chunk] = self._predict_chunk(X[start:start + chunk])
+        return predictions
+    
+    def _predict_chunk(self, X):
+        f = self.forest
+        n = X.shape[0]
+        # Column-major features: value of feature k for row r sits at k * n + r
+        X_flat = np.ascontiguousarray(X.T).reshape(-1)
+        rows = np.arange(n, dtype=np.intp)
+        node = np.repeat(self._roots, n, axis=1)
+        
+        for _ in range(f.max_depth):
+            go_left = X_flat[self._feature[node] * n + rows] <= self._threshold[node]
+            next_node = self._children[2 * node + go_left]
+            # Leaves point to themselves, so an unchanged matrix means every walk is done
+            if np.array_equal(next_node, node):
+                break
+            node = next_node
+        
+        # (labels, trees, rows, classes) leaf probabilities, summed in tree order
+        leaf_proba = self._value[node].reshape(f.n_labels, f.n_trees, n, 2)
+        proba = leaf_proba[:, 0].copy()
+        for tree in range(1, f.n_trees):
+            proba += leaf_proba[:, tree]
+        
+        winner = np.argmax(proba, axis=2)
+        return np.take_along_axis(self._classes, winner, axis=1).T
+
 
 class ServiceRecommendationSystem:
     """ML-based service recommendation system for vehicles"""
     
-    def __init__(self):
+    def __init__(self, mileage_bucket_km=1, inference_engine='flat', prediction_cache_size=PREDICTION_CACHE_SIZE,
+                 escalation_rules=ESCALATION_RULES):
+        if inference_engine not in INFERENCE_ENGINES:
+            raise ValueError(f"inference_engine must be one of {INFERENCE_ENGINES}")
+        
+        # 'flat' walks the flattened trees with ForestInferenceEngine,
+        # 'sklearn' calls MultiOutputClassifier.predict from the pickled model,
+        # 'auto' uses flat and loads sklearn's model for the first large batch
+        self.inference_engine = inference_engine
         self.model = None
+        self._sklearn_model = None     # 'auto' only; False if it could not be loaded
+        self._sklearn_lock = threading.Lock()
         self.mlb = None
         self.company_encoder = None
         self.model_encoder = None
         self.feature_info = None
         self.is_loaded = False
         
+        # Load state for /readyz; load_in_background() runs load_model() on _loader
+        self._load_lock = threading.RLock()
+        self._loader = None
+        self.load_error = None
+        self.load_seconds = None
+        
+        # Mileage is rounded down to this many km before encoding; 1 keeps it exact,
+        # larger buckets trade precision for a higher feature-cache hit rate
+        self.mileage_bucket_km = mileage_bucket_km
+        self._company_codes = {}
+        self._model_codes = {}
+        self._model_table = {}
+        self._cached_feature_row = None
+        
+        # Label -> priority tables, rebuilt from mlb.classes_ on every load
+        self.escalation_rules = tuple(escalation_rules)
+        self._build_priority_tables(())
+        
+        # Predicted issues keyed on the encoded feature tuple; cleared on every
+        # model load, so a new artifact never serves the old model's answers
+        self.prediction_cache = cache.ReadThroughCache("predictions", ttl=None, max_entries=prediction_cache_size)
+        self._stats_lock = threading.Lock()
+        self._predict_seconds = 0.0   # model time spent on cache misses
+        self._predicted_rows = 0
+        
     def load_model(self):
-        """Load the trained model and encoders"""
+        """Load the trained model and encoders (bundle file first, then the pickles); blocks until done"""
+        with self._load_lock:
+            start = time.perf_counter()
+            self.load_error = None
+            loaded = self._load()
+            self.load_seconds = time.perf_counter() - start
+            if not loaded:
+                self.load_error = self.load_error or "model could not be loaded"
+            return loaded
+    
+    def load_in_background(self):
+        """Start load_model() on a daemon thread and return at once (see load_status)"""
+        with self._load_lock:
+            if not self.is_loaded and not self._is_loading():
+                self._loader = threading.Thread(target=self.load_model, name="model-loader", daemon=True)
+                self._loader.start()
+            return self._loader
+    
+    def ensure_loaded(self, timeout=MODEL_WAIT_TIMEOUT):
+        """
+        True once the model is loaded
+        
+        Waits up to `timeout` for a background load in progress; with none
+        started (lazy loading), loads on the calling thread.
+        """
+        if self.is_loaded:
+            return True
+        loader = self._loader
+        if loader is not None and loader.is_alive():
+            loader.join(timeout)
+            return self.is_loaded
+        with self._load_lock:
+            return self.is_loaded or self.load_model()
+    
+    def start_loading(self, mode='background'):
+        """Begin loading the model as the app starts, per MODEL_LOADING_MODES"""
+        if mode not in MODEL_LOADING_MODES:
+            raise ValueError(f"model loading mode must be one of {MODEL_LOADING_MODES}")
+        if mode == 'eager':
+            print("Loading ML model...")
+            self.load_model()
+        elif mode == 'background':
+            self.load_in_background()
+    
+    def is_ready(self, mode='background'):
+        """Whether predictions can be served now; lazy mode is ready until a load fails"""
+        if mode == 'lazy':
+            return self.is_loaded or self.load_error is None
+        return self.is_loaded
+    
+    def _is_loading(self):
+        return self._loader is not None and self._loader.is_alive()
+    
+    def load_status(self):
+        """Readiness details: loaded, loading, last error and how long the load took"""
+        return {
+            'loaded': self.is_loaded,
+            'loading': self._is_loading(),
+            'error': self.load_error,
+            'load_seconds': self.load_seconds,
+            'inference_engine': self.inference_engine
+        }
+    
+    def _load(self):
+        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+        
+        self._sklearn_model = None
+        bundle_path = os.path.join(BASE_DIR, model_bundle.BUNDLE_FILENAME)
+        if self.inference_engine != 'sklearn' and os.path.exists(bundle_path):
+            try:
+                # Memory-mapped read-only, so forked workers share the tree pages
+                bundle = model_bundle.load_bundle(bundle_path, mmap=True)
+                self.model = ForestInferenceEngine(bundle.forest)
+                self.mlb = bundle.mlb
+                self.company_encoder = bundle.company_encoder
+                self.model_encoder = bundle.model_encoder
+                self.feature_info = bundle.feature_info
+                
+                self._build_lookup_tables()
+                
+                self.is_loaded = True
+                print(f"✅ ML model loaded successfully (bundle v{bundle.version})")
+                return True
+            except Exception as e:
+                print(f"Warning: could not load {bundle_path} ({e}); falling back to .pkl files")
+        
+        return self._load_pickles(BASE_DIR)
+    
+    def _load_pickles(self, base_dir):
+        """Load the model and encoders from the five joblib pickles"""
+        # joblib (and sklearn, when the model unpickles) only load on this fallback path
+        import joblib
+        
+        BASE_DIR = base_dir
         try:
-            BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
             model_path = os.path.join(BASE_DIR, 'service_recommendation_model.pkl')
             mlb_path = os.path.join(BASE_DIR, 'mlb_encoder.pkl')
             company_path = os.path.join(BASE_DIR, 'company_encoder.pkl')
@@ -29,6 +268,7 @@ class ServiceRecommendationSystem:
             for file in required_files:
                 if not os.path.exists(file):
                     print(f"Warning: {file} not found. Please train the model first.")
+                    self.load_error = f"{os.path.basename(file)} not found"
                     return False
             
             # Load all components
@@ -38,12 +278,20 @@ class ServiceRecommendationSystem:
             self.model_encoder = joblib.load(model_enc_path)
             self.feature_info = joblib.load(feature_path)
             
+            if self.inference_engine != 'sklearn':
+                if self.inference_engine == 'auto':
+                    self._sklearn_model = self.model
+                self.model = ForestInferenceEngine.from_sklearn(self.model)
+            
+            self._build_lookup_tables()
+            
             self.is_loaded = True
             print("✅ ML model loaded successfully")
             return True
             
         except Exception as e:
             print(f"Error loading model: {e}")
+            self.load_error = str(e)
             return False
     
     def extract_company_from_model(self, model_name):
@@ -78,6 +326,96 @@ class ServiceRecommendationSystem:
         # Default to Honda if not found
         return 'Honda'
     
+    # ---------------- FEATURE ENCODING ----------------
+    def _build_lookup_tables(self):
+        """
+        Precompute plain dict lookups from the fitted encoders
+        
+        LabelEncoder codes are positions in the sorted classes_, so they can be
+        read off once here instead of calling transform() on every request.
+        """
+        self._company_codes = {name: code for code, name in enumerate(self.company_encoder.classes_)}
+        self._model_codes = {name: code for code, name in enumerate(self.model_encoder.classes_)}
+        
+        # Model string -> (company code, model code), fallback rules applied once
+        self._model_table = {}
+        for model in self.model_encoder.classes_:
+            for key in [model] + [f"{company} {model}" for company in self.company_encoder.classes_]:
+                self._model_table[key] = self._resolve_model_codes(key)
+        
+        self._build_priority_tables(self.mlb.classes_)
+        
+        # Fresh caches per load so stale encodings and predictions never outlive the model
+        self._cached_feature_row = lru_cache(maxsize=FEATURE_CACHE_SIZE)(self._build_feature_row)
+        self.prediction_cache.clear()
+    
+    def _resolve_model_codes(self, model_name):
+        """Apply the company/model fallback rules and return (company code, model code)"""
+        # Extract company from model name
+        company = self.extract_company_from_model(model_name)
+        if company not in self._company_codes:
+            # Use most common company as fallback
+            company = 'Honda'
+        
+        # Encode model - simplified approach
+        # Try to find exact match first
+        model_simple = model_name.split()[-1] if ' ' in model_name else model_name
+        
+        if model_simple in self._model_codes:
+            model_code = self._model_codes[model_simple]
+        else:
+            # Use a default model for the company, else the first model
+            default_model = DEFAULT_MODELS.get(company, 'Amaze')
+            model_code = self._model_codes.get(default_model, 0)
+        
+        return self._company_codes[company], model_code
+    
+    def _model_lookup(self, model_key):
+        codes = self._model_table.get(model_key)
+        if codes is None:
+            codes = self._resolve_model_codes(model_key)
+        return codes
+    
+    @staticmethod
+    def _normalize_model_name(model_name):
+        return " ".join(str(model_name).split())
+    
+    def _build_feature_row(self, model_key, year, mileage):
+        company_code, model_code = self._model_lookup(model_key)
+        return (company_code, model_code, year, CURRENT_YEAR - year, mileage)
+    
+    def _feature_row(self, model_name, year, mileage):
+        """Encoded feature tuple for one vehicle, memoized on (model, year, mileage bucket)"""
+        mileage = int(mileage)
+        if self.mileage_bucket_km > 1:
+            mileage -= mileage % self.mileage_bucket_km
+        return self._cached_feature_row(self._normalize_model_name(model_name), int(year), mileage)
+    
+    def _encode_features(self, model_names, years, mileages):
+        """
+        Build the (n, 5) feature matrix for a batch of vehicles
+        
+        Each distinct model string is looked up once; years and mileages are
+        encoded as whole arrays.
+        """
+        unique_models, inverse = np.unique(
+            [self._normalize_model_name(m) for m in model_names], return_inverse=True
+        )
+        codes = np.array([self._model_lookup(m) for m in unique_models], dtype=int).reshape(-1, 2)[inverse]
+        
+        years = np.asarray(years).astype(int)
+        mileages = np.asarray(mileages).astype(int)
+        if self.mileage_bucket_km > 1:
+            mileages = mileages - mileages % self.mileage_bucket_km
+        
+        return np.column_stack([
+            codes[:, 0],
+            codes[:, 1],
+            years,
+            CURRENT_YEAR - years,
+            mileages
+        ])
+    
     def predict_service_issues(self, model_name, year, mileage):
         """
         Predict service issues for a vehicle
@@ -90,105 +428,221 @@ class ServiceRecommendationSystem:
         Returns:
         - List of predicted service issues
         """
-        if not self.is_loaded:
-            if not self.load_model():
-                return []
+        if not self.ensure_loaded():
+            return []
         
         try:
-            # Extract company from model name
-            company = self.extract_company_from_model(model_name)
-            
-            # Calculate vehicle age
-            current_year = 2024
-            vehicle_age = current_year - int(year)
-            
-            # Encode company
-            if company in self.company_encoder.classes_:
-                company_encoded = self.company_encoder.transform([company])[0]
-            else:
-                # Use most common company as fallback
-                company_encoded = self.company_encoder.transform(['Honda'])[0]
-            
-            # Encode model - simplified approach
-            # Try to find exact match first
-            model_simple = model_name.split()[-1] if ' ' in model_name else model_name
-            
-            if model_simple in self.model_encoder.classes_:
-                model_encoded = self.model_encoder.transform([model_simple])[0]
-            else:
-                # Use a default model for the company
-                default_models = {
-                    'Honda': 'Amaze',
-                    'Tata': 'Tiago',
-                    'Maruti': 'Swift',
-                    'Hyundai': 'i20',
-                    'Toyota': 'Innova'
-                }
-                default_model = default_models.get(company, 'Amaze')
-                if default_model in self.model_encoder.classes_:
-                    model_encoded = self.model_encoder.transform([default_model])[0]
-                else:
-                    model_encoded = 0  # Fallback to first model
-            
             # Create feature vector
-            features = np.array([[
-                company_encoded,
-                model_encoded,
-                int(year),
-                vehicle_age,
-                int(mileage)
-            ]])
+            with metrics.MODEL_TIME.time(stage="encode"):
+                row = self._feature_row(model_name, year, mileage)
             
-            # Predict
-            prediction = self.model.predict(features)
-            
-            # Convert binary predictions to issue names
-            predicted_issues = self.mlb.inverse_transform(prediction)[0]
+            # Identical vehicles encode to the same tuple, so reuse their prediction
+            predicted_issues = self.prediction_cache.get(row)
+            if predicted_issues is None:
+                predicted_issues = self._predict_rows([row])[0]
             
             # Return as list
-            return list(predicted_issues) if predicted_issues else []
+            return list(predicted_issues)
             
         except Exception as e:
             print(f"Error during prediction: {e}")
             return []
     
-    def get_issue_priorities(self, issues, vehicle_age, mileage):
+    def predict_service_issues_batch(self, vehicles):
         """
-        Categorize issues by priority
+        Predict service issues for many vehicles in one pass
         
-        Returns dict with 'high', 'medium', 'low' priority issues
+        Parameters:
+        - vehicles: List of dicts with 'model', 'year' and 'mileage' keys
+        
+        Returns:
+        - List of predicted issue lists, in the same order as `vehicles`
         """
-        high_priority = []
-        medium_priority = []
-        low_priority = []
+        if not vehicles:
+            return []
         
-        high_priority_keywords = [
-            'brake', 'timing belt', 'clutch', 'battery', 'suspension',
-            'transmission', 'exhaust', 'shock absorber'
-        ]
+        if not self.ensure_loaded():
+            return [[] for _ in vehicles]
         
-        low_priority_keywords = [
-            'wiper', 'headlight', 'bulb', 'tire rotation', 'air filter'
-        ]
+        with metrics.MODEL_TIME.time(stage="encode"):
+            features = self._encode_features(
+                [v.get('model', '') for v in vehicles],
+                [v.get('year', 2020) for v in vehicles],
+                [v.get('mileage', 0) for v in vehicles]
+            )
         
-        for issue in issues:
-            issue_lower = issue.lower()
-            
-            # Check for high priority
-            if any(keyword in issue_lower for keyword in high_priority_keywords):
-                high_priority.append(issue)
-            # Check for low priority
-            elif any(keyword in issue_lower for keyword in low_priority_keywords):
-                low_priority.append(issue)
-            # Everything else is medium
-            else:
-                medium_priority.append(issue)
+        rows = [tuple(row) for row in features.tolist()]
+        
+        # Look up each distinct vehicle once, then one predict call for the misses
+        issues_by_row = {row: self.prediction_cache.get(row) for row in dict.fromkeys(rows)}
+        missing = [row for row, issues in issues_by_row.items() if issues is None]
+        if missing:
+            issues_by_row.update(zip(missing, self._predict_rows(missing)))
+        
+        return [list(issues_by_row[row]) for row in rows]
+    
+    def predict_label_matrix(self, model_names, years, mileages):
+        """
+        0/1 predictions (vehicles x self.mlb.classes_) for whole arrays of vehicles
+        
+        The offline path used by batch_scoring.py: one encode and one predict
+        call per chunk, without per-vehicle dicts or the prediction cache.
+        """
+        with metrics.MODEL_TIME.time(stage="encode"):
+            features = self._encode_features(model_names, years, mileages)
+        with metrics.MODEL_TIME.time(stage="predict"):
+            return np.asarray(self._model_for(len(features)).predict(features))
+    
+    def _model_for(self, n_rows):
+        """The model to run a batch of n_rows on; both give identical predictions"""
+        if self.inference_engine != 'auto' or n_rows < SKLEARN_MIN_BATCH:
+            return self.model
+        # Not _load_lock: unpickling must not hold up loads or small batches
+        with self._sklearn_lock:
+            if self._sklearn_model is None:
+                self._sklearn_model = self._load_sklearn_model()
+        return self.model if self._sklearn_model is False else self._sklearn_model
+    
+    def _load_sklearn_model(self):
+        # Only large batches pay for importing joblib/sklearn and unpickling the forests
+        import joblib
+        
+        model_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'service_recommendation_model.pkl')
+        try:
+            start = time.perf_counter()
+            model = joblib.load(model_path)
+            print(f"✅ sklearn model loaded for large batches ({time.perf_counter() - start:.1f}s)")
+            return model
+        except Exception as e:
+            print(f"Warning: could not load {model_path} ({e}); large batches use the flat engine")
+            return False
+    
+    def _predict_rows(self, rows):
+        """Run the model on encoded rows and cache each row's issue tuple"""
+        start = time.perf_counter()
+        predictions = self._model_for(len(rows)).predict(np.array(rows))
+        issues = [tuple(row_issues) for row_issues in self.mlb.inverse_transform(predictions)]
+        elapsed = time.perf_counter() - start
+        metrics.MODEL_TIME.observe(elapsed, stage="predict")
+        
+        for row, row_issues in zip(rows, issues):
+            self.prediction_cache.set(row, row_issues)
+        with self._stats_lock:
+            self._predict_seconds += elapsed
+            self._predicted_rows += len(rows)
+        return issues
+    
+    def prediction_cache_stats(self):
+        """
+        Prediction cache counters plus an estimate of model time saved
+        
+        Saved time is hits x the average model time per predicted row.
+        """
+        stats = self.prediction_cache.stats()
+        with self._stats_lock:
+            per_row = self._predict_seconds / self._predicted_rows if self._predicted_rows else 0.0
+        stats['entries'] = len(self.prediction_cache.backend)
+        stats['avg_predict_ms'] = per_row * 1000
+        stats['saved_seconds'] = stats['hits'] * per_row
+        return stats
+    
+    # ---------------- PRIORITIES ----------------
+    def _build_priority_tables(self, classes):
+        """
+        Precompute each label's priority and the escalation rule table
+        
+        Labels are fixed by mlb.classes_, so the keyword scan runs once per
+        label here instead of once per issue on every request.
+        """
+        classes = [str(label) for label in classes]
+        self._label_index = {label: index for index, label in enumerate(classes)}
+        self._label_priority = np.array([_keyword_priority(label) for label in classes], dtype=np.int8)
+        
+        # One row per rule: which labels it covers, its thresholds and the level it raises them to
+        rules = list(self.escalation_rules)
+        self._rule_labels = np.array(
+            [[keyword.lower() in label.lower() for label in classes] for keyword, *_ in rules], dtype=bool
+        ).reshape(len(rules), len(classes))
+        self._rule_min_age = np.array([rule[1] for rule in rules], dtype=float)
+        self._rule_min_mileage = np.array([rule[2] for rule in rules], dtype=float)
+        self._rule_priority = np.array([PRIORITY_LEVELS.index(rule[3]) for rule in rules], dtype=np.int8)
+        
+        self._cached_buckets = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(self._bucket_issues)
+    
+    def label_priorities(self, vehicle_ages, mileages):
+        """
+        (vehicles, labels) priority codes (indexes into PRIORITY_LEVELS)
+        
+        Each label starts at its keyword priority; every escalation rule the
+        vehicle meets raises its labels to the rule's level, never lowers them.
+        """
+        ages = np.asarray(vehicle_ages, dtype=float).reshape(-1, 1)
+        mileages = np.asarray(mileages, dtype=float).reshape(-1, 1)
+        priorities = np.broadcast_to(self._label_priority, (len(ages), len(self._label_priority)))
+        if not len(self._rule_priority):
+            return priorities
+        
+        active = (ages >= self._rule_min_age) & (mileages >= self._rule_min_mileage)
+        levels = np.where(active[:, :, None] & self._rule_labels, self._rule_priority[:, None], LOW)
+        return np.minimum(priorities, levels.min(axis=1))
+    
+    def prioritize_label_matrix(self, labels, vehicle_ages, mileages):
+        """
+        Priority code of every predicted label, NOT_PREDICTED (-1) elsewhere
+        
+        Maps predict_label_matrix output straight to priority buckets, so batch
+        callers never build issue strings per vehicle.
+        """
+        priorities = self.label_priorities(vehicle_ages, mileages)
+        return np.where(np.asarray(labels).astype(bool), priorities, NOT_PREDICTED).astype(np.int8)
+    
+    def get_issue_priorities(self, issues, vehicle_age, mileage):
+        """
+        Categorize issues by priority
+        
+        Returns dict with 'high', 'medium', 'low' priority issues
+        """
+        # Which escalation rules this vehicle meets; memoized with the issues since predictions repeat
+        active = ()
+        if self.escalation_rules:
+            active = tuple(vehicle_age >= min_age and mileage >= min_mileage
+                           for _, min_age, min_mileage, _ in self.escalation_rules)
+        high_priority, medium_priority, low_priority = self._cached_buckets(tuple(issues), active)
         
         return {
-            'high': high_priority,
-            'medium': medium_priority,
-            'low': low_priority
+            'high': list(high_priority),
+            'medium': list(medium_priority),
+            'low': list(low_priority)
         }
+    
+    def _bucket_issues(self, issues, active):
+        """Split an issue tuple into (high, medium, low) tuples under the given active rules"""
+        levels = self._label_priority
+        for rule, rule_active in enumerate(active):
+            if rule_active:
+                levels = np.minimum(levels, np.where(self._rule_labels[rule], self._rule_priority[rule], LOW))
+        
+        buckets = tuple([] for _ in PRIORITY_LEVELS)
+        for issue in issues:
+            index = self._label_index.get(issue)
+            # Issues outside the label set (or before a model load) keep their keyword priority
+            level = levels[index] if index is not None else _keyword_priority(issue)
+            buckets[level].append(issue)
+        return tuple(tuple(bucket) for bucket in buckets)
+
+@lru_cache(maxsize=None)
+def _keyword_priority(issue):
+    """Priority code of one issue name from the keyword lists"""
+    issue_lower = issue.lower()
+    
+    # Check for high priority
+    if any(keyword in issue_lower for keyword in HIGH_PRIORITY_KEYWORDS):
+        return HIGH
+    # Check for low priority
+    if any(keyword in issue_lower for keyword in LOW_PRIORITY_KEYWORDS):
+        return LOW
+    # Everything else is medium
+    return MEDIUM
 
 # Create global instance
-ml_system = ServiceRecommendationSystem()
+ml_system = ServiceRecommendationSystem(inference_engine=os.environ.get('ML_INFERENCE_ENGINE', 'flat'))
@@ -0,0 +1,230 @@
+"""
+Single-file, memory-mappable model artifact
+
+Layout of `service_model.bundle`:
+
+    MAGIC | uint32 version | uint64 header length | JSON header | padding | arrays
+
+The JSON header holds the encoder classes, `feature_info` and the dtype/shape/
+offset of every array. The arrays are the flattened trees of every label forest:
+
+    feature, threshold   - split feature index and float32 threshold per node
+    children             - global [right, left] child indices per node, so the
+                           next node is children[node, x <= threshold]
+                           (leaves point to themselves)
+    value                - per-node class probabilities, shape (n_nodes, 2)
+    roots                - root node index per tree, shape (n_labels, n_trees)
+    classes              - class labels per label forest, shape (n_labels, 2)
+
+Opening the bundle with mmap=True maps the file read-only, so forked web
+workers share the same physical pages instead of each holding a copy.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+BUNDLE_FILENAME = 'service_model.bundle'
+BUNDLE_VERSION = 2
+MAGIC = b'SVCMODEL'
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<IQ')
+
+
+class BundleError(Exception):
+    """Raised when a bundle file is missing, corrupt or of an unsupported version"""
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# ---------------- FLATTENING ----------------
+def flatten_forest(model):
+    """
+    Flatten a fitted MultiOutputClassifier(RandomForestClassifier) into
+    contiguous node arrays shared by all trees of all labels
+    """
+    forests = model.estimators_
+    n_labels = len(forests)
+    n_trees = len(forests[0].estimators_)
+
+    trees = [tree.tree_ for forest in forests for tree in forest.estimators_]
+    sizes = np.array([t.node_count for t in trees])
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    n_nodes = int(sizes.sum())
+
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    threshold = np.zeros(n_nodes, dtype=np.float64)
+    children = np.zeros((n_nodes, 2), dtype=np.int64)
+    value = np.zeros((n_nodes, 2), dtype=np.float64)
+
+    for tree, start in zip(trees, starts):
+        end = start + tree.node_count
+        nodes = np.arange(start, end, dtype=np.int32)
+        is_leaf = tree.children_left < 0
+
+        feature[start:end] = np.where(is_leaf, 0, tree.feature)
+        threshold[start:end] = np.where(is_leaf, 0.0, tree.threshold)
+        children[start:end, 0] = np.where(is_leaf, nodes, tree.children_right + start)
+        children[start:end, 1] = np.where(is_leaf, nodes, tree.children_left + start)
+
+        # Same normalisation as DecisionTreeClassifier.predict_proba
+        counts = tree.value[:, 0, :]
+        normalizer = counts.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        value[start:end, :counts.shape[1]] = counts / normalizer
+
+    # sklearn compares float32 features against float64 thresholds. Rounding each
+    # threshold down to the nearest float32 gives the same answer for every
+    # float32 input, at half the size
+    threshold32 = threshold.astype(np.float32)
+    rounded_up = threshold32.astype(np.float64) > threshold
+    threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+
+    classes = np.zeros((n_labels, 2), dtype=np.int64)
+    for i, forest in enumerate(forests):
+        forest_classes = np.asarray(forest.classes_, dtype=np.int64)
+        # A label seen with a single class always predicts that class
+        classes[i] = np.resize(forest_classes, 2)
+
+    return {
+        'feature': feature,
+        'threshold': threshold32,
+        'children': children,
+        'value': value,
+        'roots': starts.astype(np.int32).reshape(n_labels, n_trees),
+        'classes': classes,
+    }, {
+        'n_labels': n_labels,
+        'n_trees': n_trees,
+        'n_features': int(forests[0].n_features_in_),
+        'max_depth': int(max(t.max_depth for t in trees)),
+    }
+
+
+class FlatForest:
+    """Flattened node arrays of every label forest (walked by ml_predictor.ForestInferenceEngine)"""
+
+    def __init__(self, arrays, n_labels, n_trees, n_features, max_depth):
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.children = arrays['children']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.classes = arrays['classes']
+        self.n_labels = n_labels
+        self.n_trees = n_trees
+        self.n_features = n_features
+        self.max_depth = max_depth
+
+
+# ---------------- READ / WRITE ----------------
+def export_bundle(path, model, mlb, company_encoder, model_encoder, feature_info):
+    """Write model, encoders and feature_info to a single versioned bundle file"""
+    arrays, forest_info = flatten_forest(model)
+
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += array.nbytes
+
+    header = json.dumps({
+        'version': BUNDLE_VERSION,
+        'forest': forest_info,
+        'service_issues': [str(c) for c in mlb.classes_],
+        'companies': [str(c) for c in company_encoder.classes_],
+        'models': [str(c) for c in model_encoder.classes_],
+        'feature_info': feature_info,
+        'arrays': specs,
+    }).encode('utf-8')
+
+    data_start = _align(len(MAGIC) + _PREAMBLE.size + len(header))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(_PREAMBLE.pack(BUNDLE_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b'\0' * (data_start + specs[name]['offset'] - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+class LabelEncoding:
+    """Fitted stand-in for sklearn's LabelEncoder, so loading a bundle never imports sklearn"""
+
+    def __init__(self, classes):
+        self.classes_ = np.array(classes, dtype=object)
+        self._codes = {name: code for code, name in enumerate(classes)}
+
+    def transform(self, values):
+        try:
+            return np.array([self._codes[v] for v in values], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"y contains previously unseen labels: {e}") from None
+
+    def inverse_transform(self, codes):
+        return self.classes_[np.asarray(codes, dtype=np.int64)]
+
+
+class MultiLabelEncoding:
+    """Fitted stand-in for sklearn's MultiLabelBinarizer (classes_ and inverse_transform)"""
+
+    def __init__(self, classes):
+        self.classes_ = np.array(classes, dtype=object)
+
+    def inverse_transform(self, yt):
+        yt = np.asarray(yt)
+        return [tuple(self.classes_[row.astype(bool)]) for row in yt]
+
+
+class ModelBundle:
+    """Everything ServiceRecommendationSystem needs, loaded from one bundle file"""
+
+    def __init__(self, header, arrays):
+        self.version = header['version']
+        self.feature_info = header['feature_info']
+        self.forest = FlatForest(arrays, **header['forest'])
+        self.mlb = MultiLabelEncoding(header['service_issues'])
+        self.company_encoder = LabelEncoding(header['companies'])
+        self.model_encoder = LabelEncoding(header['models'])
+
+
+def load_bundle(path, mmap=True):
+    """
+    Open a bundle file. With mmap=True the tree arrays are read-only views of a
+    shared file mapping; otherwise the file is read into private memory.
+    """
+    if not os.path.exists(path):
+        raise BundleError(f"{path} not found")
+
+    if mmap:
+        buf = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        buf = np.fromfile(path, dtype=np.uint8)
+
+    preamble_end = len(MAGIC) + _PREAMBLE.size
+    if buf.shape[0] < preamble_end or bytes(buf[:len(MAGIC)]) != MAGIC:
+        raise BundleError(f"{path} is not a model bundle")
+    version, header_len = _PREAMBLE.unpack(bytes(buf[len(MAGIC):preamble_end]))
+    if version != BUNDLE_VERSION:
+        raise BundleError(f"{path} has bundle version {version}, expected {BUNDLE_VERSION}")
+
+    header = json.loads(bytes(buf[preamble_end:preamble_end + header_len]).decode('utf-8'))
+    data_start = _align(preamble_end + header_len)
+
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = data_start + spec['offset']
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = buf[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+
+    return ModelBundle(header, arrays)
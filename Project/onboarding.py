@@ -0,0 +1,296 @@
+"""
+Bulk vehicle onboarding from CSV or JSON uploads
+
+    python onboarding.py vehicles.csv                  # header: vin,plate,model,year,owner,contact,password,mileage
+    python onboarding.py vehicles.json --engine flat
+    python onboarding.py vehicles.csv --no-score       # leave scoring to the nightly batch_scoring.py run
+
+Served to employees at POST /vehicles/bulk. CSV rows are validated as they
+are read, so an upload is never held in memory as a whole. Valid rows are
+inserted in multi-row batches, one transaction per chunk. Each chunk's
+vehicles are scored in one vectorized predict call, and their issues and
+priorities are written to `vehicle_predictions` in the same transaction. A
+row that fails validation or whose VIN already exists is reported by its row
+number, and the rest of the upload carries on.
+
+Scoring takes most of an upload's time, so the command line uses
+sklearn's compiled tree walk like batch_scoring.py. The web route scores
+with the app's own model unless ?score=0 defers it to the nightly run.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+from datetime import datetime
+
+from mysql.connector import Error, IntegrityError
+
+import crud
+import db_pool
+import metrics
+from batch_scoring import load_system, score_chunk
+from ml_predictor import INFERENCE_ENGINES, ml_system
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000  # per-row errors listed in a report; the rest are only counted
+MIN_YEAR = 1900
+
+# Same names as the /add form; mileage may be left out
+UPLOAD_FIELDS = ['vin', 'plate', 'model', 'year', 'owner', 'contact', 'password', 'mileage']
+REQUIRED_FIELDS = UPLOAD_FIELDS[:-1]
+# vehicles column names are accepted too, e.g. for a CSV exported from the table
+FIELD_ALIASES = {'license_plate': 'plate', 'owner_name': 'owner', 'owner_contact': 'contact'}
+MAX_LENGTHS = {'vin': 100, 'plate': 50, 'model': 100, 'owner': 100, 'contact': 100, 'password': 100}
+
+INSERT_SQL = """
+    INSERT INTO vehicles (vin, license_plate, model, year, owner_name, owner_contact, password, mileage)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# New vehicles have no predictions yet, so a plain INSERT batches like the vehicles one
+PREDICTIONS_SQL = """
+    INSERT INTO vehicle_predictions (vehicle_id, predicted_issues, high_priority, medium_priority, low_priority)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+# ---------------- READING ----------------
+def _field_name(name):
+    name = (name or '').strip().lower()
+    return FIELD_ALIASES.get(name, name)
+
+def read_csv(stream):
+    """(row number, fields) for each data row of a binary CSV stream with a header row"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    if not reader.fieldnames:
+        raise ValueError("the CSV has no header row")
+    reader.fieldnames = [_field_name(name) for name in reader.fieldnames]
+    missing = [name for name in REQUIRED_FIELDS if name not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"the CSV header is missing {', '.join(missing)}")
+    for row, fields in enumerate(reader, start=1):
+        yield row, fields
+
+def read_json(stream):
+    """(row number, fields) for each object of a JSON list, or of {"vehicles": [...]}"""
+    data = json.load(stream)
+    if isinstance(data, dict):
+        data = data.get('vehicles')
+    if not isinstance(data, list):
+        raise ValueError('expected a JSON list of vehicles or {"vehicles": [...]}')
+    for row, fields in enumerate(data, start=1):
+        if isinstance(fields, dict):
+            fields = {_field_name(name): value for name, value in fields.items()}
+        yield row, fields
+
+
+# ---------------- VALIDATION ----------------
+def _integer(values, name, low, high=None):
+    try:
+        value = int(values[name])
+    except ValueError:
+        raise ValueError(f"{name} must be a whole number") from None
+    if value < low or (high is not None and value > high):
+        raise ValueError(f"{name} must be between {low} and {high}" if high is not None
+                         else f"{name} must be at least {low}")
+    return value
+
+def parse_row(fields):
+    """
+    INSERT_SQL parameters for one uploaded vehicle
+
+    Raises ValueError with a message for the upload report if the row is invalid.
+    """
+    if not isinstance(fields, dict):
+        raise ValueError("expected an object with " + ", ".join(UPLOAD_FIELDS))
+    values = {name: str(fields.get(name) if fields.get(name) is not None else '').strip() for name in UPLOAD_FIELDS}
+
+    missing = [name for name in REQUIRED_FIELDS if not values[name]]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    for name, limit in MAX_LENGTHS.items():
+        if len(values[name]) > limit:
+            raise ValueError(f"{name} is longer than {limit} characters")
+
+    year = _integer(values, 'year', MIN_YEAR, datetime.now().year + 1)
+    mileage = _integer(values, 'mileage', 0) if values['mileage'] else 0
+    # Stored like crud.add_vehicle stores them, so searches find them
+    vin, plate = crud.normalize_identifier(values['vin']), crud.normalize_identifier(values['plate'])
+    if not vin or not plate:
+        raise ValueError("vin and plate need a letter or digit")
+    return (vin, plate, values['model'], year,
+            values['owner'], values['contact'], values['password'], mileage)
+
+
+# ---------------- INSERT ----------------
+def _vin_filter(records):
+    return f"vin IN ({', '.join(['%s'] * len(records))})", [record[0] for _, record in records]
+
+def _skip_existing(cursor, chunk, fail):
+    """The chunk's (row, record) pairs whose VIN is not in the table yet"""
+    where, vins = _vin_filter(chunk)
+    cursor.execute(f"SELECT vin FROM vehicles WHERE {where}", vins)
+    # VINs compare case-insensitively, like the unique index
+    existing = {vin.upper() for vin, in cursor.fetchall()}
+    new = []
+    for row, record in chunk:
+        if record[0].upper() in existing:
+            fail(row, record[0], "a vehicle with this VIN already exists")
+        else:
+            new.append((row, record))
+    return new
+
+def _insert_rows(cursor, records, fail):
+    """Insert one at a time, reporting the rows a concurrent write made duplicates"""
+    inserted = []
+    for row, record in records:
+        try:
+            cursor.execute(INSERT_SQL, record)
+        except IntegrityError:
+            fail(row, record[0], "a vehicle with this VIN already exists")
+            continue
+        inserted.append((row, record))
+    return inserted
+
+def _store_predictions(cursor, inserted, system):
+    """Score the inserted vehicles in one batch and store their predictions; returns how many"""
+    where, vins = _vin_filter(inserted)
+    cursor.execute(f"SELECT id, vin FROM vehicles WHERE {where}", vins)
+    ids = {vin.upper(): vehicle_id for vehicle_id, vin in cursor.fetchall()}
+    rows = [(ids[vin.upper()], model, year, mileage)
+            for _, (vin, _, model, year, _, _, _, mileage) in inserted]
+    try:
+        records = score_chunk(system, rows)
+    except Exception as e:
+        # Vehicles are still added; the nightly batch_scoring.py run scores them
+        print(f"Error scoring onboarded vehicles: {e}")
+        return 0
+    cursor.executemany(PREDICTIONS_SQL, records)
+    return len(records)
+
+def insert_chunk(conn, chunk, fail, system=None):
+    """
+    Insert a chunk of (row, record) pairs and their predictions in one transaction
+
+    Returns (inserted pairs, vehicles scored). If the transaction fails, every
+    row still pending is reported through fail(row, vin, error).
+    """
+    cursor = conn.cursor(buffered=True)
+    pending = chunk
+    try:
+        with metrics.DB_TIME.time(function="onboard_chunk"):
+            conn.start_transaction()
+            pending = _skip_existing(cursor, chunk, fail)
+            try:
+                if pending:
+                    # mysql-connector sends an INSERT ... VALUES executemany as multi-row INSERTs
+                    cursor.executemany(INSERT_SQL, [record for _, record in pending])
+            except IntegrityError:
+                # Another writer added one of the VINs since the check above
+                conn.rollback()
+                conn.start_transaction()
+                pending = _insert_rows(cursor, pending, fail)
+            scored = _store_predictions(cursor, pending, system) if pending and system else 0
+            conn.commit()
+    except Error as e:
+        conn.rollback()
+        for row, record in pending:
+            fail(row, record[0], f"not inserted: {e}")
+        return [], 0
+    finally:
+        cursor.close()
+
+    crud._invalidate_vehicle_cache(*((record[0], record[4]) for _, record in pending))
+    return pending, scored
+
+
+# ---------------- ONBOARDING ----------------
+def onboard(rows, chunk_size=CHUNK_SIZE, system=ml_system):
+    """
+    Validate, insert and score every (row number, fields) of an upload
+
+    Returns a report dict: rows read, vehicles inserted and scored, rows
+    failed, the first MAX_REPORTED_ERRORS errors as {row, vin, error},
+    seconds and rows/sec. If the upload itself stops being readable (bad
+    JSON, not UTF-8, a CSV field over csv's size limit), the rows read so far
+    are still inserted and the report gets an 'error'. Predictions are
+    skipped if `system` is None or its model cannot be loaded.
+    """
+    report = {'rows': 0, 'inserted': 0, 'scored': 0, 'failed': 0, 'errors': []}
+    system = system if system is not None and system.ensure_loaded() else None
+    start = time.perf_counter()
+
+    def fail(row, vin, error):
+        report['failed'] += 1
+        if len(report['errors']) < MAX_REPORTED_ERRORS:
+            report['errors'].append({'row': row, 'vin': vin, 'error': error})
+
+    def flush(chunk):
+        inserted, scored = insert_chunk(conn, chunk, fail, system)
+        report['inserted'] += len(inserted)
+        report['scored'] += scored
+
+    conn = db_pool.get_pool().get_connection()
+    seen = set()    # VINs earlier in this upload
+    chunk = []
+    try:
+        try:
+            for row, fields in rows:
+                report['rows'] += 1
+                try:
+                    record = parse_row(fields)
+                except ValueError as e:
+                    fail(row, fields.get('vin') if isinstance(fields, dict) else None, str(e))
+                    continue
+                if record[0].upper() in seen:
+                    fail(row, record[0], "the VIN appears earlier in this upload")
+                    continue
+                seen.add(record[0].upper())
+                chunk.append((row, record))
+                if len(chunk) >= chunk_size:
+                    flush(chunk)
+                    chunk = []
+        except (ValueError, csv.Error) as e:
+            report['error'] = f"the upload could not be read after {report['rows']} rows: {e}"
+        if chunk:
+            flush(chunk)
+    finally:
+        conn.close()
+
+    report['errors'].sort(key=lambda error: error['row'])
+    report['seconds'] = time.perf_counter() - start
+    report['rows_per_sec'] = report['rows'] / report['seconds'] if report['seconds'] else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add vehicles from a CSV or JSON file")
+    parser.add_argument("path", help="CSV with a header row, or a JSON list of vehicles")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="vehicles inserted per transaction")
+    parser.add_argument("--engine", choices=INFERENCE_ENGINES, default="sklearn", help="inference engine")
+    parser.add_argument("--no-score", action="store_true", help="add the vehicles without predictions")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BULK VEHICLE ONBOARDING")
+    print("=" * 60)
+    system = None if args.no_score else load_system(args.engine)
+    read = read_json if args.path.lower().endswith(".json") else read_csv
+    try:
+        with open(args.path, "rb") as f:
+            report = onboard(read(f), args.chunk_size, system)
+    except (Error, ValueError) as e:
+        sys.exit(f"❌ Onboarding failed: {e}")
+    finally:
+        db_pool.close_pools()
+
+    for error in report['errors']:
+        print(f"  row {error['row']} ({error['vin'] or 'no VIN'}): {error['error']}")
+    if report['failed'] > len(report['errors']):
+        print(f"  ... and {report['failed'] - len(report['errors'])} more")
+    if 'error' in report:
+        print(f"❌ {report['error']}")
+    print(f"\n✅ {report['inserted']:,} of {report['rows']:,} vehicles added, {report['scored']:,} scored, "
+          f"{report['failed']:,} failed ({report['seconds']:.1f}s, {report['rows_per_sec']:,.0f} rows/sec)")
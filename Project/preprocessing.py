@@ -0,0 +1,85 @@
+"""
+Service issue label preprocessing shared by train_model.py and evaluate_model.py
+
+`service_issues` holds comma-separated issue names. Histories repeat the same
+few thousand combinations, so each distinct string is parsed once (factorize),
+its issues are split and stripped with vectorized string ops, and rows are
+mapped to label columns through integer codes. The result is a sparse CSR
+matrix with one uint8 column per issue, instead of per-row Python lists and a
+dense MultiLabelBinarizer output.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import MultiLabelBinarizer
+
+LABEL_DTYPE = np.uint8
+
+
+def parse_issue_labels(issues, classes=None):
+    """
+    Parse a Series of comma-separated issue strings into a sparse label matrix
+
+    Returns (csr matrix of shape (len(issues), n_classes), classes). Without
+    `classes`, every issue seen becomes a column, sorted by name like
+    MultiLabelBinarizer. With `classes`, issues outside it are dropped.
+    """
+    issues = pd.Series(issues, copy=False)
+    row_codes, combos = pd.factorize(issues, sort=False)
+
+    # Split each distinct combination once: (combination id, issue name) pairs
+    parts = pd.Series(combos, dtype=object).str.split(',').explode().str.strip()
+    combo_ids = parts.index.to_numpy()
+    names = parts.to_numpy(dtype=object)
+
+    if classes is None:
+        classes = np.array(sorted(set(names)), dtype=object)
+    else:
+        classes = np.asarray(classes, dtype=object)
+    label_ids = pd.Index(classes).get_indexer(names)
+    known = label_ids >= 0
+
+    # Small (combinations x labels) matrix, then one row gather for the whole history
+    combo_matrix = sparse.csr_matrix(
+        (np.ones(known.sum(), dtype=LABEL_DTYPE), (combo_ids[known], label_ids[known])),
+        shape=(len(combos), len(classes))
+    )
+    combo_matrix.sum_duplicates()
+    combo_matrix.data[:] = 1
+
+    if len(row_codes) and row_codes.min() < 0:
+        # Missing values carry no issues
+        combo_matrix = sparse.vstack([combo_matrix, sparse.csr_matrix((1, len(classes)), dtype=LABEL_DTYPE)]).tocsr()
+        row_codes = np.where(row_codes < 0, len(combos), row_codes)
+    return combo_matrix[row_codes], classes
+
+
+def reindex_labels(labels, classes, target_classes):
+    """Reorder a label matrix's columns to `target_classes` (unknown columns dropped, missing ones empty)"""
+    source = pd.Index(classes).get_indexer(target_classes)
+    labels = labels.tocsc()
+    columns = [labels[:, i] if i >= 0 else sparse.csc_matrix((labels.shape[0], 1), dtype=LABEL_DTYPE)
+               for i in source]
+    return sparse.hstack(columns, format='csr', dtype=LABEL_DTYPE)
+
+
+def stack_label_chunks(chunks):
+    """vstack (labels, classes) pairs parsed chunk by chunk onto their union of classes"""
+    classes = np.array(sorted(set().union(*(c for _, c in chunks))), dtype=object)
+    matrices = [labels if np.array_equal(c, classes) else reindex_labels(labels, c, classes)
+                for labels, c in chunks]
+    if not matrices:
+        return sparse.csr_matrix((0, 0), dtype=LABEL_DTYPE), classes
+    return sparse.vstack(matrices, format='csr', dtype=LABEL_DTYPE), classes
+
+
+def label_column(labels, i):
+    """Dense 1-D column `i` of a sparse or dense label matrix"""
+    if sparse.issparse(labels):
+        return labels[:, [i]].toarray().ravel()
+    return np.asarray(labels[:, i])
+
+
+def make_binarizer(classes):
+    """A fitted MultiLabelBinarizer with exactly `classes`, for saving alongside the model"""
+    return MultiLabelBinarizer(classes=list(classes)).fit([])
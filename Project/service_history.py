@@ -0,0 +1,195 @@
+"""
+Service history storage: streaming bulk import of the service history CSV into
+the `service_records` table, and loading the history back for training.
+
+    python service_history.py import vehicle_service_history.csv [--chunk-size 10000] [--method executemany|load-data]
+
+The import reads the CSV in fixed-size chunks, so memory stays flat no matter
+how many rows the file has. Each chunk is inserted and its checkpoint updated in
+one transaction, so an interrupted import resumes after the last committed chunk.
+"""
+import argparse
+import csv
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from mysql.connector import Error
+
+import db_pool
+
+HISTORY_COLUMNS = ['company', 'model', 'year', 'vehicle_age', 'mileage', 'service_issues']
+DEFAULT_CSV = 'vehicle_service_history.csv'
+CHUNK_SIZE = 10000
+
+INSERT_SQL = """
+    INSERT INTO service_records (company, model, year, vehicle_age, mileage, service_issues)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+CHECKPOINT_SQL = """
+    INSERT INTO import_checkpoints (source, rows_done) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE rows_done = VALUES(rows_done)
+"""
+
+
+# ---------------- IMPORT ----------------
+def _checkpoint_key(csv_path):
+    return os.path.abspath(csv_path)[-255:]
+
+def get_checkpoint(cursor, source):
+    cursor.execute("SELECT rows_done FROM import_checkpoints WHERE source=%s", (source,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+def _insert_executemany(cursor, chunk):
+    # mysql-connector rewrites an INSERT ... VALUES executemany into multi-row INSERTs
+    cursor.executemany(INSERT_SQL, list(chunk.itertuples(index=False, name=None)))
+
+def load_data_infile(cursor, table, chunk):
+    """Bulk load a DataFrame into `table` (columns named like the frame's) via a temporary CSV"""
+    # Requires local_infile enabled on the server and allow_local_infile on the client
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='') as f:
+        chunk.to_csv(f, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+        path = f.name
+    try:
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            ({', '.join(chunk.columns)})
+        """, (path,))
+    finally:
+        os.remove(path)
+
+def _insert_load_data(cursor, chunk):
+    load_data_infile(cursor, 'service_records', chunk[HISTORY_COLUMNS])
+
+INSERT_METHODS = {
+    'executemany': _insert_executemany,
+    'load-data': _insert_load_data,
+}
+
+def import_csv(csv_path=DEFAULT_CSV, chunk_size=CHUNK_SIZE, method='executemany', restart=False):
+    """
+    Stream `csv_path` into service_records, resuming from the last checkpoint
+
+    Returns a dict with rows imported, seconds taken and rows/sec.
+    """
+    insert = INSERT_METHODS[method]
+    source = _checkpoint_key(csv_path)
+    overrides = {'allow_local_infile': True} if method == 'load-data' else {}
+
+    conn = db_pool.get_pool(**overrides).get_connection()
+    cursor = conn.cursor()
+    try:
+        if restart:
+            cursor.execute("DELETE FROM import_checkpoints WHERE source=%s", (source,))
+            conn.commit()
+        rows_done = get_checkpoint(cursor, source)
+        if rows_done:
+            print(f"Resuming after row {rows_done:,}")
+
+        start = time.perf_counter()
+        imported = 0
+        with open(csv_path, newline='') as f:
+            header = next(csv.reader([f.readline()]))
+            # Skip already imported rows line by line (records never span lines)
+            for _ in itertools.islice(f, rows_done):
+                pass
+            reader = pd.read_csv(f, header=None, names=header, usecols=HISTORY_COLUMNS, chunksize=chunk_size)
+            for chunk in reader:
+                chunk = chunk[HISTORY_COLUMNS]
+                conn.start_transaction()
+                insert(cursor, chunk)
+                rows_done += len(chunk)
+                cursor.execute(CHECKPOINT_SQL, (source, rows_done))
+                conn.commit()
+
+                imported += len(chunk)
+                elapsed = time.perf_counter() - start
+                print(f"  {rows_done:,} rows committed ({imported / elapsed:,.0f} rows/sec)")
+
+        elapsed = time.perf_counter() - start
+        return {
+            'rows': imported,
+            'seconds': elapsed,
+            'rows_per_sec': imported / elapsed if elapsed else 0.0,
+        }
+    except Error:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+# ---------------- LOAD ----------------
+def iter_from_db(chunk_size=CHUNK_SIZE, since_id=None):
+    """Stream service_records (only ids above `since_id` if given) as DataFrames of up to chunk_size rows"""
+    conn = db_pool.get_pool().get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(HISTORY_COLUMNS)} FROM service_records WHERE id > %s ORDER BY id",
+            (since_id or 0,)
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+        cursor.close()
+    finally:
+        # A half-read stream leaves the connection unusable; the pool discards it
+        conn.close()
+
+def count_from_db(since_id=None):
+    conn = db_pool.get_pool().get_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COUNT(*) FROM service_records WHERE id > %s", (since_id or 0,))
+        return cursor.fetchone()[0]
+    finally:
+        cursor.close()
+        conn.close()
+
+def load_from_db(chunk_size=CHUNK_SIZE, since_id=None):
+    """Read service_records (only ids above `since_id` if given) into a DataFrame with the CSV's columns"""
+    frames = list(iter_from_db(chunk_size, since_id))
+    if not frames:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+def load_service_history(csv_path=DEFAULT_CSV, from_db=False):
+    """Service history for training/evaluation, from the CSV or the service_records table"""
+    if from_db:
+        return load_from_db()
+    return pd.read_csv(csv_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import service history into MySQL")
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="stream a service history CSV into service_records")
+    imp.add_argument("csv_path", nargs="?", default=DEFAULT_CSV)
+    imp.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    imp.add_argument("--method", choices=sorted(INSERT_METHODS), default="executemany")
+    imp.add_argument("--restart", action="store_true", help="ignore the saved checkpoint (already imported rows are kept)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("SERVICE HISTORY BULK IMPORT")
+    print("=" * 60)
+    try:
+        report = import_csv(args.csv_path, args.chunk_size, args.method, args.restart)
+    except Error as e:
+        sys.exit(f"❌ Import failed: {e}")
+    finally:
+        db_pool.close_pools()
+
+    print(f"\n✅ Imported {report['rows']:,} rows in {report['seconds']:.1f}s "
+          f"({report['rows_per_sec']:,.0f} rows/sec)")
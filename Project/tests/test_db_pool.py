@@ -0,0 +1,34 @@
+"""db_pool.get_pool must never hand back a pool built with other settings than asked for"""
+import pytest
+
+import db_pool
+
+
+def fake_connect(**connect_args):
+    return connect_args
+
+@pytest.fixture(autouse=True)
+def fresh_pools():
+    db_pool.close_pools()
+    yield
+    db_pool.close_pools()
+
+
+def test_same_settings_share_a_pool():
+    pool = db_pool.get_pool(connect=fake_connect)
+    assert db_pool.get_pool() is pool
+    assert db_pool.get_pool(connect=fake_connect) is pool
+
+def test_connection_overrides_get_their_own_pool():
+    pool = db_pool.get_pool(connect=fake_connect)
+    local_infile = db_pool.get_pool(allow_local_infile=True, connect=fake_connect)
+    assert local_infile is not pool
+    assert db_pool.get_pool(allow_local_infile=True) is local_infile
+    assert local_infile._connect_args["allow_local_infile"] is True
+    assert "allow_local_infile" not in pool._connect_args
+    assert set(db_pool.pool_stats()) == {"automotive_db", "automotive_db (allow_local_infile=True)"}
+
+def test_different_pool_options_raise():
+    db_pool.get_pool(size=2, connect=fake_connect)
+    with pytest.raises(ValueError):
+        db_pool.get_pool(size=5, connect=fake_connect)
@@ -0,0 +1,16 @@
+"""Importing the web apps stays within the import-time budget and never loads the model's stack"""
+import pytest
+
+from benchmarks.bench_import_time import DEFERRED_MODULES, IMPORT_BUDGET_MS, module_imports, run_child
+
+RUNS = 3    # best of, so one slow run on a busy machine does not fail the test
+
+
+@pytest.mark.parametrize("module", ["app", "asgi_app"])
+def test_import_within_budget(module):
+    runs = [module_imports(run_child(module), module) for _ in range(RUNS)]
+    total_us, imports = min(runs, key=lambda run: run[0])
+    assert total_us / 1000 <= IMPORT_BUDGET_MS, f"import {module} took {total_us / 1000:.0f} ms"
+
+    loaded = {name.split(".")[0] for _, _, _, name in imports}
+    assert not loaded.intersection(DEFERRED_MODULES), f"import {module} loaded {sorted(loaded & set(DEFERRED_MODULES))}"
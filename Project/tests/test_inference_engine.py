@@ -0,0 +1,50 @@
+"""ForestInferenceEngine must predict exactly what MultiOutputClassifier.predict does"""
+import os
+
+import numpy as np
+import pytest
+
+import model_bundle
+from ml_predictor import ForestInferenceEngine, ServiceRecommendationSystem
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_ROWS = 2000
+
+
+@pytest.fixture(scope="module")
+def system():
+    if not os.path.exists(os.path.join(PROJECT_DIR, "service_recommendation_model.pkl")):
+        pytest.skip("no trained model; run train_model.py first")
+    system = ServiceRecommendationSystem(inference_engine="sklearn")
+    assert system.load_model()
+    return system
+
+@pytest.fixture(scope="module")
+def features(system):
+    """Seeded sample of encoded vehicles, including models the encoder does not know"""
+    rng = np.random.default_rng(0)
+    names = [f"{company} {model}" for company in system.feature_info["companies"]
+             for model in system.feature_info["models"]] + ["Unknown Car"]
+    return system._encode_features(
+        [names[i] for i in rng.integers(0, len(names), SAMPLE_ROWS)],
+        rng.integers(1995, 2025, SAMPLE_ROWS),
+        rng.integers(0, 300000, SAMPLE_ROWS),
+    )
+
+
+def test_flattened_model_matches_sklearn(system, features):
+    engine = ForestInferenceEngine.from_sklearn(system.model, max_cells=10_000)
+    np.testing.assert_array_equal(engine.predict(features), system.model.predict(features))
+
+def test_bundle_matches_sklearn(system, features):
+    bundle_path = os.path.join(PROJECT_DIR, model_bundle.BUNDLE_FILENAME)
+    if not os.path.exists(bundle_path):
+        pytest.skip(f"no {model_bundle.BUNDLE_FILENAME}; run train_model.py first")
+    engine = ForestInferenceEngine(model_bundle.load_bundle(bundle_path, mmap=True).forest)
+    np.testing.assert_array_equal(engine.predict(features), system.model.predict(features))
+
+def test_single_rows_match_batch(system, features):
+    engine = ForestInferenceEngine.from_sklearn(system.model)
+    batch = engine.predict(features[:50])
+    for row, expected in zip(features[:50], batch):
+        np.testing.assert_array_equal(engine.predict(row[None, :])[0], expected)
@@ -0,0 +1,50 @@
+"""iter_from_db must give its connection back even when the consumer stops early"""
+import pytest
+from mysql.connector import InternalError
+
+import db_pool
+import service_history
+
+
+class UnbufferedCursor:
+    """Like mysql-connector's default cursor: close() refuses while rows are unread"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params):
+        self.conn.unread_result = True
+
+    def fetchmany(self, size):
+        return [tuple(range(len(service_history.HISTORY_COLUMNS)))] * size
+
+    def close(self):
+        if self.conn.unread_result:
+            raise InternalError("Unread result found")
+
+
+class FakeConnection:
+    unread_result = False
+    in_transaction = False
+
+    def cursor(self):
+        return UnbufferedCursor(self)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def pool():
+    db_pool.close_pools()
+    yield db_pool.get_pool(connect=lambda **_: FakeConnection())
+    db_pool.close_pools()
+
+
+def test_stopping_early_releases_the_connection(pool):
+    chunks = service_history.iter_from_db(chunk_size=10)
+    next(chunks)
+    chunks.close()
+    stats = pool.stats()
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 0   # unusable after a half-read stream, so discarded
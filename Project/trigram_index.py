@@ -0,0 +1,104 @@
+"""
+In-process trigram index for fuzzy name matching
+
+TrigramIndex keeps every distinct name with a posting list per trigram, so a
+query only scores names that share at least one trigram with it. Names are
+loaded from a loader function and reloaded once they are older than `ttl`
+seconds; add() makes a new name searchable right away. Trigrams follow
+pg_trgm: lowercased words padded with two spaces in front and one behind, so
+"Rmesh Garg" still finds "Ramesh Garg" and "ram" finds every Ramesh.
+"""
+import heapq
+import threading
+import time
+from collections import Counter
+
+
+def trigrams(text):
+    """Set of padded, lowercased word trigrams of `text`"""
+    grams = set()
+    for word in text.lower().split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """Distinct names searchable by trigram similarity"""
+
+    def __init__(self, loader, ttl=300):
+        self._loader = loader           # () -> iterable of names
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._reset()
+
+    def _reset(self):
+        self._names = []                # position -> name
+        self._positions = {}            # name -> position
+        self._sizes = []                # position -> number of trigrams
+        self._postings = {}             # trigram -> [positions]
+
+    def _add(self, name):
+        if not name or name in self._positions:
+            return
+        position = len(self._names)
+        grams = trigrams(name)
+        self._names.append(name)
+        self._positions[name] = position
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+
+    def add(self, name):
+        """Make a new name searchable without waiting for the next reload"""
+        with self._lock:
+            if self._loaded_at is not None:
+                self._add(name)
+
+    def reload(self, names=None):
+        """Rebuild from `names` or the loader; names no longer loaded drop out"""
+        names = list(self._loader() if names is None else names)
+        with self._lock:
+            self._reset()
+            for name in names:
+                self._add(name)
+            self._loaded_at = time.monotonic()
+
+    def is_stale(self):
+        """True before the first load and once the names are older than ttl"""
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def _ensure_fresh(self):
+        if self.is_stale():
+            self.reload()
+
+    def match(self, text, limit=10, min_score=0.5):
+        """
+        Up to `limit` (name, score) pairs, best first
+
+        The score is the share of the query's trigrams found in the name, so a
+        whole word scores 1.0 and a prefix nearly as much; ties go to the
+        closer overall match.
+        """
+        grams = trigrams(text)
+        if not grams:
+            return []
+        self._ensure_fresh()
+
+        with self._lock:
+            common = Counter()
+            for gram in grams:
+                common.update(self._postings.get(gram, ()))
+            scored = []
+            for position, shared in common.items():
+                score = shared / len(grams)
+                if score >= min_score:
+                    similarity = shared / (len(grams) + self._sizes[position] - shared)
+                    scored.append((score, similarity, self._names[position]))
+
+        return [(name, score) for score, _, name in heapq.nlargest(limit, scored)]
+
+    def __len__(self):
+        return len(self._names)